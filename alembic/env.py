@@ -18,7 +18,13 @@ if config.config_file_name is not None:
 target_metadata = Base.metadata
 
 def get_url():
-    return settings.get_database_url
+    # 分片迁移（app/services/shard_service.py）通过 config.attributes 传入目标库和分片名；
+    # 手动迁移单个分片：alembic -x url=postgresql://... -x shard=<分片名> upgrade head
+    return (
+        config.attributes.get("url")
+        or context.get_x_argument(as_dictionary=True).get("url")
+        or settings.get_database_url
+    )
 
 def run_migrations_offline():
     url = get_url()
@@ -0,0 +1,31 @@
+"""add memory scope index for range reads and etag versions
+
+Revision ID: a1c3e5f70029
+Revises: 
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1c3e5f70029'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_memories_user_type_start',
+        'memories',
+        ['user_id', 'memory_type', 'start_time'],
+        postgresql_include=['updated_at'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_memories_user_type_start', table_name='memories')
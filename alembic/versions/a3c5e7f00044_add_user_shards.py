@@ -0,0 +1,38 @@
+"""add user_shards directory for per-user sharding
+
+Revision ID: a3c5e7f00044
+Revises: f2b4d6e90043
+Create Date: 2026-10-19 22:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c5e7f00044'
+down_revision: Union[str, None] = 'f2b4d6e90043'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 只有全局库使用；分片库执行同一套迁移，这张表保持为空。
+    # 没有目录记录的用户数据留在全局库，因此无需回填
+    op.create_table(
+        'user_shards',
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('users.id'), primary_key=True),
+        sa.Column('shard', sa.String(length=64), nullable=False, comment='分片名，对应 POSTGRES_SHARD_URLS 的键，global 为全局库'),
+        sa.Column('moving', sa.Boolean(), nullable=False, server_default=sa.false(), comment='正在迁移到其他分片，期间拒绝写请求'),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+    )
+    op.create_index('ix_user_shards_shard', 'user_shards', ['shard'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_user_shards_shard', table_name='user_shards')
+    op.drop_table('user_shards')
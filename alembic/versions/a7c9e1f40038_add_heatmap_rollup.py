@@ -0,0 +1,36 @@
+"""add heatmap_rollup table for hour-of-week activity heatmaps
+
+Revision ID: a7c9e1f40038
+Revises: f6b8d0e30037
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7c9e1f40038'
+down_revision: Union[str, None] = 'f6b8d0e30037'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 汇总按需生成，无需回填
+    op.create_table(
+        'heatmap_rollup',
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('users.id'), primary_key=True),
+        sa.Column('tag_id', sa.Integer(), primary_key=True, comment='标签 ID，0 表示全部活动'),
+        sa.Column('day', sa.Date(), primary_key=True, comment='日期'),
+        sa.Column('hours', postgresql.ARRAY(sa.Float()), nullable=False, comment='0~23 点每小时的活动秒数'),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('heatmap_rollup')
@@ -0,0 +1,191 @@
+"""partition memories by month on start_time
+
+把 memories 迁移为按 start_time 按月范围分区的表，全程不长时间持有排他锁：
+
+1. 新建分区表 memories_partitioned（结构与 memories 相同，主键 (id, start_time)），
+   创建覆盖已有数据到未来几个月的月分区和默认分区
+2. 在旧表上挂触发器，把迁移期间的写入同步到新表，并把空的 start_time 补为 created_at
+   （created_at 为 UTC，start_time 为应用主机的本地时间，补值时换算到本地时区）
+3. 分批（autocommit，每批独立提交）补齐旧表空的 start_time、按 id 键集分页复制数据
+4. 短事务内锁表、修正复制期间被改动过的行、交换表名；旧表保留为 memories_legacy，
+   确认无误后可手动 DROP
+
+可通过 -x batch_size=10000 -x pause=0.05 调整批大小和每批之间的停顿（秒）；
+-x timezone=Asia/Shanghai 指定应用的本地时区，默认取执行迁移的主机的时区。
+
+Revision ID: b2d4f6a80032
+Revises: a1c3e5f70029
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+import os
+import re
+import time
+from datetime import date, datetime
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b2d4f6a80032'
+down_revision: Union[str, None] = 'a1c3e5f70029'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def options():
+    x_args = context.get_x_argument(as_dictionary=True)
+    return int(x_args.get('batch_size', 10000)), float(x_args.get('pause', 0.05))
+
+
+def local_zone() -> str:
+    """应用本地时区的 SQL 表达式，用于 AT TIME ZONE
+
+    优先取 -x timezone=，其次 TZ 环境变量和 /etc/localtime，都没有时退回当前的 UTC 偏移。
+    """
+    zone = context.get_x_argument(as_dictionary=True).get('timezone') or os.environ.get('TZ', '').lstrip(':')
+    if not zone:
+        link = os.path.realpath('/etc/localtime')
+        if 'zoneinfo/' in link:
+            zone = link.split('zoneinfo/', 1)[1]
+    if zone and re.fullmatch(r'[A-Za-z0-9_+\-/]+', zone):
+        return f"'{zone}'"
+    offset = datetime.now().astimezone().utcoffset()
+    return f"INTERVAL '{int(offset.total_seconds())} seconds'"
+
+
+def upgrade() -> None:
+    batch_size, pause = options()
+    conn = op.get_bind()
+    # start_time 与应用写入的值一致，为本地时间；created_at / updated_at 为 UTC
+    zone = local_zone()
+    local_now = f"(now() AT TIME ZONE {zone})"
+    local_created = f"(created_at AT TIME ZONE 'UTC' AT TIME ZONE {zone})"
+    local_new_created = f"(NEW.created_at AT TIME ZONE 'UTC' AT TIME ZONE {zone})"
+    # updated_at / created_at 为 naive UTC，起始时间也按 UTC 取，否则步骤 4 会漏掉或多同步行
+    started_at = conn.execute(sa.text("SELECT timezone('utc', now())")).scalar()
+
+    # 1. 新建分区表
+    op.execute("CREATE TABLE memories_partitioned (LIKE memories INCLUDING DEFAULTS) PARTITION BY RANGE (start_time)")
+    op.execute("ALTER TABLE memories_partitioned ALTER COLUMN start_time SET NOT NULL")
+    op.execute("ALTER TABLE memories_partitioned ADD CONSTRAINT memories_partitioned_pkey PRIMARY KEY (id, start_time)")
+    op.execute(
+        "ALTER TABLE memories_partitioned ADD CONSTRAINT memories_partitioned_user_id_fkey "
+        "FOREIGN KEY (user_id) REFERENCES users (id)"
+    )
+    op.execute(
+        "CREATE INDEX ix_memories_partitioned_user_type_start ON memories_partitioned "
+        "(user_id, memory_type, start_time) INCLUDE (updated_at)"
+    )
+
+    first = conn.execute(sa.text(f"SELECT min(coalesce(start_time, {local_created})) FROM memories")).scalar()
+    month = (first.date() if first else date.today()).replace(day=1)
+    last = add_months(date.today().replace(day=1), MONTHS_AHEAD)
+    while month <= last:
+        upper = add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE memories_y{month.year}m{month.month:02d} PARTITION OF memories_partitioned "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+        )
+        month = upper
+    op.execute("CREATE TABLE memories_default PARTITION OF memories_partitioned DEFAULT")
+
+    # 2. 同步触发器：迁移期间旧表的写入实时镜像到新表；
+    #    删除的 id 另行记录，交换前清理被批量复制"复活"的行
+    op.execute("CREATE TABLE memories_migration_deleted (id uuid NOT NULL)")
+    op.execute(f"""
+        CREATE FUNCTION memories_sync_partitioned() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                DELETE FROM memories_partitioned WHERE id = OLD.id;
+            END IF;
+            IF TG_OP = 'DELETE' THEN
+                INSERT INTO memories_migration_deleted VALUES (OLD.id);
+                RETURN OLD;
+            END IF;
+            NEW.start_time := coalesce(NEW.start_time, {local_new_created}, {local_now});
+            INSERT INTO memories_partitioned SELECT (NEW).* ON CONFLICT DO NOTHING;
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute(
+        "CREATE TRIGGER memories_sync_partitioned BEFORE INSERT OR UPDATE OR DELETE ON memories "
+        "FOR EACH ROW EXECUTE FUNCTION memories_sync_partitioned()"
+    )
+
+    # 3. 分批补齐 start_time 并复制数据，每批独立提交
+    with context.get_context().autocommit_block():
+        while True:
+            filled = conn.execute(sa.text(
+                f"UPDATE memories SET start_time = coalesce({local_created}, {local_now}) "
+                "WHERE id IN (SELECT id FROM memories WHERE start_time IS NULL LIMIT :batch)"
+            ), {"batch": batch_size}).rowcount
+            if not filled:
+                break
+            time.sleep(pause)
+
+        last_id = None
+        while True:
+            last_id = conn.execute(sa.text(
+                "WITH batch AS ("
+                "  SELECT * FROM memories "
+                "  WHERE (CAST(:last_id AS uuid) IS NULL OR id > CAST(:last_id AS uuid)) "
+                "  ORDER BY id LIMIT :batch"
+                "), copied AS ("
+                "  INSERT INTO memories_partitioned SELECT * FROM batch ON CONFLICT DO NOTHING"
+                ") SELECT max(id::text) FROM batch"
+            ), {"last_id": last_id, "batch": batch_size}).scalar()
+            if last_id is None:
+                break
+            time.sleep(pause)
+
+    # 4. 短事务内交换表名
+    op.execute("LOCK TABLE memories IN ACCESS EXCLUSIVE MODE")
+    # 复制期间被修改过的行：以旧表为准重新同步（只涉及迁移开始后更新过的行）
+    op.execute(sa.text(
+        "DELETE FROM memories_partitioned p USING memories m "
+        "WHERE p.id = m.id AND m.updated_at >= :started_at"
+    ).bindparams(started_at=started_at))
+    op.execute(sa.text(
+        "INSERT INTO memories_partitioned SELECT * FROM memories WHERE updated_at >= :started_at "
+        "ON CONFLICT DO NOTHING"
+    ).bindparams(started_at=started_at))
+    op.execute(
+        "DELETE FROM memories_partitioned p USING memories_migration_deleted d "
+        "WHERE p.id = d.id AND NOT EXISTS (SELECT 1 FROM memories m WHERE m.id = d.id)"
+    )
+
+    op.execute("DROP TRIGGER memories_sync_partitioned ON memories")
+    op.execute("DROP FUNCTION memories_sync_partitioned()")
+    op.execute("DROP TABLE memories_migration_deleted")
+    op.execute("ALTER TABLE memories RENAME TO memories_legacy")
+    op.execute("ALTER INDEX memories_pkey RENAME TO memories_legacy_pkey")
+    op.execute("ALTER INDEX ix_memories_user_type_start RENAME TO ix_memories_legacy_user_type_start")
+    op.execute("ALTER TABLE memories_partitioned RENAME TO memories")
+    op.execute("ALTER INDEX memories_partitioned_pkey RENAME TO memories_pkey")
+    op.execute("ALTER INDEX ix_memories_partitioned_user_type_start RENAME TO ix_memories_user_type_start")
+
+
+def downgrade() -> None:
+    # 把分区表中的数据整体写回普通表后交换回去
+    op.execute("LOCK TABLE memories IN ACCESS EXCLUSIVE MODE")
+    op.execute("ALTER TABLE memories_legacy DROP CONSTRAINT IF EXISTS memories_previous_memory_id_fkey")
+    op.execute("ALTER TABLE memories_legacy DROP CONSTRAINT IF EXISTS memories_next_memory_id_fkey")
+    op.execute("TRUNCATE memories_legacy")
+    op.execute("INSERT INTO memories_legacy SELECT * FROM memories")
+    op.execute("DROP TABLE memories CASCADE")
+    op.execute("ALTER TABLE memories_legacy RENAME TO memories")
+    op.execute("ALTER INDEX memories_legacy_pkey RENAME TO memories_pkey")
+    op.execute("ALTER INDEX ix_memories_legacy_user_type_start RENAME TO ix_memories_user_type_start")
+    op.execute("ALTER TABLE memories ADD FOREIGN KEY (previous_memory_id) REFERENCES memories (id)")
+    op.execute("ALTER TABLE memories ADD FOREIGN KEY (next_memory_id) REFERENCES memories (id)")
@@ -0,0 +1,95 @@
+"""store matter descriptions and completion notes in structured columns
+
+重要事项的描述以前以 "\n---\n" 拼接在 content 里，结束活动时又把完成时间、持续时间和备注
+追加到 content。新增 completion_note 列，并分批（autocommit，每批独立提交）按 (start_time, id)
+键集把已有数据拆回 content / description / completion_note。
+
+可通过 -x batch_size=10000 -x pause=0.05 调整批大小和每批之间的停顿（秒）。
+
+Revision ID: b8d0f2a50039
+Revises: a7c9e1f40038
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+import time
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8d0f2a50039'
+down_revision: Union[str, None] = 'a7c9e1f40038'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# end_activity 旧格式：{content}\n---\n完成时间：HH:MM:SS\n持续时间：X分钟\n完成备注：{note}
+COMPLETION_PATTERN = r'^(.*)\n---\n完成时间：[^\n]*\n持续时间：[^\n]*\n完成备注：(.*)$'
+
+
+def options():
+    x_args = context.get_x_argument(as_dictionary=True)
+    return int(x_args.get('batch_size', 10000)), float(x_args.get('pause', 0.05))
+
+
+def backfill(conn, batch_size: int, pause: float, assignments: str, condition: str) -> None:
+    """按 (start_time, id) 键集分批执行 UPDATE memories SET {assignments} WHERE {condition}"""
+    last = (None, None)
+    while True:
+        row = conn.execute(sa.text(
+            "WITH batch AS ("
+            "  SELECT id, start_time FROM memories "
+            "  WHERE CAST(:last_start AS timestamp) IS NULL "
+            "     OR (start_time, id) > (CAST(:last_start AS timestamp), CAST(:last_id AS uuid)) "
+            "  ORDER BY start_time, id LIMIT :batch"
+            "), fixed AS ("
+            f"  UPDATE memories m SET {assignments} "
+            "  FROM batch b "
+            f"  WHERE m.id = b.id AND m.start_time = b.start_time AND {condition}"
+            ") SELECT start_time, id FROM batch ORDER BY start_time DESC, id DESC LIMIT 1"
+        ), {
+            "last_start": last[0],
+            "last_id": last[1],
+            "batch": batch_size,
+            "pattern": COMPLETION_PATTERN,
+        }).first()
+        if row is None:
+            break
+        last = (row.start_time, row.id)
+        time.sleep(pause)
+
+
+def upgrade() -> None:
+    batch_size, pause = options()
+    conn = op.get_bind()
+
+    op.add_column('memories', sa.Column('completion_note', sa.Text(), nullable=True, comment='完成备注'))
+
+    with context.get_context().autocommit_block():
+        # 重要事项：第一个分隔符之前是标题，之后是描述
+        backfill(
+            conn, batch_size, pause,
+            assignments=(
+                "content = left(m.content, strpos(m.content, E'\\n---\\n') - 1), "
+                "description = coalesce(m.description, substr(m.content, strpos(m.content, E'\\n---\\n') + 5))"
+            ),
+            condition=(
+                "m.memory_type = 'CORE_FOCUS' AND m.focus_type = 'IMPORTANT' "
+                "AND strpos(m.content, E'\\n---\\n') > 0"
+            ),
+        )
+        # 时间轴活动：去掉追加的完成信息，备注移到 completion_note
+        backfill(
+            conn, batch_size, pause,
+            assignments=(
+                "content = (regexp_match(m.content, :pattern, 's'))[1], "
+                "completion_note = (regexp_match(m.content, :pattern, 's'))[2]"
+            ),
+            condition="m.memory_type = 'TIMELINE' AND m.content ~ :pattern",
+        )
+
+
+def downgrade() -> None:
+    # 只删除新列，不把备注拼回 content
+    op.drop_column('memories', 'completion_note')
@@ -0,0 +1,46 @@
+"""add memory_archive table for cold storage
+
+Revision ID: c3e5a7b90033
+Revises: b2d4f6a80032
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e5a7b90033'
+down_revision: Union[str, None] = 'b2d4f6a80032'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'memory_archive',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column(
+            'memory_type',
+            postgresql.ENUM(name='memorytype', create_type=False),
+            nullable=False,
+            comment='记忆类型',
+        ),
+        sa.Column('start_time', sa.DateTime(), nullable=False, comment='活动开始时间'),
+        sa.Column('payload', sa.LargeBinary(), nullable=False, comment='zlib 压缩的整行 JSON'),
+        sa.Column('archived_at', sa.DateTime(), nullable=True, comment='归档时间'),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+    )
+    # payload 已压缩，关闭 TOAST 的二次压缩
+    op.execute("ALTER TABLE memory_archive ALTER COLUMN payload SET STORAGE EXTERNAL")
+    op.create_index('ix_memory_archive_user_start', 'memory_archive', ['user_id', 'start_time'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_memory_archive_user_start', table_name='memory_archive')
+    op.drop_table('memory_archive')
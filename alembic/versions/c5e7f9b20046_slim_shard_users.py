@@ -0,0 +1,44 @@
+"""slim users copies on shards: credential columns nullable and cleared
+
+分片上的 users 副本只保存外键和按用户规则的查询需要的列（见 app.db.shards.SHARD_USER_COLUMNS），
+邮箱、用户名和密码哈希只保存在全局库。本迁移只作用于分片库：由 shard_service migrate 传入分片名，
+手动迁移单个分片时用 alembic -x url=postgresql://... -x shard=<分片名> upgrade head。
+
+Revision ID: c5e7f9b20046
+Revises: b4d6f8a10045
+Create Date: 2026-10-20 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5e7f9b20046'
+down_revision: Union[str, None] = 'b4d6f8a10045'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# 分片副本上不保存的列
+CREDENTIAL_COLUMNS = ('email', 'username', 'hashed_password')
+
+
+def target_shard():
+    shard = context.config.attributes.get('shard') or context.get_x_argument(as_dictionary=True).get('shard')
+    return None if shard in (None, 'global') else shard
+
+
+def upgrade() -> None:
+    if target_shard() is None:
+        return
+    for column in CREDENTIAL_COLUMNS:
+        op.alter_column('users', column, existing_type=sa.String(), nullable=True)
+    # 清掉之前完整复制过来的凭据
+    op.execute("UPDATE users SET email = NULL, username = NULL, hashed_password = NULL, is_superuser = false")
+
+
+def downgrade() -> None:
+    # 凭据已从分片删除，无法恢复非空约束；分片上的这几列保持可空，旧版本代码写入完整副本也不受影响
+    pass
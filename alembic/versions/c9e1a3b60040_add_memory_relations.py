@@ -0,0 +1,81 @@
+"""add memory_relations graph table
+
+新增 memory_relations 边表（按 source / target 双向索引，带 user_id 便于按用户加载邻接表），
+并分批（autocommit，每批独立提交）按 (start_time, id) 键集把已有的 next_memory_id /
+previous_memory_id 链接转成 relation_type = 'next' 的边。
+
+可通过 -x batch_size=10000 -x pause=0.05 调整批大小和每批之间的停顿（秒）。
+
+Revision ID: c9e1a3b60040
+Revises: b8d0f2a50039
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+import time
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9e1a3b60040'
+down_revision: Union[str, None] = 'b8d0f2a50039'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def options():
+    x_args = context.get_x_argument(as_dictionary=True)
+    return int(x_args.get('batch_size', 10000)), float(x_args.get('pause', 0.05))
+
+
+def upgrade() -> None:
+    batch_size, pause = options()
+    conn = op.get_bind()
+
+    op.create_table(
+        'memory_relations',
+        sa.Column('source_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('target_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('relation_type', sa.String(), nullable=False),
+        sa.Column('relation_score', sa.Float(), nullable=True),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('source_id', 'target_id', 'relation_type'),
+    )
+    op.create_index('ix_memory_relations_target', 'memory_relations', ['target_id', 'source_id'])
+    op.create_index('ix_memory_relations_user', 'memory_relations', ['user_id'])
+
+    with context.get_context().autocommit_block():
+        last = (None, None)
+        while True:
+            row = conn.execute(sa.text(
+                "WITH batch AS ("
+                "  SELECT id, start_time, user_id, previous_memory_id, next_memory_id FROM memories "
+                "  WHERE CAST(:last_start AS timestamp) IS NULL "
+                "     OR (start_time, id) > (CAST(:last_start AS timestamp), CAST(:last_id AS uuid)) "
+                "  ORDER BY start_time, id LIMIT :batch"
+                "), links AS ("
+                "  INSERT INTO memory_relations (source_id, target_id, relation_type, relation_score, user_id) "
+                "  SELECT id, next_memory_id, 'next', 1.0, user_id FROM batch WHERE next_memory_id IS NOT NULL "
+                "  UNION "
+                "  SELECT previous_memory_id, id, 'next', 1.0, user_id FROM batch WHERE previous_memory_id IS NOT NULL "
+                "  ON CONFLICT DO NOTHING"
+                ") SELECT start_time, id FROM batch ORDER BY start_time DESC, id DESC LIMIT 1"
+            ), {
+                "last_start": last[0],
+                "last_id": last[1],
+                "batch": batch_size,
+            }).first()
+            if row is None:
+                break
+            last = (row.start_time, row.id)
+            time.sleep(pause)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_memory_relations_user', table_name='memory_relations')
+    op.drop_index('ix_memory_relations_target', table_name='memory_relations')
+    op.drop_table('memory_relations')
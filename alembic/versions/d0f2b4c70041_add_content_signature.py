@@ -0,0 +1,38 @@
+"""add content_signature and duplicate_of for near-duplicate detection
+
+新增 content_signature（MinHash 签名）和 duplicate_of 两列。已有记录的签名需要在 Python 中计算，
+由 python -m app.services.dedupe_service 分批补齐并标记历史重复，迁移本身只加列。
+
+Revision ID: d0f2b4c70041
+Revises: c9e1a3b60040
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd0f2b4c70041'
+down_revision: Union[str, None] = 'c9e1a3b60040'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'memories',
+        sa.Column('content_signature', sa.LargeBinary(), nullable=True, comment='内容的 MinHash 签名（64 个 uint32）')
+    )
+    op.add_column(
+        'memories',
+        sa.Column('duplicate_of', postgresql.UUID(as_uuid=True), nullable=True, comment='近似重复的原记忆 ID')
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('memories', 'duplicate_of')
+    op.drop_column('memories', 'content_signature')
@@ -0,0 +1,115 @@
+"""add per-user tag dictionary and integer tag_ids on memories
+
+Revision ID: d4f6b8c10034
+Revises: c3e5a7b90033
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+import time
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4f6b8c10034'
+down_revision: Union[str, None] = 'c3e5a7b90033'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def options():
+    x_args = context.get_x_argument(as_dictionary=True)
+    return int(x_args.get('batch_size', 10000)), float(x_args.get('pause', 0.05))
+
+
+def upgrade() -> None:
+    batch_size, pause = options()
+    conn = op.get_bind()
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS intarray")
+
+    op.create_table(
+        'tags',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('name', sa.String(), nullable=False, comment='标签名'),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.UniqueConstraint('user_id', 'name', name='uq_tags_user_name'),
+    )
+    op.create_index(
+        'ix_tags_user_name_prefix',
+        'tags',
+        ['user_id', 'name'],
+        postgresql_ops={'name': 'text_pattern_ops'},
+    )
+
+    op.add_column(
+        'memories',
+        sa.Column(
+            'tag_ids',
+            postgresql.ARRAY(sa.Integer()),
+            nullable=True,
+            comment='标签 ID 数组（见 tags 表），用于标签重叠查询',
+        ),
+    )
+
+    # 回填：先建字典，再把每行的标签名换成 ID（保持原顺序）
+    op.execute(
+        """
+        INSERT INTO tags (user_id, name, created_at, updated_at)
+        SELECT DISTINCT user_id, btrim(tag), now(), now()
+        FROM memories, unnest(tags) AS tag
+        WHERE btrim(tag) <> ''
+        ON CONFLICT (user_id, name) DO NOTHING
+        """
+    )
+    # 按 (start_time, id) 分批回填，每批独立提交；与 normalize_tags 一致，同一标签只保留第一次出现的位置
+    with context.get_context().autocommit_block():
+        last_start, last_id = None, None
+        while True:
+            last = conn.execute(sa.text(
+                """
+                WITH batch AS (
+                    SELECT id, start_time FROM memories
+                    WHERE CAST(:last_start AS timestamp) IS NULL
+                       OR (start_time, id) > (CAST(:last_start AS timestamp), CAST(:last_id AS uuid))
+                    ORDER BY start_time, id LIMIT :batch
+                ), updated AS (
+                    UPDATE memories m SET tag_ids = coalesce((
+                        SELECT array_agg(d.id ORDER BY d.ord)
+                        FROM (
+                            SELECT DISTINCT ON (t.id) t.id, u.ord
+                            FROM unnest(m.tags) WITH ORDINALITY AS u(name, ord)
+                            JOIN tags t ON t.user_id = m.user_id AND t.name = btrim(u.name)
+                            ORDER BY t.id, u.ord
+                        ) d
+                    ), '{}')
+                    FROM batch b
+                    WHERE m.id = b.id AND m.start_time = b.start_time
+                )
+                SELECT start_time, id FROM batch ORDER BY start_time DESC, id DESC LIMIT 1
+                """
+            ), {"last_start": last_start, "last_id": last_id, "batch": batch_size}).first()
+            if last is None:
+                break
+            last_start, last_id = last.start_time, str(last.id)
+            time.sleep(pause)
+
+    op.create_index(
+        'ix_memories_tag_ids',
+        'memories',
+        ['tag_ids'],
+        postgresql_using='gin',
+        postgresql_ops={'tag_ids': 'gin__int_ops'},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_memories_tag_ids', table_name='memories')
+    op.drop_column('memories', 'tag_ids')
+    op.drop_index('ix_tags_user_name_prefix', table_name='tags')
+    op.drop_table('tags')
@@ -0,0 +1,65 @@
+"""add jobs table for the background job runner and users.is_superuser
+
+Revision ID: e1a3c5d80042
+Revises: d0f2b4c70041
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1a3c5d80042'
+down_revision: Union[str, None] = 'd0f2b4c70041'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+JOB_STATUS = sa.Enum('QUEUED', 'RUNNING', 'SUCCEEDED', 'FAILED', name='jobstatus')
+
+
+def upgrade() -> None:
+    op.create_table(
+        'jobs',
+        sa.Column('id', sa.BigInteger(), primary_key=True, autoincrement=True),
+        sa.Column('job_type', sa.String(length=64), nullable=False, comment='任务类型，对应注册的处理函数'),
+        sa.Column('payload', sa.JSON(), nullable=True, comment='任务参数'),
+        sa.Column('priority', sa.Integer(), nullable=False, server_default='0', comment='优先级，数值越大越先执行'),
+        sa.Column('status', JOB_STATUS, nullable=False, server_default='QUEUED'),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0', comment='已领取次数'),
+        sa.Column('max_attempts', sa.Integer(), nullable=False, server_default='3'),
+        sa.Column('run_at', sa.DateTime(), nullable=False, comment='最早执行时间（定时任务、重试退避）'),
+        sa.Column('unique_key', sa.String(), nullable=True, unique=True, comment='去重键，相同键的任务只入队一次'),
+        sa.Column('locked_by', sa.String(), nullable=True, comment='领取任务的 worker'),
+        sa.Column('locked_at', sa.DateTime(), nullable=True, comment='领取时间，执行期间由心跳刷新'),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+    )
+    op.create_index(
+        'ix_jobs_dequeue', 'jobs',
+        ['job_type', sa.text('priority DESC'), 'run_at'],
+        postgresql_where=sa.text("status = 'QUEUED'"),
+    )
+    op.create_index(
+        'ix_jobs_running_locked_at', 'jobs', ['locked_at'],
+        postgresql_where=sa.text("status = 'RUNNING'"),
+    )
+    # 队列表的行频繁更新和删除，更积极地 autovacuum，避免死元组拖慢领取
+    op.execute("ALTER TABLE jobs SET (autovacuum_vacuum_scale_factor = 0.02)")
+
+    op.add_column(
+        'users',
+        sa.Column('is_superuser', sa.Boolean(), nullable=True, server_default=sa.false(), comment='管理员，可访问 /admin 接口')
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'is_superuser')
+    op.drop_index('ix_jobs_running_locked_at', table_name='jobs')
+    op.drop_index('ix_jobs_dequeue', table_name='jobs')
+    op.drop_table('jobs')
+    JOB_STATUS.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,51 @@
+"""add append-only goal_progress ledger
+
+Revision ID: e5a7c9d20035
+Revises: d4f6b8c10034
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a7c9d20035'
+down_revision: Union[str, None] = 'd4f6b8c10034'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'goal_progress',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('goal_id', postgresql.UUID(as_uuid=True), nullable=False, comment='长期目标（memories.id）'),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('value', sa.Float(), nullable=False, comment='更新后的进度值'),
+        sa.Column('delta', sa.Float(), nullable=True, comment='相对上一次的变化'),
+        sa.Column('note', sa.Text(), nullable=True, comment='进度说明'),
+        sa.Column('recorded_at', sa.DateTime(), nullable=False, comment='记录时间'),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+    )
+    op.create_index('ix_goal_progress_goal_recorded', 'goal_progress', ['goal_id', 'recorded_at'])
+
+    # 已有进度的目标补一条起点记录，之前的历史只以标签关联在时间轴里，无法可靠还原
+    op.execute(
+        """
+        INSERT INTO goal_progress (id, goal_id, user_id, value, delta, note, recorded_at, created_at, updated_at)
+        SELECT gen_random_uuid(), id, user_id, current_value, current_value, '迁移时的进度',
+               coalesce(updated_at, created_at, now()), now(), now()
+        FROM memories
+        WHERE is_long_term AND current_value IS NOT NULL AND current_value <> 0
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_goal_progress_goal_recorded', table_name='goal_progress')
+    op.drop_table('goal_progress')
@@ -0,0 +1,37 @@
+"""add partial index on ongoing activities, per-user sweep rules and jobs.result
+
+Revision ID: f2b4d6e90043
+Revises: e1a3c5d80042
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b4d6e90043'
+down_revision: Union[str, None] = 'e1a3c5d80042'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_memories_ongoing',
+        'memories',
+        ['user_id', 'start_time'],
+        postgresql_where=sa.text('is_ongoing'),
+    )
+    op.add_column('users', sa.Column('ongoing_max_hours', sa.Float(), nullable=True, comment='进行中活动的最长时长（小时）'))
+    op.add_column('users', sa.Column('ongoing_sweep_mode', sa.String(), nullable=True, comment='遗留活动的结束规则：max_duration / next_start'))
+    op.add_column('jobs', sa.Column('result', sa.JSON(), nullable=True, comment='处理函数的返回值（统计等）'))
+
+
+def downgrade() -> None:
+    op.drop_column('jobs', 'result')
+    op.drop_column('users', 'ongoing_sweep_mode')
+    op.drop_column('users', 'ongoing_max_hours')
+    op.drop_index('ix_memories_ongoing', table_name='memories')
@@ -0,0 +1,113 @@
+"""add typed emotion_valence column with covering index for emotion trends
+
+emotion_score 是无模式的 JSON，无法建索引或在 SQL 里聚合。
+新增 Float 列 emotion_valence 作为它的类型化投影（写入时由 Memory 模型同步），
+分批（autocommit，每批独立提交）按 (start_time, id) 键集回填已有数据，
+最后建 (user_id, start_time) INCLUDE (emotion_valence) 的部分索引。
+
+回填规则与 app/db/models/memory.py 中的 emotion_valence() 一致。
+可通过 -x batch_size=10000 -x pause=0.05 调整批大小和每批之间的停顿（秒）。
+
+Revision ID: f6b8d0e30037
+Revises: e5a7c9d20035
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+import time
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6b8d0e30037'
+down_revision: Union[str, None] = 'e5a7c9d20035'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+POSITIVE_EMOTIONS = [
+    "joy", "happy", "happiness", "calm", "excited", "gratitude", "love", "satisfaction",
+    "开心", "快乐", "平静", "兴奋", "感激", "满足", "喜悦",
+]
+NEGATIVE_EMOTIONS = [
+    "sad", "sadness", "anger", "angry", "fear", "anxiety", "stress", "disgust", "tired",
+    "悲伤", "难过", "生气", "愤怒", "恐惧", "焦虑", "压力", "疲惫",
+]
+
+
+def options():
+    x_args = context.get_x_argument(as_dictionary=True)
+    return int(x_args.get('batch_size', 10000)), float(x_args.get('pause', 0.05))
+
+
+def sql_array(values) -> str:
+    return "ARRAY[" + ", ".join(f"'{value}'" for value in values) + "]"
+
+
+def upgrade() -> None:
+    batch_size, pause = options()
+    conn = op.get_bind()
+
+    op.add_column(
+        'memories',
+        sa.Column('emotion_valence', sa.Float(), nullable=True, comment='情绪效价 [-1, 1]'),
+    )
+
+    # 回填用的临时函数：非对象、非数值的内容一律返回 NULL，不会因为脏数据中断
+    op.execute(f"""
+        CREATE FUNCTION memories_emotion_valence(score jsonb) RETURNS float8 AS $$
+            SELECT CASE
+                WHEN jsonb_typeof(score) IS DISTINCT FROM 'object' THEN NULL
+                WHEN jsonb_typeof(score -> 'valence') = 'number'
+                    THEN greatest(-1, least(1, (score ->> 'valence')::float8))
+                ELSE (
+                    SELECT (coalesce(sum(v) FILTER (WHERE positive), 0)
+                            - coalesce(sum(v) FILTER (WHERE NOT positive), 0))
+                           / nullif(sum(v), 0)
+                    FROM (
+                        SELECT value::text::float8 AS v,
+                               lower(key) = ANY({sql_array(POSITIVE_EMOTIONS)}) AS positive
+                        FROM jsonb_each(score)
+                        WHERE jsonb_typeof(value) = 'number'
+                          AND value::text::float8 > 0
+                          AND lower(key) = ANY({sql_array(POSITIVE_EMOTIONS + NEGATIVE_EMOTIONS)})
+                    ) emotions
+                )
+            END
+        $$ LANGUAGE sql IMMUTABLE
+    """)
+
+    with context.get_context().autocommit_block():
+        last = (None, None)
+        while True:
+            row = conn.execute(sa.text(
+                "WITH batch AS ("
+                "  SELECT id, start_time FROM memories "
+                "  WHERE CAST(:last_start AS timestamp) IS NULL "
+                "     OR (start_time, id) > (CAST(:last_start AS timestamp), CAST(:last_id AS uuid)) "
+                "  ORDER BY start_time, id LIMIT :batch"
+                "), filled AS ("
+                "  UPDATE memories m SET emotion_valence = memories_emotion_valence(m.emotion_score::jsonb) "
+                "  FROM batch b "
+                "  WHERE m.id = b.id AND m.start_time = b.start_time AND m.emotion_score IS NOT NULL"
+                ") SELECT start_time, id FROM batch ORDER BY start_time DESC, id DESC LIMIT 1"
+            ), {"last_start": last[0], "last_id": last[1], "batch": batch_size}).first()
+            if row is None:
+                break
+            last = (row.start_time, row.id)
+            time.sleep(pause)
+
+    op.execute("DROP FUNCTION memories_emotion_valence(jsonb)")
+    op.create_index(
+        'ix_memories_user_start_emotion',
+        'memories',
+        ['user_id', 'start_time'],
+        postgresql_include=['emotion_valence'],
+        postgresql_where=sa.text('emotion_valence IS NOT NULL'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_memories_user_start_emotion', table_name='memories')
+    op.drop_column('memories', 'emotion_valence')
@@ -1,18 +1,75 @@
-from fastapi import Depends, HTTPException, status
+from datetime import datetime
+from typing import Iterable, List, Optional
+from uuid import UUID
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from sqlalchemy.orm import Session
 from app.core.config import settings
+from app.core.revocation import revocations
+from app.core.security import CurrentUser
 from app.db.session import get_db
-from app.db.models.user import User
+from app.db.shards import GLOBAL_SHARD, shard_router
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+class BatchContext:
+    """POST /batch 的各个子请求共享的状态，放在子请求的 request.state.batch 中
+
+    当前用户、分片位置在批量请求中解析一次；数据库会话预先创建（创建时不占用连接），
+    依赖项在线程池中执行，这样子请求的依赖项不会与正在执行的其他子请求同时使用会话。
+    - db：全局库会话（批量请求自身的会话）；
+    - user_db：用户数据所在分片的会话，数据在全局库时即 db；
+    - read_db：只读接口的会话，批量中有写操作时为 user_db（读自己的写），否则按副本路由。
+    """
+
+    def __init__(self, db: Session, current_user: CurrentUser, has_writes: bool) -> None:
+        self.db = db
+        self.current_user = current_user
+        self.has_writes = has_writes
+        self.moving = False
+        self.user_db = db
+        self.read_db = db
+        self._owned: List[Session] = []
+
+    def open_user_db(self) -> None:
+        if not shard_router.enabled:
+            return
+        shard, self.moving = shard_router.locate(self.db, self.current_user.id)
+        if shard != GLOBAL_SHARD:
+            self.user_db = self.read_db = self.own(shard_router.shards[shard].session_factory())
+
+    def own(self, session: Session) -> Session:
+        """由批量请求负责关闭的会话"""
+        self._owned.append(session)
+        return session
+
+    def rollback(self) -> None:
+        """子请求出错后回滚，避免失败的事务影响后续子请求"""
+        for session in [self.db, *self._owned]:
+            session.rollback()
+
+    def close(self) -> None:
+        for session in self._owned:
+            session.close()
+
+
 async def get_current_user(
-    db: Session = Depends(get_db),
+    request: Request,
     token: str = Depends(oauth2_scheme)
-) -> User:
-    """获取当前用户"""
+) -> CurrentUser:
+    """获取当前用户
+
+    访问令牌携带用户 ID 和状态，校验签名、有效期和作废列表即可，不查库。
+    只有 sub 的旧版令牌不能按 jti / 用户作废，一律拒绝，客户端重新登录即可。
+    POST /batch 的子请求直接使用批量请求解析出的用户。
+    """
+    batch = getattr(request.state, "batch", None)
+    if batch is not None:
+        return batch.current_user
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -20,13 +77,89 @@ async def get_current_user(
     )
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-    except JWTError:
+        current_user = CurrentUser(
+            id=UUID(payload["uid"]),
+            email=payload["sub"],
+            is_active=bool(payload.get("act", True)),
+            is_superuser=bool(payload.get("su", False)),
+            jti=payload.get("jti"),
+            issued_at=float(payload.get("iat", 0)),
+            expires_at=datetime.utcfromtimestamp(payload["exp"]),
+        )
+    except (JWTError, KeyError, TypeError, ValueError):
         raise credentials_exception
-        
-    user = db.query(User).filter(User.email == email).first()
-    if user is None:
+    if revocations.is_revoked(current_user.jti, payload["uid"], current_user.issued_at):
         raise credentials_exception
-    return user 
\ No newline at end of file
+
+    if not current_user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Inactive user"
+        )
+    return current_user
+
+
+async def get_current_superuser(
+    current_user: CurrentUser = Depends(get_current_user)
+) -> CurrentUser:
+    """获取当前管理员用户"""
+    if not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough privileges"
+        )
+    return current_user
+
+
+def get_user_db(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """当前用户数据所在分片的数据库会话依赖项
+
+    未启用分片或用户数据在全局库时直接复用全局库会话；用户正在迁移到其他分片时拒绝写请求（503）。
+    """
+    batch = getattr(request.state, "batch", None)
+    if batch is not None:
+        shard, moving = None, batch.moving
+    elif not shard_router.enabled:
+        yield db
+        return
+    else:
+        shard, moving = shard_router.locate(db, current_user.id)
+    if moving and request.method not in SAFE_METHODS:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="User data is being moved, please retry shortly",
+            headers={"Retry-After": str(settings.SHARD_DIRECTORY_TTL_SECONDS)},
+        )
+    if batch is not None:
+        yield batch.user_db
+        return
+    if shard == GLOBAL_SHARD:
+        yield db
+        return
+    user_db = shard_router.shards[shard].session_factory()
+    try:
+        yield user_db
+    finally:
+        user_db.close()
+
+
+def parse_fields(fields: Optional[str], allowed: Iterable[str]) -> Optional[List[str]]:
+    """解析 ?fields=a,b,c 稀疏字段参数
+
+    未传或为空时返回 None（表示全部字段），包含未知字段时返回 400。
+    """
+    if not fields:
+        return None
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    allowed = set(allowed)
+    unknown = [f for f in requested if f not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}"
+        )
+    return requested or None
@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import auth, memories, timeline, core_focus # 暂时移除 dreams
+from app.api.v1.endpoints import auth, memories, timeline, core_focus, tags, analytics, admin, batch # 暂时移除 dreams
 
 api_router = APIRouter()
 
@@ -7,4 +7,8 @@ api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
 api_router.include_router(memories.router, prefix="/memories", tags=["memories"])
 api_router.include_router(timeline.router, prefix="/timeline", tags=["timeline"]) 
 api_router.include_router(core_focus.router, prefix="/core-focus", tags=["core_focus"]) 
+api_router.include_router(tags.router, prefix="/tags", tags=["tags"])
+api_router.include_router(analytics.router, prefix="/analytics", tags=["analytics"])
+api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
+api_router.include_router(batch.router, tags=["batch"])
 # api_router.include_router(dreams.router, prefix="/dreams", tags=["dreams"])  # 暂时注释掉 
\ No newline at end of file
@@ -0,0 +1,86 @@
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from app.db.session import get_db, pool_status
+from app.db.shards import shard_router
+from app.db.models.enums import JobStatus
+from app.db.models.job import Job
+from app.core.security import CurrentUser
+from app.api.deps import get_current_superuser
+from app.api.v1.schemas.job import (
+    JobCreate, JobResponse, JobTypeSummary, JobsStatus, ScheduleInfo, WorkerInfo
+)
+from app.api.v1.schemas.admin import DatabaseRouting
+from app.db.replicas import replica_router
+from app.services.job_runner import HANDLERS, SCHEDULES, job_runner
+from app.services.job_service import JobService
+
+router = APIRouter()
+
+@router.get("/jobs", response_model=JobsStatus)
+async def read_jobs(
+    status: Optional[JobStatus] = None,
+    job_type: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_superuser)
+):
+    """后台任务状态：按类型汇总、定时计划和最近更新的任务"""
+    job_service = JobService(db)
+    now = datetime.utcnow()
+    return JobsStatus(
+        worker=WorkerInfo(
+            worker_id=job_runner.worker_id,
+            running=len(job_runner.running),
+            processed=job_runner.processed
+        ),
+        summary=[JobTypeSummary(**row._mapping) for row in job_service.summary()],
+        schedules=[
+            ScheduleInfo(
+                name=item.name,
+                cron=item.cron.expression,
+                job_type=item.job_type,
+                next_run_at=item.cron.next_after(now)
+            )
+            for item in SCHEDULES.values()
+        ],
+        jobs=job_service.list(status, job_type, limit)
+    )
+
+@router.post("/jobs", response_model=JobResponse)
+async def create_job(
+    job_in: JobCreate,
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_superuser)
+):
+    """手动入队一个任务"""
+    if job_in.job_type not in HANDLERS:
+        raise HTTPException(status_code=400, detail=f"Unknown job type: {job_in.job_type}")
+    job_id = JobService(db).enqueue(
+        job_in.job_type,
+        job_in.payload,
+        priority=job_in.priority,
+        run_at=job_in.run_at,
+        max_attempts=job_in.max_attempts or HANDLERS[job_in.job_type].max_attempts
+    )
+    db.commit()
+    return db.query(Job).filter(Job.id == job_id).first()
+
+@router.post("/jobs/{job_id}/retry", response_model=JobResponse)
+async def retry_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_superuser)
+):
+    """立即重试一个失败（或排队中）的任务"""
+    return await JobService(db).retry(job_id)
+
+@router.get("/db", response_model=DatabaseRouting)
+async def read_db_routing(
+    current_user: CurrentUser = Depends(get_current_superuser)
+):
+    """本进程的只读副本状态、读请求分流统计和连接池状态"""
+    engines = [shard.engine for shard in shard_router.shards.values()]
+    engines += [replica.engine for replica in replica_router.replicas]
+    return {**replica_router.stats(), "pools": [pool_status(item) for item in engines]}
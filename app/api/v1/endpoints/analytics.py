@@ -0,0 +1,60 @@
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from app.db.replicas import get_read_db
+from app.api.deps import get_current_user, get_user_db
+from app.services.analytics_service import AnalyticsService, EMOTION_BUCKETS
+from app.services.heatmap_service import HeatmapService
+from app.api.v1.schemas.analytics import EmotionBucket, ActivityHeatmap
+
+router = APIRouter()
+
+@router.get("/emotions", response_model=List[EmotionBucket])
+async def get_emotion_trend(
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    bucket: str = Query("day", pattern=f"^({'|'.join(EMOTION_BUCKETS)})$"),
+    db: Session = Depends(get_read_db),
+    current_user = Depends(get_current_user)
+):
+    """情绪趋势：按天/周/月统计情绪效价的均值、方差和最常见的标签（默认最近 30 天）"""
+    end = end or datetime.now()
+    start = start or end - timedelta(days=30)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="'from' must be earlier than 'to'")
+
+    service = AnalyticsService(db)
+    stats, top_tags = await service.get_emotion_trend(
+        user_id=current_user.id,
+        start=start,
+        end=end,
+        bucket=bucket
+    )
+    return EmotionBucket.from_rows(stats, top_tags)
+
+@router.get("/heatmap", response_model=ActivityHeatmap)
+async def get_activity_heatmap(
+    tag: Optional[str] = None,
+    start_date: Optional[date] = Query(None, alias="from"),
+    end_date: Optional[date] = Query(None, alias="to"),
+    db: Session = Depends(get_user_db),
+    current_user = Depends(get_current_user)
+):
+    """活动热力图：[from, to] 内按星期 x 小时统计的活动时长（默认最近 12 周，可按标签过滤）
+
+    跨午夜的活动按小时拆分到各自的日期，并行活动的重叠部分只算一次。
+    """
+    end_date = end_date or datetime.now().date()
+    start_date = start_date or end_date - timedelta(weeks=12) + timedelta(days=1)
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="'to' must not be before 'from'")
+
+    service = HeatmapService(db)
+    heat = await service.get_heatmap(
+        user_id=current_user.id,
+        start_date=start_date,
+        end_date=end_date,
+        tag=tag
+    )
+    return ActivityHeatmap.from_matrix(start_date, end_date, tag, heat)
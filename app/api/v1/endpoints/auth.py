@@ -1,12 +1,13 @@
-from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
-from app.api.v1.schemas.auth import UserCreate, Token
-from app.core.security import create_access_token, get_password_hash, verify_password
-from app.core.config import settings
+from app.api.deps import get_current_user
+from app.api.v1.schemas.auth import LogoutRequest, RefreshRequest, UserCreate, Token
+from app.core.security import CurrentUser, get_password_hash, verify_password
 from app.db.session import get_db
+from app.db.shards import shard_router
 from app.db.models.user import User
+from app.services.auth_service import AuthService
 
 router = APIRouter()
 
@@ -29,13 +30,13 @@ async def register(user_in: UserCreate, db: Session = Depends(get_db)):
     )
     db.add(user)
     db.commit()
+    # 启用分片时为新用户选定数据所在的分片
+    shard_router.assign(db, user)
     
-    # 创建访问令牌
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
-    )
-    return {"access_token": access_token, "token_type": "bearer"}
+    # 签发访问令牌和刷新令牌
+    tokens = AuthService(db).issue_tokens(user)
+    db.commit()
+    return tokens
 
 @router.post("/login", response_model=Token)
 async def login(
@@ -51,10 +52,37 @@ async def login(
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
-    # 创建访问令牌
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
-    )
-    return {"access_token": access_token, "token_type": "bearer"} 
\ No newline at end of file
+    if user.is_active is False:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Inactive user"
+        )
+
+    # 签发访问令牌和刷新令牌
+    tokens = AuthService(db).issue_tokens(user)
+    db.commit()
+    return tokens
+
+@router.post("/refresh", response_model=Token)
+async def refresh(body: RefreshRequest, db: Session = Depends(get_db)):
+    """用刷新令牌换取新的访问令牌和刷新令牌（旧刷新令牌随即失效）"""
+    return AuthService(db).refresh(body.refresh_token)
+
+@router.post("/logout")
+async def logout(
+    body: LogoutRequest,
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """登出当前会话：作废当前访问令牌和本次登录的刷新令牌"""
+    AuthService(db).logout(current_user, body.refresh_token)
+    return {"status": "success"}
+
+@router.post("/logout-all")
+async def logout_all(
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """退出所有设备：作废该用户的全部访问令牌和刷新令牌"""
+    AuthService(db).revoke_user(current_user.id)
+    return {"status": "success"} 
\ No newline at end of file
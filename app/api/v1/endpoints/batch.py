@@ -0,0 +1,203 @@
+import asyncio
+from contextlib import AsyncExitStack, nullcontext
+from typing import List, Sequence, Tuple
+from urllib.parse import urlsplit
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy.orm import Session
+from starlette.exceptions import HTTPException as StarletteHTTPException
+import orjson
+from app.api.deps import SAFE_METHODS, BatchContext, get_current_user
+from app.api.v1.schemas.batch import BatchOperation, BatchRequest, BatchResponse
+from app.core.config import settings
+from app.core.logger import setup_logger
+from app.core.ratelimit import current_route_class, route_class
+from app.core.security import CurrentUser
+from app.db.replicas import primary_pins, replica_router
+from app.db.session import get_db
+
+logger = setup_logger("batch")
+
+router = APIRouter()
+
+# 不能放进批量的路由类别：认证接口单独调用；统计类接口有单独的并发上限和超时；批量不能嵌套
+EXCLUDED_ROUTE_CLASSES = {"auth", "analytics", "batch"}
+
+# 子请求不转发的请求头：认证沿用批量请求，内容类型和长度按子请求自身的 body 生成
+SKIPPED_REQUEST_HEADERS = {"authorization", "host", "content-type", "content-length", "content-encoding", "accept-encoding"}
+SKIPPED_RESPONSE_HEADERS = {"content-type", "content-length", "content-encoding", "vary"}
+
+
+def check_operation(index: int, operation: BatchOperation) -> None:
+    path = urlsplit(operation.path).path
+    if not path.startswith("/"):
+        raise HTTPException(status_code=400, detail=f"Operation {index}: path must start with /")
+    full_path = settings.API_V1_STR + path
+    if route_class(operation.method, full_path) in EXCLUDED_ROUTE_CLASSES:
+        raise HTTPException(status_code=400, detail=f"Operation {index}: {operation.path} cannot be batched")
+
+
+def make_result(operation: BatchOperation, status: int, headers: dict, content: bytes) -> dict:
+    if not content:
+        body = None
+    elif headers.get("content-type", "").startswith("application/json"):
+        body = orjson.loads(content)
+    else:
+        body = content.decode("utf-8", "replace")
+    return {
+        "id": operation.id,
+        "status": status,
+        "headers": {name: value for name, value in headers.items() if name not in SKIPPED_RESPONSE_HEADERS},
+        "body": body,
+    }
+
+
+async def dispatch(request: Request, context: BatchContext, operation: BatchOperation) -> Tuple[dict, bool]:
+    """在进程内把子请求交给路由执行（不经过其他中间件），收集状态码、响应头和响应体
+
+    子请求按自己的路由类别限流和计入并发（与单独调用相同），被拒绝时该子请求返回 429 / 503。
+    返回 (结果, 是否执行出错)，出错时由调用方在同组子请求都结束后回滚会话。
+    """
+    url = urlsplit(operation.path)
+    path = settings.API_V1_STR + url.path
+    body = b"" if operation.body is None else orjson.dumps(operation.body)
+
+    headers = [
+        (name.lower().encode("latin-1"), value.encode("latin-1"))
+        for name, value in operation.headers.items()
+        if name.lower() not in SKIPPED_REQUEST_HEADERS
+    ]
+    authorization = request.headers.get("authorization")
+    if authorization:
+        headers.append((b"authorization", authorization.encode("latin-1")))
+    if body:
+        headers += [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+
+    scope = {
+        "type": "http",
+        "asgi": request.scope.get("asgi", {"version": "3.0"}),
+        "http_version": request.scope.get("http_version", "1.1"),
+        "method": operation.method,
+        "scheme": request.scope.get("scheme", "http"),
+        "server": request.scope.get("server"),
+        "client": request.scope.get("client"),
+        "root_path": request.scope.get("root_path", ""),
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": url.query.encode(),
+        "headers": headers,
+        "app": request.app,
+        "state": {**request.scope.get("state", {}), "batch": context},
+    }
+    # 路由内抛出的 HTTPException 等按应用注册的异常处理器转换为响应
+    if "starlette.exception_handlers" in request.scope:
+        scope["starlette.exception_handlers"] = request.scope["starlette.exception_handlers"]
+
+    name = route_class(operation.method, path)
+    limiter = request.scope.get("rate_limiter")
+    rejected = limiter.admit(scope, name) if limiter is not None else None
+    if rejected is not None:
+        status, headers, content = rejected
+        headers = {key.decode("latin-1"): value.decode("latin-1") for key, value in headers}
+        return make_result(operation, status, headers, content), False
+
+    received = False
+
+    async def receive():
+        nonlocal received
+        if received:
+            return {"type": "http.disconnect"}
+        received = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    status = 500
+    response_headers = {}
+    chunks = []
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            for name, value in message.get("headers", []):
+                response_headers[name.decode("latin-1").lower()] = value.decode("latin-1")
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    token = current_route_class.set(name)
+    try:
+        # 依赖项的清理（yield 之后的部分）在子请求结束时执行，FastAPI 的应用层中间件通常会提供这个栈
+        with limiter.track(name) if limiter is not None else nullcontext():
+            async with AsyncExitStack() as stack:
+                scope["fastapi_middleware_astack"] = stack
+                await request.app.router(scope, receive, send)
+    except StarletteHTTPException as e:
+        # 路由匹配阶段的 404 / 405
+        status, chunks = e.status_code, [orjson.dumps({"detail": e.detail})]
+        response_headers = {"content-type": "application/json"}
+    except Exception as e:
+        logger.error(f"批量子请求失败: {operation.method} {operation.path}: {str(e)}", exc_info=e)
+        status, chunks = 500, [orjson.dumps({"detail": "Internal Server Error"})]
+        response_headers = {"content-type": "application/json"}
+    finally:
+        current_route_class.reset(token)
+
+    if operation.method not in SAFE_METHODS and status < 400 and replica_router.enabled:
+        primary_pins.pin(context.current_user.email)
+    return make_result(operation, status, response_headers, b"".join(chunks)), status >= 500
+
+
+async def run_group(request: Request, context: BatchContext, operations: Sequence[BatchOperation]) -> List[dict]:
+    """执行一组子请求（一个写请求，或并发执行的连续只读请求）
+
+    出错的子请求可能留下失败的事务；同组的其他子请求可能仍在使用会话，
+    因此等整组结束后再回滚，然后执行后续子请求。
+    """
+    outcomes = await asyncio.gather(*[dispatch(request, context, operation) for operation in operations])
+    if any(failed for _, failed in outcomes):
+        context.rollback()
+    return [result for result, _ in outcomes]
+
+
+@router.post("/batch", response_model=BatchResponse)
+async def batch(
+    batch_in: BatchRequest,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """批量执行多个子请求（如首页一次拉取日时间轴、今日重要事项和长期目标）
+
+    当前用户和分片位置只解析一次，所有子请求共享同一个数据库会话（数据在分片或读走副本时为对应的会话）。
+    连续的只读子请求并发执行，写操作按顺序单独执行；批量中有写操作时读请求走主库，读到之前写入的结果。
+    每个子请求单独返回状态码、响应头和响应体，某个子请求失败不影响其他子请求。
+    每个子请求按自己的路由类别取令牌、计入并发上限，超出时该子请求返回 429 / 503。
+    """
+    operations = batch_in.operations
+    if len(operations) > settings.BATCH_MAX_OPERATIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.BATCH_MAX_OPERATIONS} operations per batch"
+        )
+    for index, operation in enumerate(operations):
+        check_operation(index, operation)
+
+    has_writes = any(operation.method not in SAFE_METHODS for operation in operations)
+    context = BatchContext(db, current_user, has_writes)
+    results = []
+    try:
+        context.open_user_db()
+        if context.user_db is db and not has_writes and replica_router.enabled:
+            pinned = primary_pins.is_pinned(current_user.email)
+            context.read_db = context.own(replica_router.session(pinned=pinned))
+
+        start = 0
+        while start < len(operations):
+            end = start
+            while end < len(operations) and operations[end].method in SAFE_METHODS:
+                end += 1
+            end = max(end, start + 1)
+            results += await run_group(request, context, operations[start:end])
+            start = end
+    finally:
+        context.close()
+
+    return Response(orjson.dumps({"results": results}), media_type="application/json")
@@ -1,13 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
-from app.db.session import get_db
-from app.api.deps import get_current_user
-from app.services.core_focus_service import CoreFocusService
-from app.api.v1.schemas.core_focus import ImportantMatterCreate, ImportantMatterResponse, ImportantMatterWithActivities, LongTermGoalCreate, GoalProgressUpdate, LongTermGoalResponse
+from app.db.replicas import get_read_db
+from app.api.deps import get_current_user, get_user_db
+from app.core.etag import make_etag, etag_matches, not_modified, etag_headers
+from app.services.view_cache import cached_view, IMPORTANT_SCOPE
+from app.services.core_focus_service import CoreFocusService, PROGRESS_MODES
+from app.api.v1.schemas.core_focus import ImportantMatterCreate, ImportantMatterResponse, ImportantMatterWithActivities, LongTermGoalCreate, GoalProgressUpdate, LongTermGoalResponse, GoalProgressHistory, GoalAnalytics
 from app.api.v1.schemas.timeline import TimelineResponse
 from typing import List, Optional
 from uuid import UUID
-from datetime import date
+from datetime import date, datetime
 import logging
 
 router = APIRouter()
@@ -17,7 +20,7 @@ logger = logging.getLogger(__name__)
 @router.post("/important", response_model=ImportantMatterResponse)
 async def create_important_matter(
     matter: ImportantMatterCreate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_user_db),
     current_user = Depends(get_current_user)
 ):
     """创建重要事项"""
@@ -33,23 +36,40 @@ async def create_important_matter(
 
 @router.get("/important/daily", response_model=List[ImportantMatterResponse])
 async def get_daily_important_matters(
+    request: Request,
     date: Optional[date] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user = Depends(get_current_user)
 ):
-    """获取每日重要事项"""
+    """获取每日重要事项
+
+    直接序列化为 JSON，跳过逐行模型构建；未变化时返回 304；结果按 (用户, 日期) 读穿透缓存。
+    """
+    day = date or datetime.now().date()
     service = CoreFocusService(db)
-    matters = await service.get_daily_important_matters(
+
+    async def load():
+        matters = await service.get_daily_important_matters(
+            user_id=current_user.id,
+            date=day
+        )
+        return [ImportantMatterResponse.serialize_row(matter) for matter in matters]
+
+    return await cached_view(
+        request,
         user_id=current_user.id,
-        date=date
+        scope=IMPORTANT_SCOPE,
+        day=day,
+        variant=(),
+        version=lambda: service.get_daily_important_version(user_id=current_user.id, date=day),
+        load=load,
     )
-    return [ImportantMatterResponse.from_memory(matter) for matter in matters]
 
 @router.post("/important/{matter_id}/start", response_model=TimelineResponse)
 async def start_important_matter_activity(
     matter_id: UUID,
     content: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_user_db),
     current_user = Depends(get_current_user)
 ):
     """开始重要事项的一个活动"""
@@ -65,7 +85,7 @@ async def start_important_matter_activity(
 async def end_important_matter_activity(
     matter_id: UUID,
     content: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_user_db),
     current_user = Depends(get_current_user)
 ):
     """结束重要事项的活动"""
@@ -80,7 +100,7 @@ async def end_important_matter_activity(
 @router.get("/important/{matter_id}/activities", response_model=ImportantMatterWithActivities)
 async def get_matter_activities(
     matter_id: UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user = Depends(get_current_user)
 ):
     """获取重要事项的所有相关活动"""
@@ -94,7 +114,7 @@ async def get_matter_activities(
 @router.post("/long-term", response_model=LongTermGoalResponse)
 async def create_long_term_goal(
     goal: LongTermGoalCreate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_user_db),
     current_user = Depends(get_current_user)
 ):
     """创建长期目标"""
@@ -113,34 +133,63 @@ async def create_long_term_goal(
         logger.error(f"Error: {str(e)}")
         raise
 
-@router.put("/long-term/{goal_id}/progress")
+@router.put("/long-term/{goal_id}/progress", response_model=LongTermGoalResponse)
 async def update_goal_progress(
     goal_id: UUID,
     progress: GoalProgressUpdate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_user_db),
     current_user = Depends(get_current_user)
 ):
     """更新目标进度"""
     service = CoreFocusService(db)
-    return await service.update_goal_progress(
+    goal, completion_rate = await service.update_goal_progress(
         goal_id=goal_id,
+        user_id=current_user.id,
         **progress.model_dump()
     )
+    return LongTermGoalResponse.from_memory(goal)
 
 @router.get("/long-term", response_model=List[LongTermGoalResponse])
 async def list_long_term_goals(
-    db: Session = Depends(get_db),
+    request: Request,
+    db: Session = Depends(get_read_db),
     current_user = Depends(get_current_user)
 ):
-    """获取所有长期目标列表"""
+    """获取所有长期目标列表（直接序列化为 JSON，跳过逐行模型构建；未变化时返回 304）"""
     service = CoreFocusService(db)
+
+    version = await service.get_long_term_goals_version(user_id=current_user.id)
+    etag = make_etag("goals:long_term", current_user.id, version)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
     memories = await service.get_long_term_goals(user_id=current_user.id)
-    return [LongTermGoalResponse.from_memory(m) for m in memories]
+    return ORJSONResponse(
+        [LongTermGoalResponse.serialize_row(m) for m in memories],
+        headers=etag_headers(etag)
+    )
+
+@router.get("/long-term/analytics", response_model=List[GoalAnalytics])
+async def get_long_term_analytics(
+    include_completed: bool = False,
+    db: Session = Depends(get_read_db),
+    current_user = Depends(get_current_user)
+):
+    """所有长期目标的进度分析：速度、预计完成日期、里程碑预计达成日期和是否落后
+
+    一次请求返回全部目标，客户端无需逐个拉取进度历史。
+    """
+    service = CoreFocusService(db)
+    goals, pace = await service.get_long_term_analytics(
+        user_id=current_user.id,
+        include_completed=include_completed
+    )
+    return ORJSONResponse(GoalAnalytics.serialize_all(goals, pace))
 
 @router.get("/long-term/{goal_id}", response_model=LongTermGoalResponse)
 async def get_long_term_goal(
     goal_id: UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user = Depends(get_current_user)
 ):
     """获取单个长期目标详情"""
@@ -148,13 +197,28 @@ async def get_long_term_goal(
     memory = await service.get_long_term_goal(goal_id=goal_id, user_id=current_user.id)
     return LongTermGoalResponse.from_memory(memory)
 
-@router.get("/long-term/{goal_id}/progress", response_model=List[TimelineResponse])
+@router.get("/long-term/{goal_id}/progress", response_model=GoalProgressHistory)
 async def get_goal_progress_history(
     goal_id: UUID,
-    db: Session = Depends(get_db),
+    mode: str = Query("raw", pattern=f"^({'|'.join(PROGRESS_MODES)})$"),
+    points: int = Query(500, ge=3, le=5000),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    db: Session = Depends(get_read_db),
     current_user = Depends(get_current_user)
 ):
-    """获取目标的进度历史"""
+    """获取目标的进度历史
+
+    mode=raw 返回全部记录；mode=lttb / bucket 在服务端降采样到最多 points 个点/桶，
+    适合多年期目标画图。
+    """
     service = CoreFocusService(db)
-    activities = await service.get_goal_progress_history(goal_id=goal_id, user_id=current_user.id)
-    return [TimelineResponse.from_orm(a) for a in activities] 
\ No newline at end of file
+    history = await service.get_goal_progress_history(
+        goal_id=goal_id,
+        user_id=current_user.id,
+        mode=mode,
+        points=points,
+        start=start,
+        end=end
+    )
+    return GoalProgressHistory.from_history(goal_id, mode, history)
@@ -1,27 +1,56 @@
-from typing import List
+from typing import List, Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
-from app.api.deps import get_current_user
-from app.db.session import get_db
-from app.db.models.user import User
+import sqlalchemy as sa
+from app.api.deps import get_current_user, get_user_db, parse_fields
+from app.db.replicas import get_read_db
+from app.core.security import CurrentUser
 from app.db.models.memory import Memory
-from app.api.v1.schemas.memory import MemoryCreate, MemoryUpdate, MemoryInDB
+from app.api.v1.schemas.memory import (
+    MemoryCreate, MemoryUpdate, MemoryInDB, RelationCreate, GraphEdge, MemoryGraph
+)
+from app.core.config import settings
+from app.services.view_cache import invalidate_memory
+from app.services.archive_service import ArchiveService
+from app.services.tag_service import TagService
+from app.services.heatmap_service import HeatmapService
+from app.services.graph_service import GraphService
+from app.services.dedupe_service import DedupeService
 
 router = APIRouter()
 
+# MemoryInDB 需要的列，列表接口只选这些列
+MEMORY_LIST_COLUMNS = (
+    Memory.id,
+    Memory.user_id,
+    Memory.content,
+    Memory.memory_type,
+    Memory.tags,
+    Memory.duplicate_of,
+    Memory.created_at,
+    Memory.updated_at,
+)
+MEMORY_LIST_COLUMN_MAP = {column.key: column for column in MEMORY_LIST_COLUMNS}
+
 @router.post("/", response_model=MemoryInDB)
 async def create_memory(
     memory_in: MemoryCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: Session = Depends(get_user_db),
+    current_user: CurrentUser = Depends(get_current_user)
 ):
-    """创建新记忆"""
+    """创建新记忆
+
+    与近期同类型记忆近似重复时：DEDUPE_MERGE_SECONDS 内的重复提交直接返回原记录，
+    否则照常创建并在 duplicate_of 中标记原记录。
+    """
     memory = Memory(
         user_id=current_user.id,
         content=memory_in.content,
         memory_type=memory_in.memory_type,
-        tags=memory_in.tags
+        tags=memory_in.tags,
+        tag_ids=TagService(db).ids_for(current_user.id, memory_in.tags)
     )
     
     if memory_in.focus_type:
@@ -37,48 +66,81 @@ async def create_memory(
                 detail="Invalid time format. Use HH:MM"
             )
     
+    dedupe = DedupeService(db)
+    original = dedupe.check(memory)
+    if original is not None and dedupe.is_resubmit(original):
+        return original
+    
     db.add(memory)
     db.commit()
     db.refresh(memory)
+    dedupe.remember(memory)
+    invalidate_memory(memory)
     return memory
 
 @router.get("/", response_model=List[MemoryInDB])
 async def read_memories(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    fields: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_user)
 ):
-    """获取用户的记忆列表"""
-    memories = db.query(Memory)\
-        .filter(Memory.user_id == current_user.id)\
+    """获取用户的记忆列表
+
+    fields=content,tags 只选出并返回指定字段（id 总是包含）。
+    热表翻到底后继续从归档表读取，归档记录排在热表记录之后。
+    """
+    requested = parse_fields(fields, MEMORY_LIST_COLUMN_MAP)
+    columns = (
+        [MEMORY_LIST_COLUMN_MAP[name] for name in dict.fromkeys(["id", *requested])]
+        if requested else MEMORY_LIST_COLUMNS
+    )
+    stmt = sa.select(*columns)\
+        .where(Memory.user_id == current_user.id)\
         .offset(skip)\
-        .limit(limit)\
-        .all()
-    return memories
+        .limit(limit)
+    rows = [dict(row._mapping) for row in db.execute(stmt)]
+
+    if len(rows) < limit:
+        hot_total = db.execute(
+            sa.select(sa.func.count()).where(Memory.user_id == current_user.id)
+        ).scalar()
+        archived = ArchiveService(db).list(
+            current_user.id,
+            offset=max(skip - hot_total, 0),
+            limit=limit - len(rows),
+            columns=[column.key for column in columns]
+        )
+        rows.extend(row._mapping for row in archived)
+    return ORJSONResponse(rows)
 
 @router.get("/{memory_id}", response_model=MemoryInDB)
 async def read_memory(
     memory_id: UUID,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: Session = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_user)
 ):
-    """获取单条记忆"""
+    """获取单条记忆，已归档的记忆从归档表读取"""
     memory = db.query(Memory)\
         .filter(Memory.id == memory_id, Memory.user_id == current_user.id)\
         .first()
     if not memory:
-        raise HTTPException(status_code=404, detail="Memory not found")
+        archived = ArchiveService(db).get(memory_id, current_user.id)
+        if not archived:
+            raise HTTPException(status_code=404, detail="Memory not found")
+        return archived._mapping
     return memory
 
 @router.patch("/{memory_id}", response_model=MemoryInDB)
 async def update_memory(
     memory_id: UUID,
     memory_in: MemoryUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: Session = Depends(get_user_db),
+    current_user: CurrentUser = Depends(get_current_user)
 ):
-    """更新记忆"""
+    """更新记忆，已归档的记忆先搬回热表再更新"""
+    ArchiveService(db).restore(memory_id, current_user.id)
     memory = db.query(Memory)\
         .filter(Memory.id == memory_id, Memory.user_id == current_user.id)\
         .first()
@@ -88,24 +150,80 @@ async def update_memory(
     update_data = memory_in.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(memory, field, value)
+    if "tags" in update_data:
+        memory.tag_ids = TagService(db).ids_for(current_user.id, memory.tags or [])
+        HeatmapService(db).invalidate(memory)
+    dedupe = DedupeService(db)
+    if "content" in update_data:
+        dedupe.check(memory)
     
     db.commit()
     db.refresh(memory)
+    dedupe.remember(memory)
+    invalidate_memory(memory)
     return memory
 
 @router.delete("/{memory_id}")
 async def delete_memory(
     memory_id: UUID,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: Session = Depends(get_user_db),
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """删除记忆"""
     memory = db.query(Memory)\
         .filter(Memory.id == memory_id, Memory.user_id == current_user.id)\
         .first()
     if not memory:
-        raise HTTPException(status_code=404, detail="Memory not found")
+        archive = ArchiveService(db)
+        archived = archive.get(memory_id, current_user.id)
+        if not archived:
+            raise HTTPException(status_code=404, detail="Memory not found")
+        archive.delete(memory_id, current_user.id)
+        HeatmapService(db).invalidate(archived)
+        GraphService(db).remove_memory(current_user.id, memory_id)
+        db.commit()
+        DedupeService(db).forget(archived)
+        invalidate_memory(archived)
+        return {"status": "success"}
     
     db.delete(memory)
+    HeatmapService(db).invalidate(memory)
+    GraphService(db).remove_memory(current_user.id, memory_id)
     db.commit()
-    return {"status": "success"} 
\ No newline at end of file
+    DedupeService(db).forget(memory)
+    # 已删除的对象不会在提交时过期，仍可读取所在日期
+    invalidate_memory(memory)
+    return {"status": "success"} 
+
+@router.get("/{memory_id}/graph", response_model=MemoryGraph)
+async def read_memory_graph(
+    memory_id: UUID,
+    depth: int = Query(2, ge=1, le=settings.GRAPH_MAX_DEPTH),
+    types: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """获取记忆 depth 跳以内的关联图
+
+    types=next,similar 只沿指定类型的边遍历。
+    """
+    relation_types = [t.strip() for t in types.split(",") if t.strip()] if types else None
+    nodes, edges = await GraphService(db).get_graph(current_user.id, memory_id, depth, relation_types)
+    return MemoryGraph.from_rows(memory_id, depth, nodes, edges)
+
+@router.post("/{memory_id}/relations", response_model=GraphEdge)
+async def create_memory_relation(
+    memory_id: UUID,
+    relation_in: RelationCreate,
+    db: Session = Depends(get_user_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """添加一条从该记忆出发的关联边，已存在时更新分数"""
+    edge = await GraphService(db).add_relation(
+        current_user.id,
+        memory_id,
+        relation_in.target_id,
+        relation_in.relation_type,
+        relation_in.relation_score
+    )
+    return GraphEdge.from_edge(edge)
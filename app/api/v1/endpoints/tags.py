@@ -0,0 +1,20 @@
+from typing import List
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.replicas import get_read_db
+from app.api.deps import get_current_user
+from app.services.tag_service import TagService
+
+router = APIRouter()
+
+@router.get("/suggest", response_model=List[str])
+async def suggest_tags(
+    prefix: str = Query(..., min_length=1, max_length=64),
+    limit: int = Query(settings.TAG_SUGGEST_LIMIT, ge=1, le=50),
+    db: Session = Depends(get_read_db),
+    current_user = Depends(get_current_user)
+):
+    """按前缀联想当前用户用过的标签"""
+    tag_service = TagService(db)
+    return await tag_service.suggest(current_user.id, prefix.strip(), limit)
@@ -1,15 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from datetime import datetime
-from app.db.session import get_db
-from app.api.deps import get_current_user
-from app.services.timeline_service import TimelineService
+from datetime import date as date_type, datetime
+from app.db.replicas import get_read_db
+from app.api.deps import get_current_user, get_user_db, parse_fields
+from app.services.view_cache import cached_view, TIMELINE_SCOPE
+from app.services.timeline_service import TimelineService, TIMELINE_COLUMN_MAP
+from app.services.sweeper_service import SweeperService
 from app.api.v1.schemas.timeline import (
     TimelineCreate,
     TimelineUpdate,
+    TimelineEntry,
     TimelineResponse,
-    TimelineEndRequest
+    TimelineEndRequest,
+    TimelineSummary,
+    SweepRule,
+    FORMATTED_FIELDS
 )
 
 router = APIRouter()
@@ -17,7 +23,7 @@ router = APIRouter()
 @router.post("/start", response_model=TimelineResponse)
 async def start_activity(
     activity: TimelineCreate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_user_db),
     current_user = Depends(get_current_user)
 ):
     """开始一个新活动"""
@@ -35,7 +41,7 @@ async def start_activity(
 @router.post("/end", response_model=TimelineResponse)
 async def end_activity(
     request: TimelineEndRequest,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_user_db),
     current_user = Depends(get_current_user)
 ):
     """结束当前活动"""
@@ -48,15 +54,86 @@ async def end_activity(
         raise HTTPException(status_code=404, detail="No ongoing activity found")
     return activity
 
-@router.get("/daily", response_model=List[TimelineResponse])
+@router.get("/daily", response_model=List[TimelineEntry])
 async def get_daily_timeline(
+    request: Request,
     date: Optional[str] = None,
-    db: Session = Depends(get_db),
+    formatted: bool = Query(
+        False,
+        description="为 true 时每条活动另外返回 formatted_start_time、formatted_end_time、formatted_duration"
+    ),
+    fields: Optional[str] = Query(
+        None,
+        description="逗号分隔，只返回这些字段（及 id），可包含 formatted_* 字段，如 content,formatted_duration"
+    ),
+    db: Session = Depends(get_read_db),
     current_user = Depends(get_current_user)
 ):
-    """获取日时间轴"""
+    """获取日时间轴
+
+    查询行直接序列化为 JSON，不再逐行构建并二次校验；默认返回 TimelineEntry 的字段，
+    formatted=true 时才另外返回 formatted_* 字段。
+    fields=content,start_time 只返回指定字段，未请求的列不会从数据库选出。
+    带 If-None-Match 且数据未变化时直接返回 304；结果按 (用户, 日期) 读穿透缓存。
+    """
+    requested = parse_fields(fields, [*TIMELINE_COLUMN_MAP, *FORMATTED_FIELDS])
+    day = datetime.strptime(date, "%Y-%m-%d") if date else datetime.now()
     timeline_service = TimelineService(db)
-    return await timeline_service.get_daily_timeline(
+
+    async def load():
+        rows = await timeline_service.get_daily_timeline(
+            user_id=current_user.id,
+            date=day,
+            columns=TimelineEntry.source_columns(requested) if requested else None
+        )
+        return [TimelineEntry.serialize_row(row, formatted, requested) for row in rows]
+
+    return await cached_view(
+        request,
         user_id=current_user.id,
-        date=datetime.strptime(date, "%Y-%m-%d") if date else None
-    ) 
\ No newline at end of file
+        scope=TIMELINE_SCOPE,
+        day=day.date(),
+        variant=(formatted, tuple(requested or ())),
+        version=lambda: timeline_service.get_daily_version(user_id=current_user.id, date=day),
+        load=load,
+    )
+
+@router.get("/summary", response_model=TimelineSummary)
+async def get_time_summary(
+    start_date: Optional[date_type] = None,
+    end_date: Optional[date_type] = None,
+    db: Session = Depends(get_read_db),
+    current_user = Depends(get_current_user)
+):
+    """获取时间投入汇总（默认今天），并行活动的重叠时间只算一次"""
+    start_date = start_date or datetime.now().date()
+    end_date = end_date or start_date
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+
+    timeline_service = TimelineService(db)
+    summary = await timeline_service.get_time_summary(
+        user_id=current_user.id,
+        start_date=start_date,
+        end_date=end_date
+    )
+    return TimelineSummary.from_summary(start_date, end_date, summary)
+
+@router.get("/sweep-rule", response_model=SweepRule)
+async def get_sweep_rule(
+    db: Session = Depends(get_read_db),
+    current_user = Depends(get_current_user)
+):
+    """获取遗留活动的自动结束规则"""
+    mode, max_hours = await SweeperService(db).get_rule(current_user.id)
+    return SweepRule(mode=mode, max_hours=max_hours)
+
+@router.put("/sweep-rule", response_model=SweepRule)
+async def update_sweep_rule(
+    rule: SweepRule,
+    db: Session = Depends(get_user_db),
+    current_user = Depends(get_current_user)
+):
+    """设置遗留活动的自动结束规则"""
+    mode, max_hours = await SweeperService(db).update_rule(current_user.id, rule.mode, rule.max_hours)
+    return SweepRule(mode=mode, max_hours=max_hours)
@@ -0,0 +1,31 @@
+from typing import List, Optional
+from pydantic import BaseModel
+
+class ReplicaStatus(BaseModel):
+    """只读副本的健康状态"""
+    host: str
+    healthy: bool
+    lag: Optional[float]  # 复制延迟（秒），检查失败时为空
+    reads: int
+
+class PoolStatus(BaseModel):
+    """连接池状态，wait_* 为借出连接耗时的分位数（秒，取直方图分桶上界）"""
+    name: str
+    size: int
+    checked_out: int
+    checked_in: int
+    overflow: int
+    wait_p50: float
+    wait_p99: float
+    timeouts: int
+    disconnects: int
+
+class DatabaseRouting(BaseModel):
+    """读请求分流统计（本进程启动以来）"""
+    replica_reads: int
+    primary_reads: int  # 未配置副本时的读请求
+    pinned_reads: int  # 读自己的写，走主库
+    fallback_reads: int  # 没有健康副本，退回主库
+    offload: float  # 副本承担的读请求比例
+    replicas: List[ReplicaStatus]
+    pools: List[PoolStatus]
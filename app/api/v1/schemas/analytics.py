@@ -0,0 +1,42 @@
+from datetime import date, datetime
+from typing import Dict, List, Optional
+from pydantic import BaseModel
+
+class EmotionBucket(BaseModel):
+    """一个时间桶内的情绪统计"""
+    bucket_start: datetime
+    count: int
+    mean: float
+    variance: Optional[float]  # 只有一条记录时为空
+    top_tags: List[str]
+
+    @classmethod
+    def from_rows(cls, stats, top_tags: Dict[datetime, List[str]]) -> List["EmotionBucket"]:
+        return [
+            cls(
+                bucket_start=row.bucket_start,
+                count=row.count,
+                mean=row.mean,
+                variance=row.variance,
+                top_tags=top_tags.get(row.bucket_start, [])
+            )
+            for row in stats
+        ]
+
+class ActivityHeatmap(BaseModel):
+    """按星期 x 小时的活动时长（秒），cells[0] 是星期一，cells[i][h] 是 h 点这一小时"""
+    start_date: date
+    end_date: date
+    tag: Optional[str]
+    total_seconds: float
+    cells: List[List[float]]
+
+    @classmethod
+    def from_matrix(cls, start_date: date, end_date: date, tag: Optional[str], heat) -> "ActivityHeatmap":
+        return cls(
+            start_date=start_date,
+            end_date=end_date,
+            tag=tag,
+            total_seconds=float(heat.sum()),
+            cells=heat.tolist()
+        )
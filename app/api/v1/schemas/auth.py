@@ -16,6 +16,16 @@ class Token(BaseModel):
     """令牌响应模型"""
     access_token: str
     token_type: str = "bearer"
+    refresh_token: Optional[str] = None
+    expires_in: Optional[int] = None  # 访问令牌有效期（秒）
+
+class RefreshRequest(BaseModel):
+    """刷新 / 登出请求模型"""
+    refresh_token: str
+
+class LogoutRequest(BaseModel):
+    """登出请求模型：带上刷新令牌时一并作废本次登录的刷新令牌"""
+    refresh_token: Optional[str] = None
 
 class TokenData(BaseModel):
     """令牌数据模型"""
@@ -0,0 +1,25 @@
+from typing import Any, Dict, List, Literal, Optional
+from pydantic import BaseModel, Field
+
+class BatchOperation(BaseModel):
+    """批量请求中的一个子请求"""
+    id: Optional[str] = Field(None, description="客户端自定义的标识，原样返回")
+    method: Literal["GET", "POST", "PUT", "PATCH", "DELETE"] = "GET"
+    path: str = Field(..., description="相对 API 前缀的路径，可带查询字符串，如 /timeline/daily?date=2026-10-19")
+    headers: Dict[str, str] = Field(default_factory=dict, description="附加请求头，如 If-None-Match")
+    body: Optional[Any] = None
+
+class BatchRequest(BaseModel):
+    """批量请求模型：连续的只读子请求并发执行，写操作按顺序执行"""
+    operations: List[BatchOperation] = Field(..., min_length=1)
+
+class BatchResult(BaseModel):
+    """子请求的结果"""
+    id: Optional[str] = None
+    status: int
+    headers: Dict[str, str] = {}
+    body: Optional[Any] = None
+
+class BatchResponse(BaseModel):
+    """批量响应模型：结果与子请求一一对应"""
+    results: List[BatchResult]
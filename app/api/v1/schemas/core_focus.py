@@ -1,10 +1,12 @@
 from pydantic import BaseModel, Field, ConfigDict
 from typing import List, Optional
-from datetime import date
+from datetime import date, datetime
 from uuid import UUID
 import re
+import numpy as np
 from app.api.v1.schemas.timeline import TimelineResponse
 from app.db.models.memory import Memory
+from app.services.interval_engine import from_seconds, rows_to_arrays, union_seconds
 
 class ImportantMatterCreate(BaseModel):
     """创建重要事项"""
@@ -50,25 +52,25 @@ class ImportantMatterResponse(BaseModel):
         minutes = int(self.actual_minutes % 60)
         return f"{hours}小时{minutes}分钟" if hours > 0 else f"{minutes}分钟"
 
+    @staticmethod
+    def serialize_row(memory) -> dict:
+        """从 Memory 或 IMPORTANT_MATTER_COLUMNS 查询行构建响应字典，不经过 Pydantic 校验"""
+        return {
+            "id": memory.id,
+            "content": memory.content,
+            "target_minutes": memory.target_duration / 60 if memory.target_duration else 0,  # 秒转分钟显示
+            "actual_minutes": memory.duration / 60 if memory.duration else 0,  # 秒转分钟显示
+            "completion_rate": memory.completion_rate if memory.completion_rate else 0,
+            "date": memory.start_time.date(),
+            "tags": memory.tags,
+            "description": memory.description,
+            "related_activities": [],  # 暂时为空
+        }
+
     @classmethod
     def from_memory(cls, memory: "Memory") -> "ImportantMatterResponse":
         """从 Memory 模型创建响应"""
-        # 从内容中提取描述
-        content_parts = memory.content.split("\n---\n", 1)
-        main_content = content_parts[0]
-        description = content_parts[1] if len(content_parts) > 1 else None
-
-        return cls(
-            id=memory.id,
-            content=main_content,
-            target_minutes=memory.target_duration / 60 if memory.target_duration else 0,  # 秒转分钟显示
-            actual_minutes=memory.duration / 60 if memory.duration else 0,  # 秒转分钟显示
-            completion_rate=memory.completion_rate if memory.completion_rate else 0,
-            date=memory.start_time.date(),
-            tags=memory.tags,
-            description=description,
-            related_activities=[]  # 暂时为空
-        )
+        return cls(**cls.serialize_row(memory))
 
     model_config = ConfigDict(from_attributes=True) 
 
@@ -85,16 +87,16 @@ class ImportantMatterWithActivities(BaseModel):
     def from_memory_and_activities(
         cls,
         matter: Memory,
-        activities: List[Memory]
+        activities: list
     ) -> "ImportantMatterWithActivities":
-        total_seconds = sum(  # 改名更清晰
-            activity.duration or 0  # 这里是秒
-            for activity in activities
-        )
+        """activities 为 TIMELINE_COLUMNS 查询行"""
+        # 并行活动按区间并集计算，重叠部分只算一次（单位：秒）
+        starts, ends, _ = rows_to_arrays(activities, now=datetime.now())
+        total_seconds = union_seconds(starts, ends)
         
         return cls(
             matter=ImportantMatterResponse.from_memory(matter),
-            activities=[TimelineResponse.from_orm(activity) for activity in activities],
+            activities=[TimelineResponse.model_validate(TimelineResponse.serialize_row(activity)) for activity in activities],
             total_minutes=total_seconds / 60,  # 秒转分钟显示
             completion_rate=(total_seconds / (matter.target_duration or 1)) * 100  # 直接用秒计算
         )
@@ -127,17 +129,113 @@ class LongTermGoalResponse(BaseModel):
     tags: List[str]
     description: Optional[str]
 
+    @staticmethod
+    def serialize_row(memory) -> dict:
+        """从 Memory 或 LONG_TERM_GOAL_COLUMNS 查询行构建响应字典，不经过 Pydantic 校验"""
+        return {
+            "id": memory.id,
+            "content": memory.content,
+            "target_date": memory.target_date,
+            "target_value": memory.target_value,
+            "current_value": memory.current_value or 0,
+            "progress_type": memory.progress_type,
+            "milestone_points": memory.milestone_points,
+            "completion_rate": (memory.current_value or 0) / memory.target_value * 100 if memory.target_value else 0,
+            "tags": memory.tags,
+            "description": memory.description,
+        }
+
     @classmethod
     def from_memory(cls, memory: Memory) -> "LongTermGoalResponse":
+        return cls(**cls.serialize_row(memory))
+
+class GoalProgressPoint(BaseModel):
+    """进度历史中的一个点"""
+    recorded_at: datetime
+    value: float
+    delta: Optional[float] = None
+    note: Optional[str] = None
+
+class GoalProgressBucket(BaseModel):
+    """按时间桶聚合的进度"""
+    start: datetime
+    min: float
+    max: float
+    last: float
+    count: int
+
+class GoalProgressHistory(BaseModel):
+    """目标进度历史：raw / lttb 模式返回 points，bucket 模式返回 buckets"""
+    goal_id: UUID
+    mode: str
+    total: int  # 范围内的原始记录数
+    points: List[GoalProgressPoint] = []
+    buckets: List[GoalProgressBucket] = []
+
+    @classmethod
+    def from_history(cls, goal_id: UUID, mode: str, history) -> "GoalProgressHistory":
+        buckets = []
+        if history.buckets is not None:
+            starts, mins, maxs, lasts, counts = history.buckets
+            buckets = [
+                GoalProgressBucket(start=start, min=low, max=high, last=last, count=count)
+                for start, low, high, last, count in zip(
+                    from_seconds(starts), mins.tolist(), maxs.tolist(), lasts.tolist(), counts.tolist()
+                )
+            ]
         return cls(
-            id=memory.id,
-            content=memory.content,
-            target_date=memory.target_date,
-            target_value=memory.target_value,
-            current_value=memory.current_value or 0,
-            progress_type=memory.progress_type,
-            milestone_points=memory.milestone_points,
-            completion_rate=(memory.current_value or 0) / memory.target_value * 100 if memory.target_value else 0,
-            tags=memory.tags,
-            description=memory.description
-        )
\ No newline at end of file
+            goal_id=goal_id,
+            mode=mode,
+            total=history.total,
+            points=[
+                GoalProgressPoint(
+                    recorded_at=row.recorded_at,
+                    value=row.value,
+                    delta=row.delta,
+                    note=row.note
+                )
+                for row in history.points
+            ],
+            buckets=buckets,
+        )
+
+class MilestoneEta(BaseModel):
+    """里程碑预计达成情况"""
+    value: float
+    reached: bool
+    eta: Optional[datetime] = None  # 未达成且当前速度 > 0 时的预计达成时间
+
+class GoalAnalytics(LongTermGoalResponse):
+    """长期目标进度分析"""
+    pace_per_day: Optional[float]           # 最小二乘回归得到的每天进度
+    required_pace_per_day: Optional[float]  # 按期完成需要的每天进度，已过期为 None
+    projected_completion: Optional[datetime]
+    behind_schedule: bool
+    milestones: List[MilestoneEta]
+
+    @staticmethod
+    def serialize_all(goals, pace) -> List[dict]:
+        """从目标行和 analyze 的结果构建响应字典列表，不经过 Pydantic 校验"""
+        finite = lambda value: float(value) if np.isfinite(value) else None
+        to_datetime = lambda value: from_seconds([value])[0] if np.isfinite(value) else None
+
+        milestones = [[] for _ in goals]
+        for goal_index, value, eta, reached in zip(
+            pace.milestone_goal.tolist(),
+            pace.milestone_value.tolist(),
+            pace.milestone_eta,
+            pace.milestone_reached.tolist()
+        ):
+            milestones[goal_index].append({"value": value, "reached": reached, "eta": to_datetime(eta)})
+
+        return [
+            {
+                **LongTermGoalResponse.serialize_row(goal),
+                "pace_per_day": finite(pace.pace[i]),
+                "required_pace_per_day": finite(pace.required_pace[i]),
+                "projected_completion": to_datetime(pace.projected[i]),
+                "behind_schedule": bool(pace.behind[i]),
+                "milestones": milestones[i],
+            }
+            for i, goal in enumerate(goals)
+        ]
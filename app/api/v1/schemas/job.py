@@ -0,0 +1,62 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, Field
+from app.db.models.enums import JobStatus
+
+class JobCreate(BaseModel):
+    """手动入队请求模型"""
+    job_type: str
+    payload: Dict[str, Any] = {}
+    priority: int = 0
+    run_at: Optional[datetime] = None  # UTC，默认立即执行
+    max_attempts: Optional[int] = Field(None, ge=1)
+
+class JobResponse(BaseModel):
+    """任务详情"""
+    id: int
+    job_type: str
+    payload: Optional[Dict[str, Any]]
+    priority: int
+    status: JobStatus
+    attempts: int
+    max_attempts: int
+    run_at: datetime
+    locked_by: Optional[str]
+    locked_at: Optional[datetime]
+    finished_at: Optional[datetime]
+    last_error: Optional[str]
+    result: Optional[Dict[str, Any]]
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class JobTypeSummary(BaseModel):
+    """某类任务各状态的数量"""
+    job_type: str
+    queued: int
+    running: int
+    succeeded: int
+    failed: int
+    oldest_due_seconds: Optional[float]  # 最早一个已到期但未领取的任务已等待的秒数
+
+class ScheduleInfo(BaseModel):
+    """定时任务"""
+    name: str
+    cron: str
+    job_type: str
+    next_run_at: datetime
+
+class WorkerInfo(BaseModel):
+    """处理本次请求的 worker"""
+    worker_id: str
+    running: int
+    processed: int
+
+class JobsStatus(BaseModel):
+    """任务队列状态"""
+    worker: WorkerInfo
+    summary: List[JobTypeSummary]
+    schedules: List[ScheduleInfo]
+    jobs: List[JobResponse]
@@ -1,6 +1,6 @@
 from typing import Optional, List
 from datetime import datetime
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from uuid import UUID
 from app.db.models.memory import MemoryType, CoreFocusType
 
@@ -24,8 +24,68 @@ class MemoryInDB(MemoryBase):
     """数据库记忆模型"""
     id: UUID
     user_id: UUID
+    duplicate_of: Optional[UUID] = None  # 近似重复的原记忆
     created_at: datetime
     updated_at: datetime
 
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True 
+
+class RelationCreate(BaseModel):
+    """添加关联边请求模型"""
+    target_id: UUID
+    relation_type: str = Field(..., min_length=1, max_length=32)
+    relation_score: float = 0.0
+
+class GraphNode(BaseModel):
+    """关联图节点，content 为空表示记忆已删除或已归档"""
+    id: UUID
+    depth: int
+    content: Optional[str] = None
+    memory_type: Optional[MemoryType] = None
+    start_time: Optional[datetime] = None
+
+class GraphEdge(BaseModel):
+    """关联图的边"""
+    source_id: UUID
+    target_id: UUID
+    relation_type: str
+    relation_score: Optional[float] = None
+
+    @classmethod
+    def from_edge(cls, edge) -> "GraphEdge":
+        source_id, target_id, relation_type, relation_score = edge
+        return cls(
+            source_id=source_id,
+            target_id=target_id,
+            relation_type=relation_type,
+            relation_score=relation_score
+        )
+
+class MemoryGraph(BaseModel):
+    """记忆关联图"""
+    root_id: UUID
+    depth: int
+    nodes: List[GraphNode]
+    edges: List[GraphEdge]
+
+    @classmethod
+    def from_rows(cls, root_id: UUID, depth: int, nodes, edges) -> "MemoryGraph":
+        return cls(
+            root_id=root_id,
+            depth=depth,
+            nodes=sorted(
+                (
+                    GraphNode(
+                        id=node.id,
+                        depth=node.depth,
+                        content=node.content,
+                        memory_type=node.memory_type,
+                        start_time=node.start_time
+                    )
+                    for node in nodes
+                ),
+                key=lambda node: node.depth
+            ),
+            edges=[GraphEdge.from_edge(edge) for edge in edges]
+        )
@@ -1,8 +1,29 @@
-from pydantic import BaseModel, computed_field
-from typing import List, Optional
-from datetime import datetime
+from pydantic import BaseModel, Field, computed_field
+from typing import Collection, List, Optional
+from datetime import date, datetime
 from uuid import UUID
 
+
+def format_clock(value: Optional[datetime]) -> Optional[str]:
+    """格式化时刻为 HH:MM:SS"""
+    return value.strftime("%H:%M:%S") if value else None
+
+
+def format_duration(seconds: Optional[float]) -> Optional[str]:
+    """格式化持续时间（秒）为 X分Y秒"""
+    if seconds is None:
+        return None
+    return f"{int(seconds / 60)}分{int(seconds % 60)}秒"
+
+
+# 格式化字段 -> (依赖的源字段, 格式化函数)
+FORMATTED_FIELDS = {
+    "formatted_start_time": ("start_time", format_clock),
+    "formatted_end_time": ("end_time", format_clock),
+    "formatted_duration": ("duration", format_duration),
+}
+
+
 class TimelineCreate(BaseModel):
     content: str
     target_duration: Optional[float] = None
@@ -15,7 +36,12 @@ class TimelineUpdate(BaseModel):
     content: Optional[str] = None
     tags: Optional[List[str]] = None
 
-class TimelineResponse(BaseModel):
+class TimelineEntry(BaseModel):
+    """时间轴活动（GET /timeline/daily 列表的默认形状）
+
+    formatted_* 字段默认不返回：formatted=true 时返回全部格式化字段，
+    也可以在 ?fields= 中单独请求。
+    """
     id: UUID
     content: str
     start_time: Optional[datetime]
@@ -24,35 +50,115 @@ class TimelineResponse(BaseModel):
     is_ongoing: bool
     target_duration: Optional[float]
     completion_rate: Optional[float]
+    completion_note: Optional[str] = None
     tags: List[str]
     allow_parallel: bool
     parallel_group: Optional[str]
     priority: int
 
+    @staticmethod
+    def source_columns(fields: Collection[str]) -> List[str]:
+        """?fields= 请求的字段需要从数据库选出的列名（id 总是包含）"""
+        names = ["id"]
+        for field in fields:
+            name = FORMATTED_FIELDS[field][0] if field in FORMATTED_FIELDS else field
+            if name not in names:
+                names.append(name)
+        return names
+
+    @staticmethod
+    def serialize_row(
+        row,
+        formatted: bool = False,
+        fields: Optional[Collection[str]] = None
+    ) -> dict:
+        """把 TIMELINE_COLUMNS 查询行直接转换为字典，跳过 Pydantic 校验
+
+        formatted 为 True 时才计算 formatted_* 字段；
+        指定 fields 时只输出这些字段（及 id），格式化字段按需计算。
+        """
+        data = dict(row._mapping)
+        if fields is None:
+            wanted = FORMATTED_FIELDS if formatted else ()
+        else:
+            wanted = [field for field in fields if field in FORMATTED_FIELDS]
+        for name in wanted:
+            source, fmt = FORMATTED_FIELDS[name]
+            data[name] = fmt(data[source])
+        if fields is not None:
+            data = {key: value for key, value in data.items() if key == "id" or key in fields}
+        return data
+
+    class Config:
+        from_attributes = True
+
+
+class TimelineResponse(TimelineEntry):
+    """单个活动的响应，包含格式化字段"""
+
     @computed_field
     @property
     def formatted_start_time(self) -> Optional[str]:
         """格式化开始时间"""
-        return self.start_time.strftime("%H:%M:%S") if self.start_time else None
+        return format_clock(self.start_time)
 
     @computed_field
     @property
     def formatted_end_time(self) -> Optional[str]:
         """格式化结束时间"""
-        return self.end_time.strftime("%H:%M:%S") if self.end_time else None
+        return format_clock(self.end_time)
 
     @computed_field
     @property
     def formatted_duration(self) -> Optional[str]:
         """格式化持续时间"""
-        if self.duration is None:
-            return None
-        minutes = int(self.duration / 60)
-        seconds = int(self.duration % 60)
-        return f"{minutes}分{seconds}秒"
+        return format_duration(self.duration)
 
-    class Config:
-        from_attributes = True 
 
 class TimelineEndRequest(BaseModel):
-    content: Optional[str] = None 
\ No newline at end of file
+    content: Optional[str] = None
+
+
+class GroupTime(BaseModel):
+    """并行组的时间统计（秒）"""
+    group: str
+    seconds: float
+    exclusive_seconds: float
+
+
+class TimelineSummary(BaseModel):
+    """时间投入汇总：按区间并集计算，并行活动的重叠部分不重复计算"""
+    start_date: date
+    end_date: date
+    total_seconds: float      # 各活动时长直接相加
+    union_seconds: float      # 实际占用时长
+    overlap_seconds: float    # 重复计算的部分
+    groups: List[GroupTime]
+    overlap_matrix: List[List[float]]  # 与 groups 顺序一致
+
+    @classmethod
+    def from_summary(cls, start_date: date, end_date: date, summary) -> "TimelineSummary":
+        return cls(
+            start_date=start_date,
+            end_date=end_date,
+            total_seconds=summary.total_seconds,
+            union_seconds=summary.union_seconds,
+            overlap_seconds=summary.total_seconds - summary.union_seconds,
+            groups=[
+                GroupTime(group=name, seconds=float(seconds), exclusive_seconds=float(exclusive))
+                for name, seconds, exclusive in zip(
+                    summary.groups, summary.group_seconds, summary.exclusive_seconds
+                )
+            ],
+            overlap_matrix=summary.overlap.tolist(),
+        )
+
+class SweepRule(BaseModel):
+    """遗留活动的结束规则：进行中超过 max_hours 小时的活动会被自动结束
+
+    max_duration：结束时间为开始后 max_hours 小时；
+    next_start：结束时间为下一个活动的开始时间（不晚于开始后 max_hours 小时）。
+    """
+    mode: str = Field(..., pattern="^(max_duration|next_start)$")
+    # 汇总统计假设活动不超过一天（见 MAX_ACTIVITY_SPAN）
+    max_hours: float = Field(..., gt=0, le=24)
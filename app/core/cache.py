@@ -0,0 +1,229 @@
+import asyncio
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Dict, Hashable, Optional, Tuple
+
+from app.core.config import settings
+from app.core.logger import setup_logger
+
+logger = setup_logger("cache")
+
+try:
+    import redis
+except ImportError:  # redis 为可选依赖，只有配置了共享缓存时才需要
+    redis = None
+
+
+class LRUBackend:
+    """进程内 LRU 缓存：按条目数限制内存，超出时淘汰最久未使用的条目
+
+    每个条目对应一个 key，内部再按 variant 存多份序列化结果，
+    删除 key 即可让它的所有 variant 一起失效。
+    失效只作用于本进程，只能在单 worker 部署中使用（见 build_backend）。
+    """
+
+    def __init__(self, max_entries: int, ttl: int) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, bytes]]]" = OrderedDict()
+        # 每个 key 的代数：失效时取全局递增的新值；加载前后代数不一致说明期间有写入，结果不再回填。
+        # 只保留最近失效的 max_entries 个 key，被淘汰的 key 的代数按淘汰过的最大值计，
+        # 淘汰前取得的旧代数不会与之相等
+        self._counter = 0
+        self._floor = 0
+        self._generations: "OrderedDict[str, int]" = OrderedDict()
+
+    def get(self, key: str, variant: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, variants = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return variants.get(variant)
+
+    def token(self, key: str) -> int:
+        return self._generations.get(key, self._floor)
+
+    def set(self, key: str, variant: str, value: bytes, token: int) -> bool:
+        if token != self.token(key):
+            return False
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            entry = (time.monotonic() + self.ttl, {})
+            self._entries[key] = entry
+        entry[1][variant] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return True
+
+    def delete(self, key: str) -> None:
+        self._counter += 1
+        self._generations[key] = self._counter
+        self._generations.move_to_end(key)
+        while len(self._generations) > self.max_entries:
+            _, generation = self._generations.popitem(last=False)
+            self._floor = max(self._floor, generation)
+        self._entries.pop(key, None)
+
+
+class SharedBackend:
+    """多个 worker 共享的缓存（Redis 哈希：key -> {variant: 序列化结果}）
+
+    每个 key 另有一个代数计数器，失效时递增；回填前检查代数，避免把旧数据写回。
+    """
+
+    def __init__(self, client, ttl: int, prefix: str = "view:") -> None:
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self.evictions = 0  # 淘汰由 Redis 自身的 maxmemory 策略负责
+
+    def get(self, key: str, variant: str) -> Optional[bytes]:
+        return self.client.hget(self.prefix + key, variant)
+
+    def token(self, key: str) -> int:
+        return int(self.client.get(self.prefix + "gen:" + key) or 0)
+
+    def set(self, key: str, variant: str, value: bytes, token: int) -> bool:
+        if self.token(key) != token:
+            return False
+        self.client.hset(self.prefix + key, variant, value)
+        self.client.expire(self.prefix + key, self.ttl)
+        return True
+
+    def delete(self, key: str) -> None:
+        self.client.incr(self.prefix + "gen:" + key)
+        self.client.expire(self.prefix + "gen:" + key, self.ttl * 2)
+        self.client.delete(self.prefix + key)
+
+
+class FakeRedis:
+    """SharedBackend 用的内存假客户端，供本地开发和测试使用（CACHE_REDIS_URL=memory://）"""
+
+    def __init__(self) -> None:
+        self.data: Dict[str, object] = {}
+
+    def get(self, name: str):
+        return self.data.get(name)
+
+    def incr(self, name: str) -> int:
+        self.data[name] = int(self.data.get(name) or 0) + 1
+        return self.data[name]
+
+    def hget(self, name: str, key: str):
+        return self.data.get(name, {}).get(key)
+
+    def hset(self, name: str, key: str, value: bytes) -> None:
+        self.data.setdefault(name, {})[key] = value
+
+    def expire(self, name: str, seconds: int) -> None:
+        pass
+
+    def delete(self, name: str) -> None:
+        self.data.pop(name, None)
+
+
+class ViewCache:
+    """读穿透缓存
+
+    - get/set 之外提供 lock()：同一 key+variant 同时只有一个请求回源（防击穿）
+    - token()/set() 配合：回源期间发生失效时放弃回填
+    - hits/misses 等计数通过 stats() 导出
+    """
+
+    def __init__(self, backend, enabled: bool = True) -> None:
+        self.backend = backend
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.stale_skips = 0
+        self.invalidations = 0
+        # (key, variant) -> [锁, 持有/等待者数量]
+        self._locks: Dict[Hashable, list] = {}
+
+    def get(self, key: str, variant: str) -> Optional[bytes]:
+        if not self.enabled:
+            return None
+        value = self.backend.get(key, variant)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def token(self, key: str) -> int:
+        return self.backend.token(key) if self.enabled else 0
+
+    def set(self, key: str, variant: str, value: bytes, token: int) -> None:
+        if not self.enabled:
+            return
+        if self.backend.set(key, variant, value, token):
+            self.stores += 1
+        else:
+            self.stale_skips += 1
+
+    def invalidate(self, key: str) -> None:
+        if not self.enabled:
+            return
+        self.invalidations += 1
+        self.backend.delete(key)
+
+    @asynccontextmanager
+    async def lock(self, key: str, variant: str):
+        """同一 key+variant 的回源串行化，等待者拿到锁后应重新 get"""
+        lock_key = (key, variant)
+        entry = self._locks.setdefault(lock_key, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                self._locks.pop(lock_key, None)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "stores": self.stores,
+            "stale_skips": self.stale_skips,
+            "invalidations": self.invalidations,
+            "evictions": self.backend.evictions,
+        }
+
+
+def build_backend(enabled: bool = True):
+    """根据配置创建缓存后端：配置了 CACHE_REDIS_URL 时使用共享后端，否则使用进程内 LRU
+
+    进程内 LRU 的失效不会通知其他 worker，多 worker（WEB_CONCURRENCY > 1）时
+    其他 worker 会一直返回写入前的缓存，直到过期；此时必须配置共享后端，否则拒绝启动。
+    """
+    ttl = settings.VIEW_CACHE_TTL_SECONDS
+    url = settings.CACHE_REDIS_URL
+    if url == "memory://":
+        return SharedBackend(FakeRedis(), ttl=ttl)
+    if url and redis is not None:
+        return SharedBackend(redis.Redis.from_url(url), ttl=ttl)
+    if enabled and settings.WEB_CONCURRENCY > 1:
+        reason = "未安装 redis" if url else "未配置 CACHE_REDIS_URL"
+        raise RuntimeError(
+            f"WEB_CONCURRENCY={settings.WEB_CONCURRENCY} 时日视图缓存需要共享后端（{reason}）；"
+            f"请配置 CACHE_REDIS_URL 或设置 VIEW_CACHE_ENABLED=false"
+        )
+    if url:
+        logger.warning("未安装 redis，退回进程内 LRU 缓存")
+    return LRUBackend(max_entries=settings.VIEW_CACHE_MAX_ENTRIES, ttl=ttl)
+
+
+view_cache = ViewCache(build_backend(settings.VIEW_CACHE_ENABLED), enabled=settings.VIEW_CACHE_ENABLED)
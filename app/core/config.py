@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "Memory Management System"
@@ -7,7 +7,10 @@ class Settings(BaseSettings):
     
     # JWT设置
     SECRET_KEY: str
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8  # 8 days
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 15  # 访问令牌校验不查库，作废要靠作废列表，有效期要短；过期后用刷新令牌续期
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30  # 刷新令牌每次使用后轮换
+    REVOCATION_SYNC_SECONDS: float = 5.0  # 各进程从 revoked_tokens 表同步作废记录的间隔，即作废在其他进程生效的延迟
+    REVOCATION_FILTER_CAPACITY: int = 100000  # 作废列表布隆过滤器的容量（访问令牌有效期内的作废数）
     
     # 数据库设置
     POSTGRES_SERVER: str
@@ -15,6 +18,116 @@ class Settings(BaseSettings):
     POSTGRES_PASSWORD: str
     POSTGRES_DB: str
     SQL_DEBUG: bool = False
+    POSTGRES_DRIVER: str = "psycopg2"  # psycopg2 / psycopg（psycopg 3）
+    
+    # 连接池设置（主库和每个副本各一个池，每个 worker 进程各自独立）
+    DB_POOL_SIZE: int = 10  # 常驻连接数
+    DB_MAX_OVERFLOW: int = 10  # 繁忙时最多再临时创建的连接数
+    DB_POOL_TIMEOUT: float = 10.0  # 借不到连接时最多等待的秒数
+    DB_POOL_RECYCLE: int = 1800  # 连接存活超过这么多秒后在借出时替换，应小于防火墙 / PgBouncer 的空闲超时
+    DB_POOL_PRE_PING: bool = False  # 每次借出前 ping 一次，多一次往返；默认依靠 recycle、keepalive 和断开后重建连接池
+    DB_KEEPALIVES_IDLE: int = 30  # TCP keepalive 空闲探测间隔（秒）
+    DB_PGBOUNCER: bool = False  # 经 PgBouncer 事务池模式连接：不使用服务端预处理语句
+    METRICS_ENABLED: bool = True  # 在 /metrics 以 Prometheus 文本格式导出指标
+    
+    # 只读副本设置：JSON 列表，如 ["postgresql://user:pw@replica1/db"]，为空时所有读请求走主库
+    POSTGRES_REPLICA_URLS: List[str] = []
+    REPLICA_STICKY_SECONDS: float = 10.0  # 用户写入后这段时间内的读请求走主库（读自己的写），应大于允许的最大延迟
+    REPLICA_MAX_LAG_SECONDS: float = 5.0  # 复制延迟超过此值的副本暂时摘除
+    REPLICA_HEALTH_CHECK_SECONDS: float = 10.0
+    REPLICA_CONNECT_TIMEOUT: int = 2
+    
+    # 按用户分片：JSON 对象 {"分片名": "URL"}，为空时所有数据在全局库。users 表和认证始终在全局库
+    POSTGRES_SHARD_URLS: Dict[str, str] = {}
+    SHARD_VNODES: int = 64  # 一致性哈希环上每个分片的虚拟节点数
+    SHARD_DIRECTORY_MAX_USERS: int = 100000  # 进程内缓存分片目录的用户数
+    SHARD_DIRECTORY_TTL_SECONDS: int = 30  # 迁移用户时其他 worker 最多延迟这么久看到目录变化
+    SHARD_MOVE_BATCH_SIZE: int = 5000
+    MEMORY_PARTITION_MONTHS_AHEAD: int = 3  # 提前创建的月分区数量
+    
+    # 冷数据归档设置
+    ARCHIVE_HORIZON_DAYS: int = 365  # 早于这个天数且已结束的时间轴活动和随手记会被归档（核心关注不归档）
+    ARCHIVE_BATCH_SIZE: int = 5000
+    ARCHIVE_BATCH_PAUSE: float = 0.1  # 每批之间的停顿（秒），避免占满 IO
+    
+    # 标签字典设置
+    TAG_CACHE_MAX_USERS: int = 10000  # 进程内缓存标签字典的用户数
+    TAG_SUGGEST_LIMIT: int = 10
+    
+    # 活动热力图设置
+    HEATMAP_ROLLUP_ENABLED: bool = True  # 已结束的日期按天汇总到 heatmap_rollup，重复查询不再扫描原始记录
+    
+    # 记忆关联图设置
+    GRAPH_MAX_DEPTH: int = 6
+    GRAPH_CACHE_MAX_USERS: int = 1000  # 进程内缓存邻接表的用户数
+    GRAPH_CACHE_MAX_EDGES: int = 50000  # 单个用户边数超过此值时不缓存，直接走递归 CTE
+    GRAPH_CACHE_TTL_SECONDS: int = 60  # 其他 worker 写入的边最多延迟这么久可见
+    
+    # 近似重复检测设置（快速记录和时间轴活动）
+    DEDUPE_ENABLED: bool = True
+    DEDUPE_MIN_SIMILARITY: float = 0.7  # MinHash 估计的 2-gram Jaccard 相似度阈值
+    DEDUPE_MERGE_SECONDS: int = 60  # 这个时间内的近似重复视为重复提交，直接返回原记录
+    DEDUPE_WINDOW_DAYS: int = 30  # 只与这么多天内的记忆比较
+    DEDUPE_INDEX_MAX_USERS: int = 1000  # 进程内缓存指纹索引的用户数
+    DEDUPE_INDEX_TTL_SECONDS: int = 300
+    DEDUPE_BATCH_SIZE: int = 5000
+    DEDUPE_BATCH_PAUSE: float = 0.1
+    
+    # 遗留活动清理设置（用户未设置规则时的默认值）
+    SWEEP_DEFAULT_MAX_HOURS: float = 12.0  # 进行中超过这么久的活动视为遗留
+    SWEEP_DEFAULT_MODE: str = "next_start"  # max_duration / next_start
+    SWEEP_CRON: str = "*/10 * * * *"
+    SWEEP_BATCH_SIZE: int = 1000
+    SWEEP_BATCH_PAUSE: float = 0.05
+    
+    # 后台任务设置
+    JOB_RUNNER_ENABLED: bool = True  # 在 API 进程内运行任务 worker
+    JOB_POLL_INTERVAL: float = 1.0  # 没有可领取的任务时的轮询间隔（秒）
+    JOB_LOCK_TIMEOUT_SECONDS: int = 300  # 超过这么久没有心跳的任务视为 worker 失联，重新排队
+    JOB_DEFAULT_MAX_ATTEMPTS: int = 3
+    JOB_RETRY_BASE_SECONDS: float = 10.0  # 重试退避：base * 2^(n-1)，不超过 max
+    JOB_RETRY_MAX_SECONDS: float = 3600.0
+    JOB_KEEP_DAYS: int = 7  # 成功任务保留天数
+    
+    # 响应压缩设置（低于阈值的响应不压缩）
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    
+    # 日视图读穿透缓存设置
+    # 进程内 LRU 的失效只作用于本进程：WEB_CONCURRENCY > 1 时必须配置 CACHE_REDIS_URL（或关闭缓存），否则启动失败
+    WEB_CONCURRENCY: int = 1  # worker 进程数，gunicorn 未指定 -w 时也读取这个环境变量
+    VIEW_CACHE_ENABLED: bool = True
+    VIEW_CACHE_MAX_ENTRIES: int = 10000
+    VIEW_CACHE_TTL_SECONDS: int = 600
+    CACHE_REDIS_URL: Optional[str] = None  # 如 redis://localhost:6379/0；memory:// 为内存假后端
+    
+    # 限流和过载保护（见 app/core/ratelimit.py），路由类别：auth / write / read / analytics / batch
+    # POST /batch 本身（batch）不设令牌桶，其中每个子请求按自己的类别取令牌、计入并发
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMITS: Dict[str, Tuple[float, int]] = {  # 每个用户每个类别的令牌桶：(每秒补充令牌数, 桶容量)
+        "auth": (0.2, 10),  # 未登录请求按客户端 IP 计
+        "write": (5.0, 30),
+        "read": (20.0, 100),
+        "analytics": (1.0, 10),
+    }
+    RATE_LIMIT_REDIS_URL: Optional[str] = None  # 配置后各 worker 共享令牌桶，否则每个进程各自计数
+    MAX_IN_FLIGHT: int = 256  # 每个进程同时处理的 API 请求上限，超出直接返回 503
+    CONCURRENCY_LIMITS: Dict[str, int] = {"analytics": 16}  # 按类别的并发上限（每个进程）
+    STATEMENT_TIMEOUTS: Dict[str, int] = {  # 按类别的 PostgreSQL statement_timeout（毫秒）
+        "auth": 2000,
+        "write": 5000,
+        "read": 5000,
+        "analytics": 30000,
+        "batch": 5000,
+    }
+    
+    # 并发相同读请求合并（见 app/core/singleflight.py）
+    SINGLE_FLIGHT_ENABLED: bool = True
+    SINGLE_FLIGHT_TIMEOUT_SECONDS: float = 10.0  # 等待进行中的调用超过这么久时改为自行查询
+    
+    # 批量接口（POST /batch）
+    BATCH_MAX_OPERATIONS: int = 20  # 一次批量请求最多包含的子请求数
     
     # LLM设置
     APPL_API_KEY: Optional[str] = None
@@ -22,7 +135,7 @@ class Settings(BaseSettings):
     @property
     def get_database_url(self) -> str:
         """构建数据库连接URL"""
-        return f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_SERVER}/{self.POSTGRES_DB}"
+        return f"postgresql+{self.POSTGRES_DRIVER}://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_SERVER}/{self.POSTGRES_DB}"
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,36 @@
+import hashlib
+from typing import Any
+
+from fastapi import Request, Response
+
+
+def make_etag(*parts: Any) -> str:
+    """由作用域和版本信息生成弱 ETag
+
+    CompressionMiddleware 对同一个 ETag 发送原文、gzip、br 等不同字节的响应体，
+    只能作为弱校验器（RFC 9110 §8.8.3）。
+    """
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """判断请求的 If-None-Match 是否命中当前 ETag"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # GET 条件请求按弱比较处理，两边都忽略 W/ 前缀
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    """返回 304，不构建任何响应模型"""
+    return Response(status_code=304, headers=etag_headers(etag))
+
+
+def etag_headers(etag: str) -> dict:
+    """带 ETag 的响应头：允许客户端缓存，但每次使用前需要重新验证"""
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
@@ -0,0 +1,233 @@
+import contextvars
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+import orjson
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.logger import setup_logger
+from app.core.security import token_subject
+
+logger = setup_logger("ratelimit")
+
+try:
+    import redis
+except ImportError:  # redis 为可选依赖，只有配置了共享限流后端时才需要
+    redis = None
+
+ROUTE_CLASSES = ("auth", "write", "read", "analytics", "batch")
+
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+# 扫描范围大、计算量大的只读接口
+ANALYTICS_PATHS = re.compile(
+    r"/analytics/|/timeline/summary$|/long-term/analytics$|/graph$|/progress$"
+)
+
+RATE_LIMITED = metrics.counter("rate_limited_total", "超过令牌桶限额返回 429 的请求数", ["route_class"])
+SHED = metrics.counter("load_shed_total", "超过并发上限直接返回 503 的请求数", ["route_class"])
+IN_FLIGHT = metrics.gauge("requests_in_flight", "正在处理的 API 请求数", ["route_class"])
+
+# 当前请求的路由类别，数据库会话开启事务时据此设置 statement_timeout
+current_route_class: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("route_class", default=None)
+
+
+def route_class(method: str, path: str) -> str:
+    if path.startswith(f"{settings.API_V1_STR}/auth/"):
+        return "auth"
+    if path == f"{settings.API_V1_STR}/batch":
+        # 批量请求本身只受并发上限约束，每个子请求按自己的类别另行限流（见 POST /batch）
+        return "batch"
+    if method not in SAFE_METHODS:
+        return "write"
+    if ANALYTICS_PATHS.search(path):
+        return "analytics"
+    return "read"
+
+
+class LocalBuckets:
+    """进程内令牌桶：key -> (令牌数, 上次更新时间)，LRU 限制条目数
+
+    多 worker 部署时每个进程各自计数，实际限额约为配置值 × 进程数。
+    """
+
+    def __init__(self, max_entries: int = 100000) -> None:
+        self.max_entries = max_entries
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rate: float, burst: int) -> float:
+        """取一个令牌：成功返回 0，否则返回需要等待的秒数"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_entries:
+                self._buckets.popitem(last=False)
+        return wait
+
+
+# 令牌桶的原子更新，时间取 Redis 服务器时钟，避免各 worker 时钟偏差
+TAKE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+return tostring(wait)
+"""
+
+
+class SharedBuckets:
+    """多个 worker 共享的令牌桶（Redis 哈希 + Lua 脚本）；Redis 不可用时放行"""
+
+    def __init__(self, client, prefix: str = "rl:") -> None:
+        self.client = client
+        self.prefix = prefix
+        self._take = client.register_script(TAKE_SCRIPT)
+
+    def take(self, key: str, rate: float, burst: int) -> float:
+        try:
+            return float(self._take(keys=[self.prefix + key], args=[rate, burst]))
+        except Exception as e:
+            logger.warning(f"限流后端不可用，放行请求: {str(e)}")
+            return 0.0
+
+
+def build_buckets():
+    """配置了 RATE_LIMIT_REDIS_URL 时使用共享后端，否则使用进程内令牌桶"""
+    url = settings.RATE_LIMIT_REDIS_URL
+    if not url:
+        return LocalBuckets()
+    if redis is None:
+        logger.warning("未安装 redis，限流使用进程内令牌桶")
+        return LocalBuckets()
+    return SharedBuckets(redis.Redis.from_url(url))
+
+
+def _json_response(status: int, detail: str, retry_after: float):
+    headers = [
+        (b"content-type", b"application/json"),
+        (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+    ]
+    return status, headers, orjson.dumps({"detail": detail})
+
+
+class RateLimitMiddleware:
+    """API 请求的限流和过载保护
+
+    1. 按 (用户, 路由类别) 的令牌桶限流，用户取自令牌的 sub（即 get_current_user 解析的用户），
+       未登录的请求（注册、登录）按客户端 IP 计；超过限额返回 429 和 Retry-After。
+    2. 本进程正在处理的请求数超过 MAX_IN_FLIGHT 或该类别的 CONCURRENCY_LIMITS 时直接返回 503，
+       不排队，避免慢请求堆积拖垮整个 worker。
+    3. 记录当前请求的路由类别，数据库事务开始时设置对应的 statement_timeout。
+
+    中间件实例放在 scope["rate_limiter"] 中，POST /batch 用它对每个子请求执行同样的检查。
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        limits: Optional[Dict[str, Tuple[float, int]]] = None,
+        concurrency: Optional[Dict[str, int]] = None,
+        max_in_flight: Optional[int] = None,
+        buckets=None,
+    ) -> None:
+        self.app = app
+        self.limits = settings.RATE_LIMITS if limits is None else limits
+        self.concurrency = settings.CONCURRENCY_LIMITS if concurrency is None else concurrency
+        self.max_in_flight = settings.MAX_IN_FLIGHT if max_in_flight is None else max_in_flight
+        self.buckets = buckets or build_buckets()
+        self.in_flight = {name: 0 for name in ROUTE_CLASSES}
+        self.total_in_flight = 0
+        for name in ROUTE_CLASSES:
+            IN_FLIGHT.set_function(lambda name=name: self.in_flight[name], name)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not scope["path"].startswith(settings.API_V1_STR):
+            await self.app(scope, receive, send)
+            return
+
+        name = route_class(scope["method"], scope["path"])
+        rejected = self.admit(scope, name)
+        if rejected is not None:
+            status, headers, body = rejected
+            await send({"type": "http.response.start", "status": status, "headers": headers})
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        scope["rate_limiter"] = self
+        with self.track(name):
+            await self.app(scope, receive, send)
+
+    @contextmanager
+    def track(self, name: str):
+        """计入正在处理的请求数，并记录当前请求的路由类别"""
+        self.in_flight[name] += 1
+        self.total_in_flight += 1
+        token = current_route_class.set(name)
+        try:
+            yield
+        finally:
+            current_route_class.reset(token)
+            self.in_flight[name] -= 1
+            self.total_in_flight -= 1
+
+    def admit(self, scope: Scope, name: str):
+        """放行返回 None，否则返回 (状态码, 响应头, 响应体)"""
+        if self.total_in_flight >= self.max_in_flight or self.in_flight[name] >= self.concurrency.get(name, math.inf):
+            SHED.inc(name)
+            return _json_response(503, "Server is busy, please retry shortly", 1)
+
+        limit = self.limits.get(name)
+        if not limit:
+            return None
+        subject = token_subject(Headers(scope=scope).get("authorization"))
+        if subject is None:
+            client = scope.get("client")
+            subject = f"ip:{client[0] if client else '-'}"
+        wait = self.buckets.take(f"{subject}:{name}", *limit)
+        if wait > 0:
+            RATE_LIMITED.inc(name)
+            return _json_response(429, "Too many requests", wait)
+        return None
+
+
+@event.listens_for(Session, "after_begin")
+def set_statement_timeout(session, transaction, connection) -> None:
+    """API 请求中的事务按路由类别设置 statement_timeout，超时的查询由 PostgreSQL 取消
+
+    SET LOCAL 只在当前事务内有效，与 PgBouncer 事务池模式兼容；后台任务不受影响。
+    """
+    name = current_route_class.get()
+    timeout = settings.STATEMENT_TIMEOUTS.get(name) if name else None
+    if timeout:
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout)}")
@@ -0,0 +1,105 @@
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+from app.core import metrics
+from app.core.config import settings
+
+
+def utc_timestamp(value: datetime) -> float:
+    """数据库中的 naive UTC 时间 -> Unix 时间戳"""
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+class BloomFilter:
+    """布隆过滤器：不在集合中的 key 一定判断为不在，在集合中的 key 有 error_rate 的概率误判"""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001) -> None:
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        # 双重哈希：一次摘要拆成两个 64 位整数，第 i 个位置为 h1 + i * h2
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+REVOKED = metrics.gauge("revoked_tokens", "内存作废列表中未过期的记录数")
+
+
+class RevocationList:
+    """访问令牌的作废列表：布隆过滤器 + 最近作废记录
+
+    访问令牌有效期很短，只需记住有效期内的作废记录：key -> (作废时间, 过期时间)。
+    绝大多数请求的令牌不在过滤器中，一次哈希即可放行；过滤器命中时再查最近记录排除误判。
+    key 为令牌的 jti，或 user:<用户 ID>（作废该用户在作废时间之前签发的所有令牌）。
+
+    记录来自 revoked_tokens 表：本进程作废时立即加入，其他进程的作废由定期同步加入。
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self._recent: Dict[str, Tuple[float, float]] = {}
+        self._bloom = BloomFilter(capacity)
+        self._lock = threading.Lock()
+        # 已同步到的最大作废时间（数据库时间），下次同步从这里之前一点开始
+        self.synced_until: Optional[datetime] = None
+        REVOKED.set_function(lambda: len(self._recent))
+
+    def add(self, key: str, revoked_at: datetime, expires_at: datetime) -> None:
+        entry = (utc_timestamp(revoked_at), utc_timestamp(expires_at))
+        with self._lock:
+            current = self._recent.get(key)
+            if current is None or current[0] < entry[0]:
+                self._recent[key] = entry
+            self._bloom.add(key)
+            if len(self._recent) > self.capacity:
+                self._prune()
+
+    def is_revoked(self, jti: Optional[str], user_id: str, issued_at: float) -> bool:
+        """令牌被单独作废，或签发时间早于该用户的整体作废时间"""
+        bloom = self._bloom
+        if jti and jti in bloom and jti in self._recent:
+            return True
+        key = f"user:{user_id}"
+        if key in bloom:
+            entry = self._recent.get(key)
+            if entry is not None and issued_at <= entry[0]:
+                return True
+        return False
+
+    def prune(self) -> None:
+        with self._lock:
+            self._prune()
+
+    def _prune(self) -> None:
+        """去掉已过期的记录并重建过滤器（布隆过滤器不能删除）"""
+        now = time.time()
+        recent = {key: entry for key, entry in self._recent.items() if entry[1] > now}
+        if len(recent) == len(self._recent) and len(recent) <= self.capacity:
+            return
+        bloom = BloomFilter(max(self.capacity, len(recent)))
+        for key in recent:
+            bloom.add(key)
+        # 先换记录再换过滤器：无锁读取时过滤器始终覆盖记录中的 key
+        self._recent = recent
+        self._bloom = bloom
+
+    def __len__(self) -> int:
+        return len(self._recent)
+
+
+revocations = RevocationList(settings.REVOCATION_FILTER_CAPACITY)
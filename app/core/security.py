@@ -1,3 +1,5 @@
+import uuid
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
@@ -24,4 +26,26 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 def get_password_hash(password: str) -> str:
     """获取密码哈希值"""
-    return pwd_context.hash(password) 
\ No newline at end of file
+    return pwd_context.hash(password)
+
+def token_subject(authorization: Optional[str]) -> Optional[str]:
+    """从 Authorization: Bearer 令牌中取出用户（sub），无效令牌返回 None"""
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        return jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"]).get("sub")
+    except JWTError:
+        return None
+
+
+@dataclass(frozen=True)
+class CurrentUser:
+    """访问令牌中携带的当前用户（get_current_user 的返回值），校验令牌时不查库"""
+    id: uuid.UUID
+    email: str
+    is_active: bool = True
+    is_superuser: bool = False
+    jti: Optional[str] = None
+    issued_at: float = 0.0
+    expires_at: Optional[datetime] = None
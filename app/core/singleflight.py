@@ -0,0 +1,95 @@
+import asyncio
+from typing import Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+from sqlalchemy.orm import Session
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.logger import setup_logger
+
+logger = setup_logger("singleflight")
+
+T = TypeVar("T")
+
+CALLS = metrics.counter("singleflight_calls_total", "合并层收到的读调用次数", ["name"])
+EXECUTIONS = metrics.counter("singleflight_executions_total", "实际执行（访问数据库）的次数", ["name"])
+TIMEOUTS = metrics.counter(
+    "singleflight_timeouts_total", "等待进行中的调用超时、改为自行执行的次数", ["name"]
+)
+
+
+class SingleFlight:
+    """并发的相同读调用合并：同一 key 同时只执行一次，其余调用者等待并共享结果（或异常）
+
+    - 同步的查询函数在线程池中执行，事件循环在等待期间可以接收后续的相同请求；
+      查询用 query() 在独立会话中执行；
+    - 执行放在独立的任务中，发起请求被取消（客户端断开）不会影响其他等待者；
+    - 等待超过 timeout 的调用者放弃合并、自行执行，同时把该 key 让给新的调用；
+    - key 的第一个元素为用户 ID，用户写入后 forget() 使随后的读不再加入写入前开始的调用。
+
+    只合并进行中的调用，不缓存结果。
+    """
+
+    def __init__(self, timeout: float, enabled: bool = True) -> None:
+        self.timeout = timeout
+        self.enabled = enabled
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+
+    async def run(self, key: Tuple, func: Callable[[], T], timeout: Optional[float] = None) -> T:
+        name = key[1] if len(key) > 1 else ""
+        CALLS.inc(name)
+        if not self.enabled:
+            EXECUTIONS.inc(name)
+            return await asyncio.to_thread(func)
+
+        task = self._calls.get(key)
+        if task is None:
+            EXECUTIONS.inc(name)
+            task = asyncio.ensure_future(asyncio.to_thread(func))
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._done(key, done))
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), timeout or self.timeout)
+        except asyncio.TimeoutError:
+            TIMEOUTS.inc(name)
+            logger.warning(f"等待进行中的调用超时，改为自行执行: {name}")
+            if self._calls.get(key) is task:
+                self._calls.pop(key, None)
+            EXECUTIONS.inc(name)
+            return await asyncio.to_thread(func)
+
+    async def query(
+        self, key: Tuple, db: Session, func: Callable[[Session], T], timeout: Optional[float] = None
+    ) -> T:
+        """合并只读查询：func(session) 在绑定同一个库的独立会话中执行
+
+        不使用发起请求的会话：该请求被取消时它的会话会被关闭，而查询仍在为其他等待者执行。
+        key 中自动加入数据库，主库 / 副本 / 不同分片上的请求不会合并。
+        """
+        bind = db.get_bind()
+
+        def call() -> T:
+            with Session(bind=bind, autoflush=False) as session:
+                return func(session)
+
+        return await self.run((key[0], key[1], bind, *key[2:]), call, timeout)
+
+    def _done(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            self._calls.pop(key, None)
+        # 所有等待者都已离开时，取出异常避免 "exception was never retrieved"
+        if not task.cancelled():
+            task.exception()
+
+    def forget(self, user_id) -> None:
+        """用户写入后调用：之后的读调用不再加入写入前开始的调用"""
+        # 后台任务线程中也会调用，先取快照
+        for key in list(self._calls):
+            if key[0] == user_id:
+                self._calls.pop(key, None)
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+
+single_flight = SingleFlight(settings.SINGLE_FLIGHT_TIMEOUT_SECONDS, enabled=settings.SINGLE_FLIGHT_ENABLED)
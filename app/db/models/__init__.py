@@ -5,6 +5,10 @@ from .preset import PresetTimepoint
 from .dream import Dream
 from .progress import DreamProgress
 from .template import Template
+from .archive import MemoryArchive
+from .tag import Tag
+from .goal_progress import GoalProgress
+from .heatmap import HeatmapRollup
 
 __all__ = [
     "Base",
@@ -14,4 +18,8 @@ __all__ = [
     "Dream",
     "DreamProgress",
     "Template",
+    "MemoryArchive",
+    "Tag",
+    "GoalProgress",
+    "HeatmapRollup",
 ]
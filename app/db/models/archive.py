@@ -0,0 +1,23 @@
+from sqlalchemy import Column, DateTime, Enum, ForeignKey, Index, LargeBinary
+from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime
+from .base import Base
+from .enums import MemoryType
+
+
+class MemoryArchive(Base):
+    """冷数据归档：超过保留期的记忆整行压缩存放，只保留读取需要的键列
+
+    created_at / updated_at 保存原记忆的值，用于 ETag 版本计算。
+    """
+    __tablename__ = "memory_archive"
+    __table_args__ = (
+        Index("ix_memory_archive_user_start", "user_id", "start_time"),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    memory_type = Column(Enum(MemoryType), nullable=False, comment="记忆类型")
+    start_time = Column(DateTime, nullable=False, comment="活动开始时间")
+    payload = Column(LargeBinary, nullable=False, comment="zlib 压缩的整行 JSON")
+    archived_at = Column(DateTime, default=datetime.utcnow, comment="归档时间")
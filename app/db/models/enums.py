@@ -11,4 +11,9 @@ class CoreFocusType(enum.Enum):
     EXTERNAL_EXPECT = "EXTERNAL_EXPECT"  # 外部期待
     SELF_EXPECT = "SELF_EXPECT"         # 个人期待
     IMPORTANT = "IMPORTANT"             # 重要事项
-    LONG_TERM = "LONG_TERM"            # 长期目标 
\ No newline at end of file
+    LONG_TERM = "LONG_TERM"            # 长期目标 
+class JobStatus(enum.Enum):
+    QUEUED = "QUEUED"           # 等待执行（含等待重试）
+    RUNNING = "RUNNING"         # 已被某个 worker 领取
+    SUCCEEDED = "SUCCEEDED"     # 执行成功
+    FAILED = "FAILED"           # 重试次数用尽
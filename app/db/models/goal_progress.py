@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Float, DateTime, Text, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime
+import uuid
+from .base import Base
+
+class GoalProgress(Base):
+    """长期目标进度流水：只追加，每次更新进度记录一条
+
+    memories 是分区表（主键含 start_time），goal_id 无法建外键，由服务层保证一致。
+    """
+    __tablename__ = "goal_progress"
+    __table_args__ = (
+        Index("ix_goal_progress_goal_recorded", "goal_id", "recorded_at"),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    goal_id = Column(UUID(as_uuid=True), nullable=False, comment="长期目标（memories.id）")
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    value = Column(Float, nullable=False, comment="更新后的进度值")
+    delta = Column(Float, nullable=True, comment="相对上一次的变化")
+    note = Column(Text, nullable=True, comment="进度说明")
+    recorded_at = Column(DateTime, nullable=False, default=datetime.now, comment="记录时间")
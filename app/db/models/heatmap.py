@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, Date, Float, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID, ARRAY
+from .base import Base
+
+class HeatmapRollup(Base):
+    """活动热力图的按天汇总：某用户某标签某天每个小时的活动秒数
+
+    只汇总已结束的日期（见 HeatmapService），修改或删除历史记忆时删除对应日期的汇总。
+    """
+    __tablename__ = "heatmap_rollup"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True)
+    tag_id = Column(Integer, primary_key=True, comment="标签 ID，0 表示全部活动")
+    day = Column(Date, primary_key=True, comment="日期")
+    hours = Column(ARRAY(Float), nullable=False, comment="0~23 点每小时的活动秒数")
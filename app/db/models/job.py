@@ -0,0 +1,39 @@
+from sqlalchemy import BigInteger, Column, DateTime, Enum, Index, Integer, JSON, String, Text
+from .base import Base
+from .enums import JobStatus
+
+class Job(Base):
+    """后台任务队列：各 worker 用 SELECT ... FOR UPDATE SKIP LOCKED 领取任务（见 app/services/job_runner.py）
+
+    时间列均为 UTC。
+    """
+    __tablename__ = "jobs"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    job_type = Column(String(64), nullable=False, comment="任务类型，对应注册的处理函数")
+    payload = Column(JSON, default={}, comment="任务参数")
+    priority = Column(Integer, nullable=False, default=0, comment="优先级，数值越大越先执行")
+    status = Column(Enum(JobStatus), nullable=False, default=JobStatus.QUEUED)
+    attempts = Column(Integer, nullable=False, default=0, comment="已领取次数")
+    max_attempts = Column(Integer, nullable=False, default=3)
+    run_at = Column(DateTime, nullable=False, comment="最早执行时间（定时任务、重试退避）")
+    unique_key = Column(String, nullable=True, unique=True, comment="去重键，相同键的任务只入队一次")
+    locked_by = Column(String, nullable=True, comment="领取任务的 worker")
+    locked_at = Column(DateTime, nullable=True, comment="领取时间，执行期间由心跳刷新")
+    finished_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    result = Column(JSON, nullable=True, comment="处理函数的返回值（统计等）")
+
+
+# 领取任务：按类型取已到期的排队任务，priority 降序、run_at 升序
+Index(
+    "ix_jobs_dequeue",
+    Job.job_type, Job.priority.desc(), Job.run_at,
+    postgresql_where=Job.status == JobStatus.QUEUED,
+)
+# 回收失联 worker 的任务
+Index(
+    "ix_jobs_running_locked_at",
+    Job.locked_at,
+    postgresql_where=Job.status == JobStatus.RUNNING,
+)
@@ -1,26 +1,102 @@
-from sqlalchemy import Column, Text, ForeignKey, JSON, Table, String, Float, Enum, Time, Boolean, Date, DateTime, Integer
+from sqlalchemy import Column, LargeBinary, Text, ForeignKey, JSON, Table, String, Float, Enum, Time, Boolean, Date, DateTime, Integer, Index, DDL, event, text
 from sqlalchemy.dialects.postgresql import UUID, ARRAY
 # 暂时注释掉关系导入
 # from sqlalchemy.orm import relationship
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, deferred, validates
 import uuid
+from datetime import datetime
 from .base import Base
 from .enums import MemoryType, CoreFocusType
 from typing import Optional
 
-# 记忆关联的中间表 - 暂时注释掉
-# memory_relations = Table(
-#     'memory_relations',
-#     Base.metadata,
-#     Column('source_id', UUID(as_uuid=True), ForeignKey('memories.id'), primary_key=True),
-#     Column('target_id', UUID(as_uuid=True), ForeignKey('memories.id'), primary_key=True),
-#     Column('relation_type', String, nullable=False),
-#     Column('relation_score', Float, default=0.0)
-# )
+# 情绪词典：emotion_score 没有 valence 数值时，按正/负面情绪强度估算
+POSITIVE_EMOTIONS = {
+    "joy", "happy", "happiness", "calm", "excited", "gratitude", "love", "satisfaction",
+    "开心", "快乐", "平静", "兴奋", "感激", "满足", "喜悦",
+}
+NEGATIVE_EMOTIONS = {
+    "sad", "sadness", "anger", "angry", "fear", "anxiety", "stress", "disgust", "tired",
+    "悲伤", "难过", "生气", "愤怒", "恐惧", "焦虑", "压力", "疲惫",
+}
+
+
+def emotion_valence(score) -> Optional[float]:
+    """从情绪分析结果提取 [-1, 1] 的情绪效价，无法判断时返回 None
+
+    优先使用数值型的 valence 字段，否则按词典对各情绪强度加权。
+    alembic 迁移 f6b8d0e30037 中的 SQL 回填与此规则一致。
+    """
+    if not isinstance(score, dict):
+        return None
+    valence = score.get("valence")
+    if isinstance(valence, (int, float)) and not isinstance(valence, bool):
+        return max(-1.0, min(1.0, float(valence)))
+    positive = negative = 0.0
+    for name, value in score.items():
+        if not isinstance(value, (int, float)) or isinstance(value, bool) or value <= 0:
+            continue
+        if name.lower() in POSITIVE_EMOTIONS:
+            positive += value
+        elif name.lower() in NEGATIVE_EMOTIONS:
+            negative += value
+    if positive + negative == 0:
+        return None
+    return (positive - negative) / (positive + negative)
+
+
+# 记忆关联表：图的一条有向边。memories 按月分区、主键含 start_time，
+# source_id / target_id 无法建外键，由服务层保证一致；user_id 用于按用户缓存邻接表
+memory_relations = Table(
+    'memory_relations',
+    Base.metadata,
+    Column('source_id', UUID(as_uuid=True), primary_key=True),
+    Column('target_id', UUID(as_uuid=True), primary_key=True),
+    Column('relation_type', String, primary_key=True),
+    Column('relation_score', Float, default=0.0),
+    Column('user_id', UUID(as_uuid=True), ForeignKey('users.id'), nullable=False),
+    # 反向遍历（target -> source）；正向由主键 (source_id, ...) 覆盖
+    Index('ix_memory_relations_target', 'target_id', 'source_id'),
+    Index('ix_memory_relations_user', 'user_id'),
+)
+
 
 class Memory(Base):
-    """升级后的记忆模型，支持多种记录类型和结构化数据"""
+    """升级后的记忆模型，支持多种记录类型和结构化数据
+
+    表按 start_time 按月范围分区（见 app/db/partitions.py），
+    因此主键为 (id, start_time)，start_time 不允许为空。
+    """
     __tablename__ = "memories"
+    __table_args__ = (
+        # 按用户+类型+时间范围的查询和 ETag 版本查询（max(updated_at) + count）都走这个索引，
+        # INCLUDE updated_at 使版本查询可以只扫索引
+        Index(
+            "ix_memories_user_type_start",
+            "user_id", "memory_type", "start_time",
+            postgresql_include=["updated_at"],
+        ),
+        # 标签重叠查询（tag_ids && ...）走 intarray 的 GIN 索引
+        Index(
+            "ix_memories_tag_ids",
+            "tag_ids",
+            postgresql_using="gin",
+            postgresql_ops={"tag_ids": "gin__int_ops"},
+        ),
+        # 情绪趋势查询：按用户+时间范围只扫索引即可拿到效价
+        Index(
+            "ix_memories_user_start_emotion",
+            "user_id", "start_time",
+            postgresql_include=["emotion_valence"],
+            postgresql_where=text("emotion_valence IS NOT NULL"),
+        ),
+        # 进行中的活动：开始 / 结束活动、当前活动和遗留活动清理只扫这个很小的部分索引
+        Index(
+            "ix_memories_ongoing",
+            "user_id", "start_time",
+            postgresql_where=text("is_ongoing"),
+        ),
+        {"postgresql_partition_by": "RANGE (start_time)"},
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
@@ -29,6 +105,7 @@ class Memory(Base):
     memory_type = Column(Enum(MemoryType), nullable=False, comment="记忆类型")
     content = Column(Text, nullable=False, comment="主要内容")
     tags = Column(ARRAY(String), default=[], comment="标签数组")
+    tag_ids = Column(ARRAY(Integer), default=[], comment="标签 ID 数组（见 tags 表），用于标签重叠查询")
     
     # 时间轴相关字段
     timeline_time = Column(Time, nullable=True, comment="时间点")
@@ -37,21 +114,30 @@ class Memory(Base):
     # 核心关注点相关字段
     focus_type = Column(Enum(CoreFocusType), nullable=True, comment="核心关注点类型")
     
-    # 分析字段
-    emotion_score = Column(JSON, default={}, comment="情绪分析结果")
-    vector = Column(ARRAY(Float), nullable=True, comment="语义向量")
+    # 分析字段：体积大且只有分析场景使用，默认延迟加载
+    emotion_score = deferred(Column(JSON, default={}, comment="情绪分析结果"), group="analysis")
+    vector = deferred(Column(ARRAY(Float), nullable=True, comment="语义向量"), group="analysis")
+    # emotion_score 的类型化投影，写入 emotion_score 时自动同步，供趋势统计走索引
+    emotion_valence = Column(Float, nullable=True, comment="情绪效价 [-1, 1]")
     
     # 添加时间段相关字段
-    start_time = Column(DateTime, nullable=True, comment="活动开始时间")
+    # 分区键：非时间轴类记忆默认取创建时间。与应用中所有 start_time 一样为应用主机的本地时间（naive），
+    # 而 created_at / updated_at 为 UTC；迁移中从 created_at 补 start_time 时需换算（见 b2d4f6a80032）
+    start_time = Column(DateTime, primary_key=True, default=datetime.now, comment="活动开始时间")
     end_time = Column(DateTime, nullable=True, comment="活动结束时间")
     duration = Column(Float, nullable=True, comment="持续时间（秒）")
     is_ongoing = Column(Boolean, default=False, comment="是否正在进行")
     target_duration = Column(Float, nullable=True, comment="计划持续时间（秒）")
     completion_rate = Column(Float, nullable=True, comment="完成度")
+    completion_note = Column(Text, nullable=True, comment="完成备注")
+    
+    # 近似重复检测（见 app/services/dedupe_service.py）
+    content_signature = Column(LargeBinary, nullable=True, comment="内容的 MinHash 签名（64 个 uint32）")
+    duplicate_of = Column(UUID(as_uuid=True), nullable=True, comment="近似重复的原记忆 ID")
     
-    # 关联前后记忆
-    previous_memory_id = Column(UUID(as_uuid=True), ForeignKey("memories.id"), nullable=True)
-    next_memory_id = Column(UUID(as_uuid=True), ForeignKey("memories.id"), nullable=True)
+    # 关联前后记忆（分区表上 id 不再单独唯一，无法建立外键约束）
+    previous_memory_id = Column(UUID(as_uuid=True), nullable=True)
+    next_memory_id = Column(UUID(as_uuid=True), nullable=True)
     
     # 关联关系 - 暂时注释掉
     # user = relationship("User", back_populates="memories")
@@ -77,6 +163,11 @@ class Memory(Base):
     progress_type = Column(String, nullable=True, comment="进度类型：time/value/percentage")
     description = Column(Text, nullable=True, comment="详细描述")
 
+    @validates("emotion_score")
+    def _sync_emotion_valence(self, key, score):
+        self.emotion_valence = emotion_valence(score)
+        return score
+
     @classmethod
     async def create_from_text(cls, text: str, user_id: UUID, db: Session) -> "Memory":
         """从自由文本创建结构化记忆"""
@@ -107,4 +198,19 @@ class Memory(Base):
         """计算完成度（百分比）"""
         if self.duration and self.target_duration:
             return (self.duration / self.target_duration) * 100  # 直接用秒计算
-        return None 
\ No newline at end of file
+        return None
+
+
+# create_all 建表时同时创建默认分区，兜底落在月分区之外的数据
+event.listen(
+    Memory.__table__,
+    "after_create",
+    DDL("CREATE TABLE IF NOT EXISTS memories_default PARTITION OF memories DEFAULT").execute_if(dialect="postgresql"),
+)
+
+# ix_memories_tag_ids 使用 intarray 的 gin__int_ops，建表前确保扩展已安装
+event.listen(
+    Memory.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS intarray").execute_if(dialect="postgresql"),
+)
@@ -0,0 +1,17 @@
+from sqlalchemy import Boolean, Column, ForeignKey, Index, String
+from sqlalchemy.dialects.postgresql import UUID
+from .base import Base
+
+class UserShard(Base):
+    """用户数据所在分片的目录，只在全局库中使用（见 app/db/shards.py）
+
+    没有目录记录的用户的数据在全局库中（启用分片前注册的用户）。
+    """
+    __tablename__ = "user_shards"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True)
+    shard = Column(String(64), nullable=False, comment="分片名，对应 POSTGRES_SHARD_URLS 的键，global 为全局库")
+    moving = Column(Boolean, nullable=False, default=False, comment="正在迁移到其他分片，期间拒绝写请求")
+
+
+Index("ix_user_shards_shard", UserShard.shard)
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID
+from .base import Base
+
+class Tag(Base):
+    """按用户划分的标签字典，记忆中只保存标签的整数 ID（Memory.tag_ids）"""
+    __tablename__ = "tags"
+    __table_args__ = (
+        UniqueConstraint("user_id", "name", name="uq_tags_user_name"),
+        # text_pattern_ops 使 name LIKE 'prefix%' 可以走索引（标签联想）
+        Index(
+            "ix_tags_user_name_prefix",
+            "user_id", "name",
+            postgresql_ops={"name": "text_pattern_ops"},
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    name = Column(String, nullable=False, comment="标签名")
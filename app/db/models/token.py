@@ -0,0 +1,39 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Index, String
+from sqlalchemy.dialects.postgresql import UUID
+import uuid
+from .base import Base
+
+class RefreshToken(Base):
+    """刷新令牌，只保存 SHA-256 摘要（见 app/services/auth_service.py），时间列均为 UTC
+
+    每次使用后轮换：旧令牌标记作废，同一令牌族（一次登录）中签发新令牌；
+    已作废的令牌再次出现时作废整个令牌族。
+    """
+    __tablename__ = "refresh_tokens"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    token_hash = Column(String(64), nullable=False, unique=True, comment="令牌的 SHA-256 摘要（十六进制）")
+    family_id = Column(UUID(as_uuid=True), nullable=False, comment="同一次登录轮换出的令牌共用")
+    expires_at = Column(DateTime, nullable=False)
+    revoked_at = Column(DateTime, nullable=True, comment="轮换或登出的时间")
+
+
+Index("ix_refresh_tokens_family_id", RefreshToken.family_id)
+Index("ix_refresh_tokens_user_id", RefreshToken.user_id)
+
+
+class RevokedToken(Base):
+    """作废的访问令牌，各进程定期同步到内存中的作废列表（见 app/core/revocation.py）
+
+    key 为访问令牌的 jti，或 user:<用户 ID>（该用户此前签发的所有访问令牌）。
+    访问令牌过期后记录不再需要，由定时任务清理。
+    """
+    __tablename__ = "revoked_tokens"
+
+    key = Column(String(64), primary_key=True)
+    revoked_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False, comment="对应访问令牌的最晚过期时间")
+
+
+Index("ix_revoked_tokens_revoked_at", RevokedToken.revoked_at)
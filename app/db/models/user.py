@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean
+from sqlalchemy import Column, String, Boolean, Float
 from sqlalchemy.dialects.postgresql import UUID
 # 暂时注释掉，等基础功能完成后再启用
 # from sqlalchemy.orm import relationship
@@ -14,6 +14,11 @@ class User(Base):
     username = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
     is_active = Column(Boolean(), default=True)
+    is_superuser = Column(Boolean(), default=False, comment="管理员，可访问 /admin 接口")
+    
+    # 遗留活动清理规则（见 app/services/sweeper_service.py），为空时取全局默认值
+    ongoing_max_hours = Column(Float, nullable=True, comment="进行中活动的最长时长（小时）")
+    ongoing_sweep_mode = Column(String, nullable=True, comment="遗留活动的结束规则：max_duration / next_start")
 
     # 关联关系 - 暂时注释掉，等基础认证功能完成后再启用
     # memories = relationship("Memory", back_populates="user", lazy="dynamic")
@@ -0,0 +1,100 @@
+from datetime import date
+from typing import List
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.core.logger import setup_logger
+
+logger = setup_logger("partitions")
+
+PARTITIONED_TABLE = "memories"
+DEFAULT_PARTITION = "memories_default"
+
+
+def add_months(month: date, months: int) -> date:
+    """返回 month 之后第 months 个月的 1 号"""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    """月分区表名，如 memories_y2024m01"""
+    return f"{PARTITIONED_TABLE}_y{month.year}m{month.month:02d}"
+
+
+def is_partitioned(conn: Connection) -> bool:
+    """memories 是否已经是分区表"""
+    return bool(conn.execute(
+        text("SELECT relkind = 'p' FROM pg_class WHERE relname = :table"),
+        {"table": PARTITIONED_TABLE}
+    ).scalar())
+
+
+def existing_partitions(conn: Connection) -> set:
+    return set(conn.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "WHERE parent.relname = :table"
+        ),
+        {"table": PARTITIONED_TABLE}
+    ).scalars())
+
+
+def create_month_partition(conn: Connection, month: date) -> None:
+    """创建一个月分区
+
+    默认分区里如果已有该月的数据，PostgreSQL 不允许直接创建，
+    需要先建独立表、把数据从默认分区搬过去，再 ATTACH。
+    """
+    name = partition_name(month)
+    lower, upper = month.isoformat(), add_months(month, 1).isoformat()
+    stray = conn.execute(
+        text(
+            f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} "
+            "WHERE start_time >= :lower AND start_time < :upper)"
+        ),
+        {"lower": lower, "upper": upper}
+    ).scalar()
+
+    if not stray:
+        conn.execute(text(
+            f"CREATE TABLE {name} PARTITION OF {PARTITIONED_TABLE} "
+            f"FOR VALUES FROM ('{lower}') TO ('{upper}')"
+        ))
+        return
+
+    logger.warning(f"默认分区中有 {month:%Y-%m} 的数据，迁移到新分区 {name}")
+    conn.execute(text(f"CREATE TABLE {name} (LIKE {PARTITIONED_TABLE} INCLUDING DEFAULTS)"))
+    conn.execute(
+        text(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+            "WHERE start_time >= :lower AND start_time < :upper RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved"
+        ),
+        {"lower": lower, "upper": upper}
+    )
+    conn.execute(text(
+        f"ALTER TABLE {PARTITIONED_TABLE} ATTACH PARTITION {name} "
+        f"FOR VALUES FROM ('{lower}') TO ('{upper}')"
+    ))
+
+
+def ensure_partitions(conn: Connection, start: date, months_ahead: int) -> List[str]:
+    """确保 start 所在月及之后 months_ahead 个月的分区都存在，返回新建的分区名"""
+    # 多个 worker 同时启动时串行化，避免重复建表
+    conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('memories_partitions'))"))
+    existing = existing_partitions(conn)
+    created = []
+    month = start.replace(day=1)
+    for _ in range(months_ahead + 1):
+        name = partition_name(month)
+        if name not in existing:
+            create_month_partition(conn, month)
+            created.append(name)
+        month = add_months(month, 1)
+    if created:
+        logger.info(f"新建分区: {', '.join(created)}")
+    return created
@@ -0,0 +1,232 @@
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+import sqlalchemy as sa
+from fastapi import Depends, Request
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.logger import setup_logger
+from app.core.security import CurrentUser, token_subject
+from app.api.deps import get_current_user
+from app.db.session import SessionLocal, get_db, make_engine
+from app.db.shards import GLOBAL_SHARD, shard_router
+
+logger = setup_logger("replicas")
+
+try:
+    import redis
+except ImportError:  # redis 为可选依赖，只有配置了共享缓存时才需要
+    redis = None
+
+# 只读请求的方法，其余方法成功后把用户钉在主库上
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+# 复制延迟：WAL 已全部回放时为 0，否则为距最后一次回放的事务的时间
+LAG_SQL = sa.text(
+    "SELECT pg_is_in_recovery() AS in_recovery, "
+    "CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE extract(epoch FROM now() - pg_last_xact_replay_timestamp()) END AS lag"
+)
+
+
+class Replica:
+    """一个只读副本：引擎、会话工厂和最近一次健康检查的结果"""
+
+    def __init__(self, url: str) -> None:
+        self.url = url
+        self.engine = make_engine(
+            url, name=make_url(url).host or url, connect_timeout=settings.REPLICA_CONNECT_TIMEOUT
+        )
+        self.session_factory = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        # 首次健康检查通过前不接收读请求
+        self.healthy = False
+        self.lag: Optional[float] = None
+        self.checked_at = 0.0
+        self.reads = 0
+
+    @property
+    def host(self) -> str:
+        return self.engine.url.host or ""
+
+    def check(self) -> bool:
+        """检查副本可用且复制延迟不超过 REPLICA_MAX_LAG_SECONDS"""
+        self.checked_at = time.monotonic()
+        try:
+            with self.engine.connect() as conn:
+                row = conn.execute(LAG_SQL).first()
+            self.lag = float(row.lag or 0) if row.in_recovery else 0.0
+            healthy = self.lag <= settings.REPLICA_MAX_LAG_SECONDS
+        except Exception as e:
+            logger.warning(f"副本 {self.host} 健康检查失败: {str(e)}")
+            self.lag = None
+            healthy = False
+        if healthy != self.healthy:
+            logger.warning(f"副本 {self.host} {'恢复' if healthy else '摘除'}，延迟 {self.lag}")
+        self.healthy = healthy
+        return healthy
+
+
+class ReplicaRouter:
+    """只读会话的路由：健康副本之间轮询，没有健康副本或用户刚写过时走主库"""
+
+    def __init__(self, urls: List[str]) -> None:
+        self.replicas = [Replica(url) for url in urls]
+        self._next = itertools.count()
+        self._lock = threading.Lock()
+        self.primary_reads = 0
+        self.pinned_reads = 0
+        self.fallback_reads = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    def pick(self) -> Optional[Replica]:
+        """按轮询顺序返回下一个健康副本；健康检查结果过期的副本先检查一次"""
+        count = len(self.replicas)
+        start = next(self._next)
+        for offset in range(count):
+            replica = self.replicas[(start + offset) % count]
+            if time.monotonic() - replica.checked_at > settings.REPLICA_HEALTH_CHECK_SECONDS:
+                # 同一时刻只让一个线程做检查，其他线程沿用上次结果
+                if self._lock.acquire(blocking=False):
+                    try:
+                        replica.check()
+                    finally:
+                        self._lock.release()
+            if replica.healthy:
+                return replica
+        return None
+
+    def session(self, pinned: bool = False):
+        """只读会话：pinned 为真（读自己的写）时走主库"""
+        if pinned:
+            self.pinned_reads += 1
+            return SessionLocal()
+        replica = self.pick() if self.enabled else None
+        if replica is None:
+            if self.enabled:
+                self.fallback_reads += 1
+            else:
+                self.primary_reads += 1
+            return SessionLocal()
+        replica.reads += 1
+        return replica.session_factory()
+
+    def stats(self) -> dict:
+        replica_reads = sum(replica.reads for replica in self.replicas)
+        total = replica_reads + self.primary_reads + self.pinned_reads + self.fallback_reads
+        return {
+            "replica_reads": replica_reads,
+            "primary_reads": self.primary_reads,
+            "pinned_reads": self.pinned_reads,
+            "fallback_reads": self.fallback_reads,
+            "offload": replica_reads / total if total else 0.0,
+            "replicas": [
+                {"host": replica.host, "healthy": replica.healthy, "lag": replica.lag, "reads": replica.reads}
+                for replica in self.replicas
+            ],
+        }
+
+
+class PrimaryPins:
+    """读自己的写：用户写入成功后 REPLICA_STICKY_SECONDS 秒内的只读请求走主库
+
+    配置了 CACHE_REDIS_URL 时记录在 Redis 中，多个进程共享；否则只在本进程内有效。
+    """
+
+    def __init__(self, seconds: float, max_entries: int = 100000) -> None:
+        self.seconds = seconds
+        self.max_entries = max_entries
+        self._local: "OrderedDict[str, float]" = OrderedDict()
+        self._client = None
+        url = settings.CACHE_REDIS_URL
+        if url and url != "memory://":
+            if redis is None:
+                logger.warning("未安装 redis，读自己的写只在本进程内生效")
+            else:
+                self._client = redis.Redis.from_url(url)
+
+    def pin(self, subject: str) -> None:
+        if self._client is not None:
+            self._client.set(f"pin:{subject}", 1, px=int(self.seconds * 1000))
+            return
+        self._local[subject] = time.monotonic() + self.seconds
+        self._local.move_to_end(subject)
+        while len(self._local) > self.max_entries:
+            self._local.popitem(last=False)
+
+    def is_pinned(self, subject: str) -> bool:
+        if self._client is not None:
+            return bool(self._client.exists(f"pin:{subject}"))
+        until = self._local.get(subject)
+        return until is not None and until > time.monotonic()
+
+
+replica_router = ReplicaRouter(settings.POSTGRES_REPLICA_URLS)
+primary_pins = PrimaryPins(settings.REPLICA_STICKY_SECONDS)
+
+
+def get_read_db(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """只读接口的数据库会话依赖项：配置了副本时路由到副本，用户刚写过时走主库
+
+    只能用于不写库的接口。启用分片时，数据在分片中的用户直接读其分片（副本只对应全局库）。
+    POST /batch 的子请求使用批量请求预先选定的会话。
+    """
+    batch = getattr(request.state, "batch", None)
+    if batch is not None:
+        yield batch.read_db
+        return
+    if shard_router.enabled:
+        shard, _ = shard_router.locate(db, current_user.id)
+        if shard != GLOBAL_SHARD:
+            user_db = shard_router.shards[shard].session_factory()
+            try:
+                yield user_db
+            finally:
+                user_db.close()
+            return
+    pinned = replica_router.enabled and primary_pins.is_pinned(current_user.email)
+    read_db = replica_router.session(pinned=pinned)
+    try:
+        yield read_db
+    finally:
+        read_db.close()
+
+
+class ReadYourWritesMiddleware:
+    """写请求成功（状态码 < 400）后把该用户钉在主库上 REPLICA_STICKY_SECONDS 秒"""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # POST /batch 由批量接口在写操作成功后自行钉住
+        if (
+            scope["type"] != "http"
+            or scope["method"] in SAFE_METHODS
+            or scope["path"] == f"{settings.API_V1_STR}/batch"
+            or not replica_router.enabled
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        subject = token_subject(Headers(scope=scope).get("authorization"))
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and subject and message["status"] < 400:
+                primary_pins.pin(subject)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,167 @@
+import bisect
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Tuple
+from uuid import UUID
+
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.config import settings
+from app.core.logger import setup_logger
+from app.db.models.shard import UserShard
+from app.db.models.user import User
+from app.db.session import engine, make_engine
+
+logger = setup_logger("shards")
+
+# 全局库：users、user_shards、jobs 等全局表，同时存放未分配分片的用户（启用分片前注册的用户）的数据
+GLOBAL_SHARD = "global"
+
+# 分片上 users 副本保存的列：外键只需要 id，按用户规则的查询（如遗留活动清理）读取其余几列。
+# 邮箱、用户名、密码哈希和管理员标记只保存在全局库，分片上这几列可空（见迁移 c5e7f9b20046）
+SHARD_USER_COLUMNS = ("id", "is_active", "ongoing_max_hours", "ongoing_sweep_mode")
+
+# 各库 tags.id 序列的步长：每个库取不同的余数，用户迁移时标签 ID（Memory.tag_ids 引用）不会冲突
+ID_STRIDE = 64
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], "big")
+
+
+class HashRing:
+    """一致性哈希环：每个分片放 vnodes 个虚拟节点，增加分片时只有约 1/N 的新用户改变去向"""
+
+    def __init__(self, names: List[str], vnodes: int) -> None:
+        points = sorted((_hash(f"{name}#{i}"), name) for name in names for i in range(vnodes))
+        self._keys = [point for point, _ in points]
+        self._names = [name for _, name in points]
+
+    def node_for(self, key: str) -> Optional[str]:
+        if not self._keys:
+            return None
+        index = bisect.bisect(self._keys, _hash(key)) % len(self._keys)
+        return self._names[index]
+
+
+class Shard:
+    def __init__(self, name: str, engine: Engine) -> None:
+        self.name = name
+        self.engine = engine
+        self.session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+class ShardDirectory:
+    """进程内缓存的分片目录 user_id -> (分片名, 是否迁移中)，LRU + TTL"""
+
+    def __init__(self, max_users: int, ttl: int) -> None:
+        self.max_users = max_users
+        self.ttl = ttl
+        self._users: "OrderedDict[UUID, Tuple[float, str, bool]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: UUID) -> Optional[Tuple[str, bool]]:
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._users[user_id]
+                return None
+            self._users.move_to_end(user_id)
+            return entry[1], entry[2]
+
+    def set(self, user_id: UUID, shard: str, moving: bool) -> None:
+        with self._lock:
+            self._users[user_id] = (time.monotonic() + self.ttl, shard, moving)
+            self._users.move_to_end(user_id)
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+
+    def invalidate(self, user_id: UUID) -> None:
+        with self._lock:
+            self._users.pop(user_id, None)
+
+
+class ShardRouter:
+    """按用户把数据路由到分片
+
+    新用户注册时按一致性哈希选定分片并写入目录 user_shards（全局库），之后以目录为准，
+    迁移用户（app/services/shard_service.py）只需修改目录。每个分片的 users 表保存其用户的精简副本
+    （SHARD_USER_COLUMNS，不含凭据），使外键和按用户规则的查询（如遗留活动清理）在分片内即可完成；
+    认证始终读全局库。
+    """
+
+    def __init__(self, urls: Dict[str, str], vnodes: int) -> None:
+        self.shards: Dict[str, Shard] = {GLOBAL_SHARD: Shard(GLOBAL_SHARD, engine)}
+        for name, url in urls.items():
+            self.shards[name] = Shard(name, make_engine(url, name=f"shard:{name}"))
+        self.ring = HashRing(list(urls), vnodes)
+        self.directory = ShardDirectory(settings.SHARD_DIRECTORY_MAX_USERS, settings.SHARD_DIRECTORY_TTL_SECONDS)
+
+    @property
+    def enabled(self) -> bool:
+        return len(self.shards) > 1
+
+    def locate(self, db: Session, user_id: UUID) -> Tuple[str, bool]:
+        """用户数据所在的分片和是否正在迁移，db 为全局库会话"""
+        cached = self.directory.get(user_id)
+        if cached is not None:
+            return cached
+        row = db.execute(
+            sa.select(UserShard.shard, UserShard.moving).where(UserShard.user_id == user_id)
+        ).first()
+        shard, moving = (row.shard, row.moving) if row else (GLOBAL_SHARD, False)
+        if shard not in self.shards:
+            logger.error(f"用户 {user_id} 所在分片 {shard} 未配置")
+            raise RuntimeError(f"Unknown shard: {shard}")
+        self.directory.set(user_id, shard, moving)
+        return shard, moving
+
+    def session(self, db: Session, user_id: UUID) -> Session:
+        """用户数据所在分片的新会话，由调用方关闭"""
+        shard, _ = self.locate(db, user_id)
+        return self.shards[shard].session_factory()
+
+    def assign(self, db: Session, user: User) -> str:
+        """为新注册的用户选定分片：先在分片中写入 users 副本，再写目录"""
+        shard = self.ring.node_for(str(user.id))
+        if shard is None:
+            return GLOBAL_SHARD
+        with self.shards[shard].session_factory() as target:
+            copy_user(target, user)
+            target.commit()
+        db.execute(insert(UserShard).values(user_id=user.id, shard=shard, moving=False).on_conflict_do_nothing())
+        db.commit()
+        self.directory.invalidate(user.id)
+        return shard
+
+    def each(self, db: Session) -> Iterator[Tuple[str, Session]]:
+        """依次产出每个库的会话，全局库直接使用传入的 db；用于按库执行的维护任务"""
+        for shard in self.shards.values():
+            if shard.name == GLOBAL_SHARD:
+                yield shard.name, db
+                continue
+            session = shard.session_factory()
+            try:
+                yield shard.name, session
+            finally:
+                session.close()
+
+
+def copy_user(target: Session, user: User) -> None:
+    """把 users 行的 SHARD_USER_COLUMNS 复制到分片（已存在时覆盖）"""
+    values = {name: getattr(user, name) for name in SHARD_USER_COLUMNS}
+    stmt = insert(User.__table__).values(**values)
+    target.execute(stmt.on_conflict_do_update(
+        index_elements=[User.id],
+        set_={name: stmt.excluded[name] for name in values if name != "id"},
+    ))
+
+
+shard_router = ShardRouter(settings.POSTGRES_SHARD_URLS, settings.SHARD_VNODES)
@@ -1,7 +1,27 @@
-from fastapi import FastAPI
+import asyncio
+from datetime import date
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
+from sqlalchemy.exc import OperationalError
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
+from app.core.compression import CompressionMiddleware
+from app.core.metrics import registry
+from app.core.ratelimit import RateLimitMiddleware
+from app.db.replicas import ReadYourWritesMiddleware
 from app.api.v1.api import api_router
+from app.core.logger import setup_logger
+from app.db.shards import shard_router
+from app.db.partitions import ensure_partitions, is_partitioned
+from app.services.auth_service import revocation_sync_loop
+from app.services.job_runner import job_runner
+# 导入即注册维护类任务和定时计划
+import app.services.maintenance_jobs  # noqa: F401
+
+logger = setup_logger("main")
+
+# PostgreSQL 的 query_canceled 错误码（statement_timeout 触发）
+QUERY_CANCELED = "57014"
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -17,5 +37,67 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 响应压缩：按 Accept-Encoding 协商 br/gzip
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+    brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+)
+
+# 读自己的写：写请求成功后该用户的只读请求暂时走主库
+app.add_middleware(ReadYourWritesMiddleware)
+
+# 限流和过载保护：最外层，被拒绝的请求不再经过其他中间件
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware)
+
+@app.exception_handler(OperationalError)
+async def handle_operational_error(request: Request, exc: OperationalError):
+    """查询超过 statement_timeout 被取消时返回 503，其他数据库错误返回 500"""
+    # psycopg2 为 pgcode，psycopg 3 为 sqlstate
+    if QUERY_CANCELED in (getattr(exc.orig, "pgcode", None), getattr(exc.orig, "sqlstate", None)):
+        logger.warning(f"查询超时被取消: {request.method} {request.url.path}")
+        return JSONResponse({"detail": "Query timed out"}, status_code=503, headers={"Retry-After": "1"})
+    logger.error(f"数据库错误: {str(exc)}", exc_info=exc)
+    return JSONResponse({"detail": "Internal Server Error"}, status_code=500)
+
 # API路由
-app.include_router(api_router, prefix=settings.API_V1_STR) 
\ No newline at end of file
+app.include_router(api_router, prefix=settings.API_V1_STR)
+
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    def read_metrics():
+        """Prometheus 抓取入口：连接池等指标（按进程，多 worker 时每个进程分别抓取）"""
+        return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.on_event("startup")
+def create_future_partitions():
+    """启动时确保各库 memories 未来几个月的分区已经存在"""
+    for shard in shard_router.shards.values():
+        try:
+            with shard.engine.begin() as conn:
+                if is_partitioned(conn):
+                    ensure_partitions(conn, date.today(), settings.MEMORY_PARTITION_MONTHS_AHEAD)
+        except Exception as e:
+            logger.error(f"创建分区失败（{shard.name}）: {str(e)}")
+
+@app.on_event("startup")
+async def start_revocation_sync():
+    """每个进程定期把 revoked_tokens 中的作废记录同步到内存中的作废列表"""
+    app.state.revocation_sync = asyncio.create_task(revocation_sync_loop())
+
+@app.on_event("startup")
+async def start_job_runner():
+    """在本进程内启动后台任务 worker，多个进程通过 jobs 表分担任务"""
+    if settings.JOB_RUNNER_ENABLED:
+        job_runner.start()
+
+@app.on_event("shutdown")
+async def stop_revocation_sync():
+    app.state.revocation_sync.cancel()
+
+@app.on_event("shutdown")
+async def stop_job_runner():
+    if settings.JOB_RUNNER_ENABLED:
+        await job_runner.stop()
@@ -0,0 +1,189 @@
+from datetime import datetime
+from typing import Dict, List, Sequence, Tuple
+from uuid import UUID
+
+import numpy as np
+import sqlalchemy as sa
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+from app.core.logger import setup_logger
+from app.db.models.memory import Memory, emotion_valence
+from app.services.archive_service import ArchiveService, ArchivedRow
+
+logger = setup_logger("analytics")
+
+# 趋势统计支持的时间桶（date_trunc 的单位）
+EMOTION_BUCKETS = ("day", "week", "month")
+TOP_TAGS = 3
+
+
+def truncate(values: np.ndarray, bucket: str) -> np.ndarray:
+    """datetime64 数组按 date_trunc 的规则取时间桶起点（week 从星期一开始）"""
+    days = values.astype("datetime64[D]")
+    if bucket == "week":
+        offset = (days.astype(np.int64) + 3) % 7  # 1970-01-01 是星期四
+        days = days - offset.astype("timedelta64[D]")
+    elif bucket == "month":
+        days = values.astype("datetime64[M]").astype("datetime64[D]")
+    return days.astype("datetime64[us]")
+
+
+def merge_stats(stats: Sequence, starts: np.ndarray, valences: np.ndarray, bucket: str) -> List[ArchivedRow]:
+    """把归档记录的效价并入热表的分桶统计（合并均值和样本方差）"""
+    hot_keys = np.array([row.bucket_start for row in stats], dtype="datetime64[us]")
+    keys, inverse = np.unique(np.concatenate([hot_keys, truncate(starts, bucket)]), return_inverse=True)
+    hot_index, cold_index = inverse[:len(stats)], inverse[len(stats):]
+
+    # 热表部分：count / mean / 离差平方和
+    n1 = np.zeros(len(keys))
+    mean1 = np.zeros(len(keys))
+    m2_1 = np.zeros(len(keys))
+    n1[hot_index] = [row.count for row in stats]
+    mean1[hot_index] = [row.mean for row in stats]
+    m2_1[hot_index] = [(row.variance or 0) * (row.count - 1) for row in stats]
+
+    # 归档部分按桶聚合
+    n2 = np.bincount(cold_index, minlength=len(keys)).astype(float)
+    mean2 = np.bincount(cold_index, weights=valences, minlength=len(keys)) / np.maximum(n2, 1)
+    m2_2 = np.bincount(cold_index, weights=(valences - mean2[cold_index]) ** 2, minlength=len(keys))
+
+    n = n1 + n2
+    delta = mean2 - mean1
+    mean = mean1 + delta * n2 / n
+    m2 = m2_1 + m2_2 + delta ** 2 * n1 * n2 / n
+    return [
+        ArchivedRow({
+            "bucket_start": start,
+            "count": int(count),
+            "mean": float(avg),
+            "variance": float(total / (count - 1)) if count > 1 else None,
+        })
+        for start, count, avg, total in zip(keys.tolist(), n.tolist(), mean.tolist(), m2.tolist())
+    ]
+
+
+def rank_tags(buckets: np.ndarray, tags: np.ndarray, counts: np.ndarray) -> Dict[datetime, List[str]]:
+    """每个时间桶内次数最多的 TOP_TAGS 个标签，次数相同按标签名排序"""
+    if not len(tags):
+        return {}
+    bucket_keys, bucket_index = np.unique(buckets, return_inverse=True)
+    tag_names, tag_index = np.unique(tags, return_inverse=True)
+    totals = np.bincount(bucket_index * len(tag_names) + tag_index, weights=counts)
+    pairs = np.flatnonzero(totals)
+    pair_bucket, pair_tag = np.divmod(pairs, len(tag_names))
+    # 标签编号与标签名同序，按 (桶, -次数, 标签名) 排序后每个桶取前 TOP_TAGS 个
+    order = np.lexsort((pair_tag, -totals[pairs], pair_bucket))
+    pair_bucket, pair_tag = pair_bucket[order], pair_tag[order]
+    first = np.searchsorted(pair_bucket, pair_bucket)
+    keep = np.arange(len(pair_bucket)) - first < TOP_TAGS
+    top_tags: Dict[datetime, List[str]] = {}
+    for index, tag in zip(pair_bucket[keep].tolist(), pair_tag[keep].tolist()):
+        top_tags.setdefault(bucket_keys[index].tolist(), []).append(tag_names[tag])
+    return top_tags
+
+
+class AnalyticsService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    async def get_emotion_trend(
+        self,
+        user_id: UUID,
+        start: datetime,
+        end: datetime,
+        bucket: str = "day"
+    ) -> Tuple[List[Row], Dict[datetime, List[str]]]:
+        """按时间桶统计情绪效价的均值、方差和最常见的标签
+
+        热表的聚合全部在 SQL 中完成：效价统计只扫 ix_memories_user_start_emotion 索引，
+        不需要把 emotion_score 的 JSON 取回 Python 逐行解析。
+        范围涉及归档数据时，归档记录的效价和标签用 NumPy 按桶并入。
+        """
+        # bucket 已在 EMOTION_BUCKETS 中校验，作为字面量写入 SQL，GROUP BY 才能识别为同一表达式
+        bucket_start = sa.func.date_trunc(
+            sa.literal_column(f"'{bucket}'"), Memory.start_time
+        ).label("bucket_start")
+        conditions = (
+            Memory.user_id == user_id,
+            Memory.start_time >= start,
+            Memory.start_time < end,
+            Memory.emotion_valence != None
+        )
+
+        stats = self.db.execute(
+            sa.select(
+                bucket_start,
+                sa.func.count().label("count"),
+                sa.func.avg(Memory.emotion_valence).label("mean"),
+                sa.func.var_samp(Memory.emotion_valence).label("variance")
+            ).where(*conditions).group_by(bucket_start).order_by(bucket_start)
+        ).all()
+
+        tagged = sa.select(
+            bucket_start, sa.func.unnest(Memory.tags).label("tag")
+        ).where(*conditions).subquery()
+
+        archive = ArchiveService(self.db)
+        archived = []
+        if archive.covers(start):
+            for row in archive.find_range(
+                user_id, None, start, end, columns=["start_time", "emotion_valence", "emotion_score", "tags"]
+            ):
+                # 加入 emotion_valence 列之前归档的记录没有回填，按同样的规则从 emotion_score 计算
+                if row.emotion_valence is None:
+                    row._mapping["emotion_valence"] = emotion_valence(row.emotion_score)
+                if row.emotion_valence is not None:
+                    archived.append(row)
+        if archived:
+            stats, top_tags = self._merge_archived(stats, tagged, archived, bucket)
+        else:
+            top_tags = self._top_tags(tagged)
+
+        logger.info(f"情绪趋势: {start} ~ {end}, 按{bucket}统计 {len(stats)} 个时间桶（归档 {len(archived)} 条）")
+        return stats, top_tags
+
+    def _top_tags(self, tagged) -> Dict[datetime, List[str]]:
+        """热表中每个时间桶最常见的标签，排名在 SQL 中完成"""
+        ranked = sa.select(
+            tagged.c.bucket_start,
+            tagged.c.tag,
+            sa.func.row_number().over(
+                partition_by=tagged.c.bucket_start,
+                order_by=(sa.func.count().desc(), tagged.c.tag)
+            ).label("rank")
+        ).group_by(tagged.c.bucket_start, tagged.c.tag).subquery()
+        top_tags: Dict[datetime, List[str]] = {}
+        for row in self.db.execute(
+            sa.select(ranked.c.bucket_start, ranked.c.tag)
+            .where(ranked.c.rank <= TOP_TAGS)
+            .order_by(ranked.c.bucket_start, ranked.c.rank)
+        ):
+            top_tags.setdefault(row.bucket_start, []).append(row.tag)
+        return top_tags
+
+    def _merge_archived(
+        self,
+        stats: Sequence[Row],
+        tagged,
+        archived: Sequence[ArchivedRow],
+        bucket: str
+    ) -> Tuple[List[ArchivedRow], Dict[datetime, List[str]]]:
+        """合并热表的分桶统计和归档记录：效价按桶合并均值和方差，标签按桶合计次数后重新排名"""
+        starts = np.array([row.start_time for row in archived], dtype="datetime64[us]")
+        valences = np.array([row.emotion_valence for row in archived], dtype=float)
+        merged = merge_stats(stats, starts, valences, bucket)
+
+        # 热表只取 (桶, 标签, 次数)，与归档的标签一起排名
+        counted = self.db.execute(
+            sa.select(tagged.c.bucket_start, tagged.c.tag, sa.func.count().label("count"))
+            .group_by(tagged.c.bucket_start, tagged.c.tag)
+        ).all()
+        archived_starts = truncate(starts, bucket)
+        archived_tags = [(start, tag) for start, row in zip(archived_starts, archived) for tag in row.tags or ()]
+        buckets = np.array(
+            [row.bucket_start for row in counted] + [start for start, _ in archived_tags], dtype="datetime64[us]"
+        )
+        tags = np.array([row.tag for row in counted] + [tag for _, tag in archived_tags], dtype=object)
+        counts = np.array([row.count for row in counted] + [1] * len(archived_tags), dtype=float)
+        return merged, rank_tags(buckets, tags, counts)
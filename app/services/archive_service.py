@@ -0,0 +1,279 @@
+import base64
+import time
+import uuid
+import zlib
+from datetime import date, datetime, time as dt_time, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+import orjson
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID as UUID_TYPE
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.logger import setup_logger
+from app.db.models.archive import MemoryArchive
+from app.db.models.enums import MemoryType
+from app.db.models.memory import Memory
+from app.db.partitions import PARTITIONED_TABLE, add_months, existing_partitions, partition_name
+
+logger = setup_logger("archive")
+
+MEMORY_COLUMNS = list(Memory.__table__.c)
+
+# 只归档已结束的时间轴活动和随手记：这两类的读取路径都会回退到归档表。
+# 核心关注（长期目标、重要事项）的 start_time 是创建时间，可能持续多年仍在使用，且读写路径没有归档回退
+ARCHIVED_TYPES = (MemoryType.TIMELINE, MemoryType.QUICK_NOTE)
+
+
+def _decoder(column):
+    """按列类型返回把 JSON 值还原为 Python 对象的函数，无需转换时返回 None"""
+    column_type = column.type
+    if isinstance(column_type, sa.Enum):
+        return column_type.enum_class
+    if isinstance(column_type, UUID_TYPE):
+        return uuid.UUID
+    if isinstance(column_type, sa.DateTime):
+        return datetime.fromisoformat
+    if isinstance(column_type, sa.Date):
+        return date.fromisoformat
+    if isinstance(column_type, sa.Time):
+        return dt_time.fromisoformat
+    if isinstance(column_type, sa.LargeBinary):
+        return base64.b64decode
+    return None
+
+
+_DECODERS = {column.key: _decoder(column) for column in MEMORY_COLUMNS}
+
+
+def _encode_default(value):
+    """orjson 不支持的类型：二进制列（如 content_signature）编码为 base64 字符串"""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return base64.b64encode(value).decode("ascii")
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def encode_row(mapping) -> bytes:
+    """整行编码为压缩 JSON"""
+    return zlib.compress(orjson.dumps(dict(mapping), default=_encode_default), 6)
+
+
+def decode_row(payload: bytes, columns: Optional[Sequence[str]] = None) -> Dict:
+    """解压归档记录，只还原需要的列"""
+    data = orjson.loads(zlib.decompress(payload))
+    keys = columns or data.keys()
+    row = {}
+    for key in keys:
+        value = data.get(key)
+        decoder = _DECODERS.get(key)
+        row[key] = decoder(value) if decoder and value is not None else value
+    return row
+
+
+class ArchivedRow:
+    """归档记录解码后的行，和 Core 查询返回的 Row 一样支持属性访问和 _mapping"""
+    __slots__ = ("_mapping",)
+
+    def __init__(self, mapping: Dict) -> None:
+        self._mapping = mapping
+
+    def __getattr__(self, name):
+        try:
+            return self._mapping[name]
+        except KeyError:
+            raise AttributeError(name)
+
+
+class ArchiveService:
+    """冷数据归档：把超过保留期的记忆分批压缩搬到 memory_archive，读取时透明回退"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    @staticmethod
+    def cutoff() -> datetime:
+        """归档分界点：早于该时间（按天取整）的记忆可能已在归档中"""
+        today = datetime.combine(date.today(), datetime.min.time())
+        return today - timedelta(days=settings.ARCHIVE_HORIZON_DAYS)
+
+    def covers(self, start: datetime) -> bool:
+        """从 start 开始的时间范围是否可能涉及归档数据"""
+        return start < self.cutoff()
+
+    def find_range(
+        self,
+        user_id: UUID,
+        memory_type: Optional[MemoryType],
+        start: datetime,
+        end: datetime,
+        columns: Optional[Sequence[str]] = None
+    ) -> List[ArchivedRow]:
+        """按时间范围读取归档记录，按 start_time 升序；memory_type 为 None 时读取所有类型"""
+        conditions = [
+            MemoryArchive.user_id == user_id,
+            MemoryArchive.start_time >= start,
+            MemoryArchive.start_time < end
+        ]
+        if memory_type is not None:
+            conditions.append(MemoryArchive.memory_type == memory_type)
+        payloads = self.db.execute(
+            sa.select(MemoryArchive.payload).where(*conditions).order_by(MemoryArchive.start_time)
+        ).scalars()
+        return [ArchivedRow(decode_row(payload, columns)) for payload in payloads]
+
+    def version_range(
+        self,
+        user_id: UUID,
+        memory_type: MemoryType,
+        start: datetime,
+        end: datetime
+    ) -> Tuple[Optional[datetime], int]:
+        """归档部分的版本：(max(updated_at), 行数)"""
+        return tuple(self.db.execute(
+            sa.select(sa.func.max(MemoryArchive.updated_at), sa.func.count()).where(
+                MemoryArchive.user_id == user_id,
+                MemoryArchive.memory_type == memory_type,
+                MemoryArchive.start_time >= start,
+                MemoryArchive.start_time < end
+            )
+        ).one())
+
+    def get(self, memory_id: UUID, user_id: UUID) -> Optional[ArchivedRow]:
+        payload = self.db.execute(
+            sa.select(MemoryArchive.payload).where(
+                MemoryArchive.id == memory_id,
+                MemoryArchive.user_id == user_id
+            )
+        ).scalar()
+        return ArchivedRow(decode_row(payload)) if payload is not None else None
+
+    def list(
+        self,
+        user_id: UUID,
+        offset: int,
+        limit: int,
+        columns: Optional[Sequence[str]] = None
+    ) -> List[ArchivedRow]:
+        payloads = self.db.execute(
+            sa.select(MemoryArchive.payload)
+            .where(MemoryArchive.user_id == user_id)
+            .order_by(MemoryArchive.start_time)
+            .offset(offset)
+            .limit(limit)
+        ).scalars()
+        return [ArchivedRow(decode_row(payload, columns)) for payload in payloads]
+
+    def delete(self, memory_id: UUID, user_id: UUID) -> bool:
+        deleted = self.db.execute(
+            sa.delete(MemoryArchive).where(
+                MemoryArchive.id == memory_id,
+                MemoryArchive.user_id == user_id
+            )
+        ).rowcount
+        return bool(deleted)
+
+    def restore(self, memory_id: UUID, user_id: UUID) -> bool:
+        """把归档记录搬回热表（需要修改归档记忆时使用），调用方负责提交"""
+        row = self.get(memory_id, user_id)
+        if row is None:
+            return False
+        self.db.execute(sa.insert(Memory.__table__).values(**row._mapping))
+        self.delete(memory_id, user_id)
+        return True
+
+    def archive_before(
+        self,
+        cutoff: Optional[datetime] = None,
+        batch_size: Optional[int] = None,
+        pause: Optional[float] = None
+    ) -> int:
+        """把 start_time 早于 cutoff 且已结束的时间轴活动和随手记（ARCHIVED_TYPES）分批搬到归档表
+
+        进行中的活动和长期记忆保留在热表。每批独立提交并停顿 pause 秒，按 start_time 升序处理，
+        因此同一天内已归档的记录总是早于仍在热表中的记录。
+        """
+        cutoff = cutoff or self.cutoff()
+        batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+        pause = settings.ARCHIVE_BATCH_PAUSE if pause is None else pause
+        table = Memory.__table__
+        total = 0
+
+        while True:
+            rows = self.db.execute(
+                sa.select(*MEMORY_COLUMNS)
+                .where(
+                    table.c.start_time < cutoff,
+                    table.c.memory_type.in_(ARCHIVED_TYPES),
+                    table.c.is_ongoing.isnot(True),
+                    table.c.is_long_term.isnot(True)
+                )
+                .order_by(table.c.start_time)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+
+            self.db.execute(sa.insert(MemoryArchive.__table__), [
+                {
+                    "id": row.id,
+                    "user_id": row.user_id,
+                    "memory_type": row.memory_type,
+                    "start_time": row.start_time,
+                    "payload": encode_row(row._mapping),
+                    "created_at": row.created_at,
+                    "updated_at": row.updated_at,
+                    "archived_at": datetime.utcnow(),
+                }
+                for row in rows
+            ])
+            self.db.execute(
+                sa.delete(table).where(
+                    sa.tuple_(table.c.id, table.c.start_time).in_(
+                        [(row.id, row.start_time) for row in rows]
+                    )
+                )
+            )
+            self.db.commit()
+            total += len(rows)
+            logger.info(f"已归档 {total} 条记忆（截至 {rows[-1].start_time}）")
+            time.sleep(pause)
+
+        self.drop_empty_partitions(cutoff)
+        return total
+
+    def drop_empty_partitions(self, cutoff: datetime) -> List[str]:
+        """删除完全早于 cutoff 且已清空的月分区，立即回收其索引空间"""
+        existing = existing_partitions(self.db.connection())
+        dropped = []
+        for name in sorted(existing):
+            if not name.startswith(f"{PARTITIONED_TABLE}_y"):
+                continue
+            month = date(int(name[-7:-3]), int(name[-2:]), 1)
+            if datetime.combine(add_months(month, 1), datetime.min.time()) > cutoff:
+                continue
+            if self.db.execute(sa.text(f"SELECT EXISTS (SELECT 1 FROM {partition_name(month)})")).scalar():
+                continue
+            self.db.execute(sa.text(f"DROP TABLE {partition_name(month)}"))
+            dropped.append(name)
+        self.db.commit()
+        if dropped:
+            logger.info(f"已删除空分区: {', '.join(dropped)}")
+        return dropped
+
+
+def main():
+    """命令行执行归档：python -m app.services.archive_service"""
+    from app.db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        total = ArchiveService(db).archive_before()
+        logger.info(f"归档完成，共 {total} 条")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
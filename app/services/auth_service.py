@@ -0,0 +1,185 @@
+import asyncio
+import hashlib
+import secrets
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+import sqlalchemy as sa
+from fastapi import HTTPException, status
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.logger import setup_logger
+from app.core.revocation import revocations
+from app.core.security import CurrentUser, create_access_token
+from app.db.models.token import RefreshToken, RevokedToken
+from app.db.models.user import User
+from app.db.session import SessionLocal
+
+logger = setup_logger("auth_service")
+
+# 增量同步时往回多取的时间：各进程写入的作废时间不严格递增
+SYNC_OVERLAP = timedelta(seconds=60)
+
+
+def hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def invalid_refresh_token() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+class AuthService:
+    """令牌签发、刷新令牌轮换和作废
+
+    访问令牌携带用户 ID 和状态，有效期 ACCESS_TOKEN_EXPIRE_MINUTES，校验时不查库（见 get_current_user）；
+    作废写入 revoked_tokens，本进程立即生效，其他进程在下次同步后生效。
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def issue_tokens(self, user: User, family_id: Optional[uuid.UUID] = None) -> dict:
+        """签发访问令牌和刷新令牌，调用方负责提交"""
+        expires_in = settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+        access_token = create_access_token(
+            data={
+                "sub": user.email,
+                "uid": str(user.id),
+                "act": user.is_active is not False,
+                "su": bool(user.is_superuser),
+                "jti": uuid.uuid4().hex,
+                "iat": time.time(),
+            },
+            expires_delta=timedelta(seconds=expires_in),
+        )
+        refresh_token = secrets.token_urlsafe(32)
+        self.db.add(RefreshToken(
+            user_id=user.id,
+            token_hash=hash_token(refresh_token),
+            family_id=family_id or uuid.uuid4(),
+            expires_at=datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+        ))
+        return {
+            "access_token": access_token,
+            "token_type": "bearer",
+            "refresh_token": refresh_token,
+            "expires_in": expires_in,
+        }
+
+    def refresh(self, refresh_token: str) -> dict:
+        """用刷新令牌换一对新令牌，旧刷新令牌作废"""
+        now = datetime.utcnow()
+        token = (
+            self.db.query(RefreshToken)
+            .filter(RefreshToken.token_hash == hash_token(refresh_token))
+            .with_for_update()
+            .first()
+        )
+        if token is None or token.expires_at <= now:
+            raise invalid_refresh_token()
+        if token.revoked_at is not None:
+            # 已轮换或登出的令牌再次出现，可能已泄露：作废整个令牌族
+            logger.warning(f"刷新令牌重复使用，作废令牌族 {token.family_id}（用户 {token.user_id}）")
+            self._revoke_refresh_tokens(RefreshToken.family_id == token.family_id, now)
+            self.db.commit()
+            raise invalid_refresh_token()
+
+        user = self.db.get(User, token.user_id)
+        if user is None or user.is_active is False:
+            raise invalid_refresh_token()
+        token.revoked_at = now
+        tokens = self.issue_tokens(user, family_id=token.family_id)
+        self.db.commit()
+        return tokens
+
+    def logout(self, current_user: CurrentUser, refresh_token: Optional[str]) -> None:
+        """登出当前会话：作废刷新令牌所在的令牌族和当前访问令牌"""
+        now = datetime.utcnow()
+        if refresh_token:
+            token = (
+                self.db.query(RefreshToken)
+                .filter(RefreshToken.token_hash == hash_token(refresh_token), RefreshToken.user_id == current_user.id)
+                .first()
+            )
+            if token is not None:
+                self._revoke_refresh_tokens(RefreshToken.family_id == token.family_id, now)
+        if current_user.jti:
+            self._revoke_access(current_user.jti, now, current_user.expires_at)
+        self.db.commit()
+
+    def revoke_user(self, user_id: uuid.UUID) -> None:
+        """作废用户的所有令牌（退出所有设备、修改密码、停用账号）"""
+        now = datetime.utcnow()
+        self._revoke_refresh_tokens(RefreshToken.user_id == user_id, now)
+        # 此前签发的访问令牌最晚在一个有效期后全部过期
+        self._revoke_access(f"user:{user_id}", now, now + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES))
+        self.db.commit()
+
+    def _revoke_refresh_tokens(self, condition, now: datetime) -> None:
+        self.db.execute(
+            sa.update(RefreshToken)
+            .where(condition, RefreshToken.revoked_at.is_(None))
+            .values(revoked_at=now)
+        )
+
+    def _revoke_access(self, key: str, now: datetime, expires_at: datetime) -> None:
+        self.db.execute(
+            insert(RevokedToken)
+            .values(key=key, revoked_at=now, expires_at=expires_at, created_at=now, updated_at=now)
+            .on_conflict_do_update(
+                index_elements=[RevokedToken.key],
+                set_={"revoked_at": now, "expires_at": expires_at, "updated_at": now},
+            )
+        )
+        revocations.add(key, now, expires_at)
+
+    def sync_revocations(self) -> int:
+        """把其他进程新写入的作废记录加入本进程的作废列表，返回读取的记录数"""
+        query = self.db.query(RevokedToken.key, RevokedToken.revoked_at, RevokedToken.expires_at)
+        if revocations.synced_until is None:
+            query = query.filter(RevokedToken.expires_at > datetime.utcnow())
+        else:
+            query = query.filter(RevokedToken.revoked_at > revocations.synced_until - SYNC_OVERLAP)
+        rows = query.all()
+        for key, revoked_at, expires_at in rows:
+            revocations.add(key, revoked_at, expires_at)
+            if revocations.synced_until is None or revoked_at > revocations.synced_until:
+                revocations.synced_until = revoked_at
+        if revocations.synced_until is None:
+            revocations.synced_until = datetime.utcnow()
+        revocations.prune()
+        return len(rows)
+
+    def purge(self) -> dict:
+        """清理过期的刷新令牌和作废记录"""
+        now = datetime.utcnow()
+        refresh = self.db.execute(sa.delete(RefreshToken).where(RefreshToken.expires_at < now)).rowcount
+        revoked = self.db.execute(sa.delete(RevokedToken).where(RevokedToken.expires_at < now)).rowcount
+        self.db.commit()
+        return {"refresh_tokens": refresh, "revoked_tokens": revoked}
+
+
+async def revocation_sync_loop() -> None:
+    """每个进程定期同步作废记录，间隔 REVOCATION_SYNC_SECONDS"""
+    def sync() -> int:
+        db = SessionLocal()
+        try:
+            return AuthService(db).sync_revocations()
+        finally:
+            db.close()
+
+    while True:
+        try:
+            await asyncio.to_thread(sync)
+        except Exception as e:
+            logger.error(f"同步令牌作废记录失败: {str(e)}")
+        await asyncio.sleep(settings.REVOCATION_SYNC_SECONDS)
@@ -1,16 +1,62 @@
+from dataclasses import dataclass
 from datetime import date, datetime
 from typing import Optional, List, Tuple
 from sqlalchemy.orm import Session
+from sqlalchemy.engine import Row
 from app.db.models.memory import Memory
+from app.db.models.goal_progress import GoalProgress
 from app.db.models.enums import MemoryType, CoreFocusType
 from uuid import UUID
 from app.core.logger import setup_logger
+from app.core.singleflight import single_flight
 from fastapi import HTTPException
-from app.services.timeline_service import TimelineService
+from app.services.timeline_service import TimelineService, TIMELINE_COLUMNS
+from app.services.view_cache import invalidate_memory
+from app.services.tag_service import TagService
+from app.services.interval_engine import rows_to_arrays, to_seconds, union_seconds
+from app.services.downsample import bucket_stats, lttb
+from app.services.goal_analytics import GoalPace, analyze
+import numpy as np
 import sqlalchemy as sa
 
 logger = setup_logger("core_focus")
 
+# ImportantMatterResponse 需要的列
+IMPORTANT_MATTER_COLUMNS = (
+    Memory.id,
+    Memory.content,
+    Memory.target_duration,
+    Memory.duration,
+    Memory.completion_rate,
+    Memory.start_time,
+    Memory.tags,
+    Memory.description,
+)
+
+# LongTermGoalResponse 需要的列
+LONG_TERM_GOAL_COLUMNS = (
+    Memory.id,
+    Memory.content,
+    Memory.target_date,
+    Memory.target_value,
+    Memory.current_value,
+    Memory.progress_type,
+    Memory.milestone_points,
+    Memory.tags,
+    Memory.description,
+    Memory.start_time,
+)
+
+# 进度历史的降采样方式
+PROGRESS_MODES = ("raw", "lttb", "bucket")
+
+@dataclass
+class ProgressHistory:
+    """目标进度历史（按 recorded_at 升序）"""
+    total: int                        # 范围内的原始记录数
+    points: List[Row]                 # raw / lttb：(recorded_at, value, delta, note)
+    buckets: Optional[tuple] = None   # bucket：bucket_stats 的结果，桶起点为秒
+
 class CoreFocusService:
     def __init__(self, db: Session):
         self.db = db
@@ -24,20 +70,15 @@ class CoreFocusService:
         description: Optional[str] = None
     ) -> Memory:
         """创建重要事项"""
-        # 如果有描述，将其添加到内容中
-        full_content = (
-            f"{content}\n---\n{description}" 
-            if description 
-            else content
-        )
-        
         matter = Memory(
             user_id=user_id,
-            content=full_content,  # 使用组合后的内容
+            content=content,
+            description=description,
             memory_type=MemoryType.CORE_FOCUS,
             focus_type=CoreFocusType.IMPORTANT,
             target_duration=target_minutes * 60,
             tags=tags,
+            tag_ids=TagService(self.db).ids_for(user_id, tags),
             start_time=datetime.now(),
             is_ongoing=True
         )
@@ -45,6 +86,7 @@ class CoreFocusService:
         self.db.add(matter)
         self.db.commit()
         self.db.refresh(matter)
+        invalidate_memory(matter)
         logger.info(f"创建重要事项: {content}, 目标时间: {target_minutes}分钟 ({target_minutes * 60}秒)")
         return matter
 
@@ -52,51 +94,69 @@ class CoreFocusService:
         self,
         user_id: UUID,
         date: Optional[date] = None
-    ) -> List[Memory]:
-        """获取某天的重要事项列表"""
+    ) -> List[Row]:
+        """获取某天的重要事项列表（只选响应需要的列）"""
+        logger.info(f"查询日期: {date or datetime.now().date()}")
+        
+        stmt = sa.select(*IMPORTANT_MATTER_COLUMNS).where(
+            *self._daily_important_filter(user_id, date)
+        )
+        matters = self.db.execute(stmt).all()
+        
+        logger.info(f"找到 {len(matters)} 个重要事项")
+        return matters
+
+    async def get_daily_important_version(
+        self,
+        user_id: UUID,
+        date: Optional[date] = None
+    ) -> Tuple[Optional[datetime], int]:
+        """获取某天重要事项的版本：(max(updated_at), 行数)，用于生成 ETag"""
+        stmt = sa.select(
+            sa.func.max(Memory.updated_at), sa.func.count()
+        ).where(*self._daily_important_filter(user_id, date))
+        return tuple(self.db.execute(stmt).one())
+
+    def _daily_important_filter(self, user_id: UUID, date: Optional[date]) -> tuple:
+        """某天重要事项的查询条件"""
         if not date:
             date = datetime.now().date()
-
-        logger.info(f"查询日期: {date}")
-        
-        matters = self.db.query(Memory).filter(
+        return (
             Memory.user_id == user_id,
             Memory.memory_type == MemoryType.CORE_FOCUS,
             Memory.focus_type == CoreFocusType.IMPORTANT,
             Memory.start_time >= datetime.combine(date, datetime.min.time()),
             Memory.start_time < datetime.combine(date, datetime.max.time())
-        ).all()
-        
-        logger.info(f"找到 {len(matters)} 个重要事项")
-        return matters
+        )
 
     async def calculate_time_investment(
         self,
         matter_id: UUID
     ) -> float:
-        """计算某个重要事项的实际投入时间（从时间轴记录中）"""
-        matter = self.db.query(Memory).filter(
+        """计算某个重要事项的实际投入时间（从时间轴记录中）
+
+        并行活动可能互相重叠，按区间并集计算，重叠部分只算一次。
+        """
+        matter = self.db.query(
+            Memory.user_id, Memory.tag_ids, Memory.start_time
+        ).filter(
             Memory.id == matter_id
         ).first()
         
         if not matter:
             return 0
             
-        # 获取相关的时间轴记录
-        timeline_records = self.db.query(Memory).filter(
+        # 只取相关时间轴记录的起止时间
+        intervals = self.db.query(Memory.start_time, Memory.end_time).filter(
             Memory.user_id == matter.user_id,
             Memory.memory_type == MemoryType.TIMELINE,
-            Memory.tags.overlap(matter.tags),
+            Memory.tag_ids.overlap(matter.tag_ids),
             Memory.start_time >= datetime.combine(matter.start_time.date(), datetime.min.time()),
             Memory.start_time < datetime.combine(matter.start_time.date(), datetime.max.time())
         ).all()
         
-        total_seconds = sum(
-            record.duration or 0
-            for record in timeline_records
-        )
-        
-        return total_seconds  # 返回秒数
+        starts, ends, _ = rows_to_arrays(intervals, now=datetime.now())
+        return union_seconds(starts, ends)  # 返回秒数
 
     async def start_important_matter_activity(
         self,
@@ -120,7 +180,7 @@ class CoreFocusService:
         timeline_service = TimelineService(self.db)
         activity = await timeline_service.start_activity(
             user_id=user_id,
-            content=content or f"开始: {matter.content.split('---')[0]}",
+            content=content or f"开始: {matter.content}",
             tags=matter.tags,  # 继承重要事项的标签
             target_duration=60  # 默认一小时，可以根据需要调整
         )
@@ -164,7 +224,7 @@ class CoreFocusService:
         self,
         matter_id: UUID,
         user_id: UUID
-    ) -> Tuple[Memory, List[Memory]]:
+    ) -> Tuple[Memory, List[Row]]:
         """获取重要事项及其所有相关活动"""
         # 获取重要事项
         matter = self.db.query(Memory).filter(
@@ -177,14 +237,15 @@ class CoreFocusService:
         if not matter:
             raise HTTPException(status_code=404, detail="Important matter not found")
         
-        # 获取相关的时间轴记录
-        activities = self.db.query(Memory).filter(
+        # 获取相关的时间轴记录（只选 TimelineResponse 需要的列）
+        stmt = sa.select(*TIMELINE_COLUMNS).where(
             Memory.user_id == user_id,
             Memory.memory_type == MemoryType.TIMELINE,
-            Memory.tags.overlap(matter.tags),
+            Memory.tag_ids.overlap(matter.tag_ids),
             Memory.start_time >= datetime.combine(matter.start_time.date(), datetime.min.time()),
             Memory.start_time < datetime.combine(matter.start_time.date(), datetime.max.time())
-        ).order_by(Memory.start_time.desc()).all()
+        ).order_by(Memory.start_time.desc())
+        activities = self.db.execute(stmt).all()
         
         logger.info(f"找到重要事项 '{matter.content}' 的 {len(activities)} 个相关活动")
         return matter, activities 
@@ -225,6 +286,7 @@ class CoreFocusService:
             progress_type=progress_type,
             milestone_points=milestone_points,
             tags=tags or [],
+            tag_ids=TagService(self.db).ids_for(user_id, tags),
             description=description
         )
         
@@ -234,67 +296,92 @@ class CoreFocusService:
         
         self.db.add(memory)
         self.db.commit()
+        invalidate_memory(memory)
         return memory
 
     async def update_goal_progress(
         self,
         goal_id: UUID,
+        user_id: UUID,
         current_value: float,
         note: str = None
     ) -> Tuple[Memory, float]:
-        """更新目标进度"""
+        """更新目标进度
+
+        锁住目标行后在同一事务中更新 current_value 并追加进度流水，
+        并发更新按顺序执行，current_value 总是等于最后一条流水的值。
+        """
         goal = self.db.query(Memory).filter(
             Memory.id == goal_id,
+            Memory.user_id == user_id,
             Memory.is_long_term == True
-        ).first()
+        ).with_for_update().first()
         
         if not goal:
             raise HTTPException(status_code=404, detail="Goal not found")
             
+        previous_value = goal.current_value or 0
         goal.current_value = current_value
         completion_rate = (current_value / goal.target_value) * 100
         
-        # 创建进度记录
+        self.db.add(GoalProgress(
+            goal_id=goal.id,
+            user_id=goal.user_id,
+            value=current_value,
+            delta=current_value - previous_value,
+            note=note,
+            recorded_at=datetime.now()
+        ))
+        
+        # 同时在时间轴上留一条进度记录
         activity = Memory(
             user_id=goal.user_id,
             content=f"进度更新: {note}" if note else f"进度更新到 {current_value}",
             memory_type=MemoryType.TIMELINE,
             tags=goal.tags,
+            tag_ids=goal.tag_ids,
             start_time=datetime.now(),
             end_time=datetime.now()
         )
         
         self.db.add(activity)
         self.db.commit()
+        invalidate_memory(activity)
         return goal, completion_rate 
 
     async def get_long_term_goals(
         self,
         user_id: UUID,
         include_completed: bool = False  # 新增参数：是否包含已完成的目标
-    ) -> List[Memory]:
+    ) -> List[Row]:
         """获取用户的所有长期目标
+
+        同一用户的并发相同查询合并为一次（见 app/core/singleflight.py）。
         
         Args:
             user_id (UUID): 用户ID
             include_completed (bool, optional): 是否包含已完成的目标. Defaults to False.
         
         Returns:
-            List[Memory]: 长期目标列表，按目标日期升序排序
+            List[Row]: 长期目标列表（只含 LONG_TERM_GOAL_COLUMNS），按目标日期升序排序
         """
+        return await single_flight.query(
+            (user_id, "goals.long_term", include_completed),
+            self.db,
+            lambda db: CoreFocusService(db)._load_long_term_goals(user_id, include_completed)
+        )
+
+    def _load_long_term_goals(self, user_id: UUID, include_completed: bool) -> List[Row]:
         logger.info(f"获取用户 {user_id} 的长期目标列表")
         
         # 构建基础查询
-        query = self.db.query(Memory).filter(
-            Memory.user_id == user_id,
-            Memory.memory_type == MemoryType.CORE_FOCUS,
-            Memory.focus_type == CoreFocusType.LONG_TERM,
-            Memory.is_long_term == True
+        query = sa.select(*LONG_TERM_GOAL_COLUMNS).where(
+            *self._long_term_filter(user_id)
         )
         
         # 如果不包含已完成的目标，添加条件
         if not include_completed:
-            query = query.filter(
+            query = query.where(
                 sa.or_(
                     Memory.current_value < Memory.target_value,  # 未达到目标值
                     Memory.current_value == None  # 或者还未开始
@@ -302,11 +389,67 @@ class CoreFocusService:
             )
         
         # 按目标日期升序排序
-        goals = query.order_by(Memory.target_date.asc()).all()
+        goals = self.db.execute(query.order_by(Memory.target_date.asc())).all()
         
         logger.info(f"找到 {len(goals)} 个长期目标")
         return goals 
 
+    async def get_long_term_goals_version(
+        self,
+        user_id: UUID
+    ) -> Tuple[Optional[datetime], int]:
+        """获取用户长期目标的版本：(max(updated_at), 行数)，用于生成 ETag；并发相同查询合并为一次
+
+        不区分是否已完成：进度更新会刷新 updated_at，已足以让版本变化。
+        """
+        stmt = sa.select(
+            sa.func.max(Memory.updated_at), sa.func.count()
+        ).where(*self._long_term_filter(user_id))
+        return await single_flight.query(
+            (user_id, "goals.long_term_version"),
+            self.db,
+            lambda db: tuple(db.execute(stmt).one())
+        )
+
+    async def get_long_term_analytics(
+        self,
+        user_id: UUID,
+        include_completed: bool = False
+    ) -> Tuple[List[Row], GoalPace]:
+        """一次性分析用户全部长期目标的进度速度、预计完成日期和里程碑
+
+        两次查询（目标 + 全部进度流水），回归计算在 NumPy 中对所有目标一起完成。
+        """
+        goals = await self.get_long_term_goals(user_id, include_completed=include_completed)
+        index = {goal.id: i for i, goal in enumerate(goals)}
+        points = self.db.execute(
+            sa.select(GoalProgress.goal_id, GoalProgress.recorded_at, GoalProgress.value)
+            .where(GoalProgress.goal_id.in_(list(index)))
+        ).all()
+
+        pace = analyze(
+            starts=to_seconds([goal.start_time for goal in goals]),
+            deadlines=to_seconds([datetime.combine(goal.target_date, datetime.max.time()) for goal in goals]),
+            targets=np.array([goal.target_value or 0 for goal in goals], dtype=np.float64),
+            currents=np.array([goal.current_value or 0 for goal in goals], dtype=np.float64),
+            point_goal=np.fromiter((index[point.goal_id] for point in points), dtype=np.int64, count=len(points)),
+            point_time=to_seconds([point.recorded_at for point in points]),
+            point_value=np.fromiter((point.value for point in points), dtype=np.float64, count=len(points)),
+            milestones=[goal.milestone_points for goal in goals],
+            now=float(to_seconds([datetime.now()])[0]),
+        )
+        logger.info(f"分析 {len(goals)} 个长期目标，{len(points)} 条进度记录")
+        return goals, pace
+
+    def _long_term_filter(self, user_id: UUID) -> tuple:
+        """用户长期目标的查询条件"""
+        return (
+            Memory.user_id == user_id,
+            Memory.memory_type == MemoryType.CORE_FOCUS,
+            Memory.focus_type == CoreFocusType.LONG_TERM,
+            Memory.is_long_term == True
+        )
+
     async def get_long_term_goal(
         self,
         goal_id: UUID,
@@ -339,4 +482,43 @@ class CoreFocusService:
             raise HTTPException(status_code=404, detail="Goal not found")
         
         logger.info(f"找到目标: {goal.content}")
-        return goal 
\ No newline at end of file
+        return goal
+
+    async def get_goal_progress_history(
+        self,
+        goal_id: UUID,
+        user_id: UUID,
+        mode: str = "raw",
+        points: int = 500,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> ProgressHistory:
+        """获取目标的进度历史
+
+        raw 返回范围内全部记录；lttb 用 LTTB 选出最多 points 个保持曲线形状的点；
+        bucket 按等宽时间桶聚合为最多 points 个 (min, max, last, count)。
+        """
+        await self.get_long_term_goal(goal_id=goal_id, user_id=user_id)
+
+        conditions = [GoalProgress.goal_id == goal_id]
+        if start:
+            conditions.append(GoalProgress.recorded_at >= start)
+        if end:
+            conditions.append(GoalProgress.recorded_at < end)
+        rows = self.db.execute(
+            sa.select(
+                GoalProgress.recorded_at,
+                GoalProgress.value,
+                GoalProgress.delta,
+                GoalProgress.note
+            ).where(*conditions).order_by(GoalProgress.recorded_at)
+        ).all()
+
+        if mode == "raw" or len(rows) <= points:
+            return ProgressHistory(total=len(rows), points=rows)
+
+        x = to_seconds([row.recorded_at for row in rows])
+        y = np.fromiter((row.value for row in rows), dtype=np.float64, count=len(rows))
+        if mode == "lttb":
+            return ProgressHistory(total=len(rows), points=[rows[i] for i in lttb(x, y, points)])
+        return ProgressHistory(total=len(rows), points=[], buckets=bucket_stats(x, y, points))
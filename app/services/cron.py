@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+from typing import FrozenSet
+
+# 分 时 日 月 星期（0 和 7 都表示周日）
+FIELD_RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+# 找不到匹配时间（如 "0 0 30 2 *"）时最多向后查找的年数
+MAX_YEARS = 5
+
+
+def parse_field(field: str, low: int, high: int) -> FrozenSet[int]:
+    """解析一个 cron 字段：*、*/n、a、a-b、a-b/n 及其逗号组合"""
+    values = set()
+    for part in field.split(","):
+        expr, _, step = part.partition("/")
+        step = int(step) if step else 1
+        if expr == "*":
+            start, end = low, high
+        elif "-" in expr:
+            start, end = (int(value) for value in expr.split("-", 1))
+        else:
+            start = end = int(expr)
+            if step != 1:
+                end = high
+        if step < 1 or not low <= start <= end <= high:
+            raise ValueError(f"Invalid cron field: {field}")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+class CronSchedule:
+    """5 段 cron 表达式（分 时 日 月 星期），按标准 cron 语义计算下一次触发时间
+
+    日和星期都有限制时满足其一即可。
+    """
+
+    def __init__(self, expression: str) -> None:
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Invalid cron expression: {expression}")
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, weekdays = (
+            parse_field(field, low, high) for field, (low, high) in zip(fields, FIELD_RANGES)
+        )
+        self.weekdays = frozenset(day % 7 for day in weekdays)
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+
+    def __repr__(self) -> str:
+        return f"CronSchedule({self.expression!r})"
+
+    def matches_day(self, moment: datetime) -> bool:
+        day_ok = moment.day in self.days
+        # cron 的星期从周日 = 0 开始，datetime.weekday() 从周一 = 0 开始
+        weekday_ok = (moment.weekday() + 1) % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return day_ok and weekday_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, after: datetime) -> datetime:
+        """after 之后（不含）的下一次触发时间，精确到分钟"""
+        moment = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = after.year + MAX_YEARS
+        while moment.year <= limit:
+            if moment.month not in self.months:
+                moment = datetime(moment.year + moment.month // 12, moment.month % 12 + 1, 1)
+            elif not self.matches_day(moment):
+                moment = datetime(moment.year, moment.month, moment.day) + timedelta(days=1)
+            elif moment.hour not in self.hours:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return moment
+        raise ValueError(f"Cron expression never fires: {self.expression}")
@@ -0,0 +1,326 @@
+import hashlib
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+import numpy as np
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.logger import setup_logger
+from app.db.models.enums import MemoryType
+from app.db.models.memory import Memory
+
+logger = setup_logger("dedupe")
+
+# 参与近似去重的记忆类型：快速记录和时间轴活动最容易被重复提交
+DEDUPE_TYPES = (MemoryType.QUICK_NOTE, MemoryType.TIMELINE)
+
+# MinHash 签名：64 个哈希函数，对内容的字符 2-gram 集合各取最小值，
+# 两条记忆签名相同位置相等的比例即为 2-gram 集合 Jaccard 相似度的估计
+NUM_PERM = 64
+SHINGLE_SIZE = 2
+# LSH 分桶：签名分成 16 段、每段 4 个值，任一段完全相同即为候选；
+# 相似度 0.7 的两条记忆成为候选的概率为 1 - (1 - 0.7^4)^16 ≈ 0.99，0.3 的约为 0.12
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+
+_PERM_A, _PERM_B = np.random.default_rng(20261019).integers(1, 2 ** 63, (2, NUM_PERM), dtype=np.uint64)
+_NOISE = re.compile(r"[\W_]+")
+
+
+def normalize_content(content: str) -> str:
+    """全半角统一、转小写并去掉空白和标点，双击或同步重放产生的细微差异不影响签名"""
+    return _NOISE.sub("", unicodedata.normalize("NFKC", content or "").lower())
+
+
+def minhash(content: str) -> np.ndarray:
+    """内容的 MinHash 签名（NUM_PERM 个 uint32）"""
+    text = normalize_content(content) or (content or "")
+    grams = {text[i:i + SHINGLE_SIZE] for i in range(max(len(text) - SHINGLE_SIZE + 1, 1))}
+    digests = b"".join(hashlib.blake2b(gram.encode(), digest_size=4).digest() for gram in grams)
+    hashes = np.frombuffer(digests, dtype=np.uint32).astype(np.uint64)
+    # h(x) = (a * x + b) mod 2^64 取高 32 位，按列取最小值
+    permuted = (_PERM_A[:, None] * hashes[None, :] + _PERM_B[:, None]) >> np.uint64(32)
+    return permuted.min(axis=1).astype(np.uint32)
+
+
+def signature_bytes(signature: np.ndarray) -> bytes:
+    return signature.astype("<u4").tobytes()
+
+
+def signature_from_bytes(payload: bytes) -> np.ndarray:
+    return np.frombuffer(payload, dtype="<u4")
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """两个签名估计的 Jaccard 相似度"""
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+
+class MinHashIndex:
+    """单个用户近期记忆的 MinHash LSH 索引
+
+    entries 按加入顺序（大致即 start_time 顺序）保存，prune 从头部淘汰窗口之外的签名。
+    """
+
+    def __init__(self) -> None:
+        self.entries: "OrderedDict[UUID, Tuple[np.ndarray, MemoryType, datetime]]" = OrderedDict()
+        self.bands: List[Dict[bytes, List[UUID]]] = [{} for _ in range(BANDS)]
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def add(self, memory_id: UUID, signature: np.ndarray, memory_type: MemoryType, start_time: datetime) -> None:
+        self.remove(memory_id)
+        self.entries[memory_id] = (signature, memory_type, start_time)
+        for band, key in zip(self.bands, _band_keys(signature)):
+            band.setdefault(key, []).append(memory_id)
+
+    def remove(self, memory_id: UUID) -> None:
+        entry = self.entries.pop(memory_id, None)
+        if entry is None:
+            return
+        for band, key in zip(self.bands, _band_keys(entry[0])):
+            bucket = band.get(key)
+            if bucket is not None:
+                bucket.remove(memory_id)
+                if not bucket:
+                    del band[key]
+
+    def prune(self, before: datetime) -> None:
+        while self.entries:
+            memory_id, (_, _, start_time) = next(iter(self.entries.items()))
+            if start_time >= before:
+                break
+            self.remove(memory_id)
+
+    def nearest(
+        self,
+        signature: np.ndarray,
+        memory_type: MemoryType,
+        min_similarity: float,
+        exclude: Optional[UUID] = None
+    ) -> Optional[Tuple[UUID, float]]:
+        """同类型记忆中相似度最高（且不低于 min_similarity）的一条，返回 (ID, 相似度)"""
+        best = None
+        seen = set()
+        for band, key in zip(self.bands, _band_keys(signature)):
+            for memory_id in band.get(key, ()):
+                if memory_id in seen or memory_id == exclude:
+                    continue
+                seen.add(memory_id)
+                other, other_type, _ = self.entries[memory_id]
+                if other_type != memory_type:
+                    continue
+                score = similarity(signature, other)
+                if score >= min_similarity and (best is None or score > best[1]):
+                    best = (memory_id, score)
+        return best
+
+
+def _band_keys(signature: np.ndarray) -> List[bytes]:
+    payload = signature_bytes(signature)
+    width = ROWS * 4
+    return [payload[i * width:(i + 1) * width] for i in range(BANDS)]
+
+
+class MinHashIndexCache:
+    """进程内的签名索引缓存：user_id -> MinHashIndex，按用户做 LRU 淘汰并带 TTL
+
+    索引只包含本进程提交或加载的记忆，其他 worker 写入的记忆最多 TTL 后可见。
+    """
+
+    def __init__(self, max_users: int, ttl: int) -> None:
+        self.max_users = max_users
+        self.ttl = ttl
+        self._users: "OrderedDict[UUID, Tuple[float, MinHashIndex]]" = OrderedDict()
+
+    def get(self, user_id: UUID) -> Optional[MinHashIndex]:
+        entry = self._users.get(user_id)
+        if entry is None:
+            return None
+        expires_at, index = entry
+        if expires_at < time.monotonic():
+            del self._users[user_id]
+            return None
+        self._users.move_to_end(user_id)
+        return index
+
+    def set(self, user_id: UUID, index: MinHashIndex) -> None:
+        self._users[user_id] = (time.monotonic() + self.ttl, index)
+        self._users.move_to_end(user_id)
+        while len(self._users) > self.max_users:
+            self._users.popitem(last=False)
+
+
+minhash_index_cache = MinHashIndexCache(settings.DEDUPE_INDEX_MAX_USERS, settings.DEDUPE_INDEX_TTL_SECONDS)
+
+
+class DedupeService:
+    """快速记录和时间轴活动的近似重复检测
+
+    写入时计算内容的 MinHash 签名（content_signature），在用户近 DEDUPE_WINDOW_DAYS 天的同类型记忆中
+    查找相似度不低于 DEDUPE_MIN_SIMILARITY 的记忆：DEDUPE_MERGE_SECONDS 内创建的视为重复提交直接合并，
+    更早的只标记 duplicate_of。
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    @staticmethod
+    def window_start() -> datetime:
+        return datetime.now() - timedelta(days=settings.DEDUPE_WINDOW_DAYS)
+
+    def check(self, memory: Memory) -> Optional[Memory]:
+        """计算签名并标记 duplicate_of，返回近似重复的原记忆（没有时返回 None）"""
+        if not settings.DEDUPE_ENABLED or memory.memory_type not in DEDUPE_TYPES:
+            return None
+        signature = minhash(memory.content)
+        memory.content_signature = signature_bytes(signature)
+        found = self._index(memory.user_id).nearest(
+            signature,
+            memory.memory_type,
+            settings.DEDUPE_MIN_SIMILARITY,
+            exclude=memory.id
+        )
+        original = None
+        if found is not None:
+            # 索引里可能有回滚或已删除的记忆，以数据库为准
+            original = self.db.query(Memory).filter(
+                Memory.id == found[0],
+                Memory.user_id == memory.user_id
+            ).first()
+        memory.duplicate_of = original.id if original is not None else None
+        return original
+
+    @staticmethod
+    def is_resubmit(original: Memory) -> bool:
+        """原记忆是否在合并时间窗内创建（双击、同步重放），是则不再插入新记录"""
+        # created_at 为 UTC 时间（见 BaseModel）
+        return datetime.utcnow() - original.created_at <= timedelta(seconds=settings.DEDUPE_MERGE_SECONDS)
+
+    def remember(self, memory: Memory) -> None:
+        """提交后把记忆的签名加入索引"""
+        index = minhash_index_cache.get(memory.user_id)
+        if index is not None and memory.content_signature is not None:
+            index.add(
+                memory.id,
+                signature_from_bytes(memory.content_signature),
+                memory.memory_type,
+                memory.start_time
+            )
+
+    def forget(self, memory) -> None:
+        index = minhash_index_cache.get(memory.user_id)
+        if index is not None:
+            index.remove(memory.id)
+
+    def _index(self, user_id: UUID) -> MinHashIndex:
+        index = minhash_index_cache.get(user_id)
+        if index is not None:
+            index.prune(self.window_start())
+            return index
+
+        index = MinHashIndex()
+        rows = self.db.execute(
+            sa.select(Memory.id, Memory.content_signature, Memory.memory_type, Memory.start_time).where(
+                Memory.user_id == user_id,
+                Memory.memory_type.in_(DEDUPE_TYPES),
+                Memory.start_time >= self.window_start(),
+                Memory.content_signature.isnot(None)
+            ).order_by(Memory.start_time)
+        )
+        for row in rows:
+            index.add(row.id, signature_from_bytes(row.content_signature), row.memory_type, row.start_time)
+        minhash_index_cache.set(user_id, index)
+        return index
+
+    def dedupe_history(
+        self,
+        batch_size: Optional[int] = None,
+        pause: Optional[float] = None
+    ) -> Tuple[int, int]:
+        """批量处理历史记录：补齐 content_signature 并标记 duplicate_of，返回 (处理条数, 标记条数)
+
+        按 (start_time, id) 键集分批，每批独立提交；每个用户维护一个只含窗口内签名的临时索引，
+        只与更早的记忆比较，因此一组重复里最早的一条不会被标记。
+        """
+        batch_size = batch_size or settings.DEDUPE_BATCH_SIZE
+        pause = settings.DEDUPE_BATCH_PAUSE if pause is None else pause
+        window = timedelta(days=settings.DEDUPE_WINDOW_DAYS)
+        indexes: Dict[UUID, MinHashIndex] = {}
+        processed = flagged = 0
+        last = None
+
+        while True:
+            stmt = sa.select(
+                Memory.id, Memory.user_id, Memory.memory_type, Memory.content,
+                Memory.start_time, Memory.content_signature, Memory.duplicate_of
+            ).where(Memory.memory_type.in_(DEDUPE_TYPES))
+            if last is not None:
+                stmt = stmt.where(sa.tuple_(Memory.start_time, Memory.id) > last)
+            rows = self.db.execute(stmt.order_by(Memory.start_time, Memory.id).limit(batch_size)).all()
+            if not rows:
+                break
+
+            updates = []
+            for row in rows:
+                signature = (
+                    signature_from_bytes(row.content_signature)
+                    if row.content_signature is not None else minhash(row.content)
+                )
+                index = indexes.setdefault(row.user_id, MinHashIndex())
+                index.prune(row.start_time - window)
+                found = index.nearest(signature, row.memory_type, settings.DEDUPE_MIN_SIMILARITY)
+                duplicate_of = found[0] if found is not None else None
+                if row.content_signature is None or duplicate_of != row.duplicate_of:
+                    updates.append({
+                        "b_id": row.id,
+                        "b_start_time": row.start_time,
+                        "content_signature": signature_bytes(signature),
+                        "duplicate_of": duplicate_of,
+                    })
+                flagged += duplicate_of is not None
+                index.add(row.id, signature, row.memory_type, row.start_time)
+
+            if updates:
+                self.db.execute(
+                    sa.update(Memory.__table__).where(
+                        Memory.id == sa.bindparam("b_id"),
+                        Memory.start_time == sa.bindparam("b_start_time")
+                    ).values(
+                        content_signature=sa.bindparam("content_signature"),
+                        duplicate_of=sa.bindparam("duplicate_of")
+                    ),
+                    updates
+                )
+            self.db.commit()
+
+            processed += len(rows)
+            last = (rows[-1].start_time, rows[-1].id)
+            logger.info(f"已处理 {processed} 条，标记近似重复 {flagged} 条")
+            time.sleep(pause)
+
+        return processed, flagged
+
+
+def main():
+    """命令行批量去重：python -m app.services.dedupe_service"""
+    from app.db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        processed, flagged = DedupeService(db).dedupe_history()
+        logger.info(f"去重完成，共处理 {processed} 条，标记 {flagged} 条")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
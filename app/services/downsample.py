@@ -0,0 +1,75 @@
+"""
+时间序列降采样
+
+多年期目标的进度流水可能有成千上万个点，前端画图只需要几百个。
+- lttb：Largest-Triangle-Three-Buckets，保留视觉形状的点（返回原始点的下标）
+- bucket_stats：按等宽时间桶聚合 min / max / last / count
+"""
+from typing import Tuple
+
+import numpy as np
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """LTTB 降采样，返回被选中的点在原数组中的下标（首尾点总是保留）
+
+    x 需升序。点数不超过 threshold 时原样返回全部下标。
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # 首尾各占一个点，中间 n - 2 个点均分到 threshold - 2 个桶
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # 下一个桶的平均点作为三角形的第三个顶点（最后一个桶用末尾点）
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], edges[i + 2]
+        else:
+            next_start, next_end = n - 1, n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        px, py = x[previous], y[previous]
+        area = np.abs(
+            (px - avg_x) * (y[start:end] - py) - (px - x[start:end]) * (avg_y - py)
+        )
+        previous = start + int(np.argmax(area))
+        selected[i + 1] = previous
+
+    return selected
+
+
+def bucket_stats(
+    x: np.ndarray,
+    y: np.ndarray,
+    buckets: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """按等宽时间桶聚合，空桶不输出
+
+    x 需升序。返回 (桶起点, min, max, last, count)，桶起点与 x 同单位。
+    """
+    if len(x) == 0:
+        empty = np.empty(0)
+        return empty, empty, empty, empty, np.empty(0, dtype=np.int64)
+
+    x0 = x[0]
+    width = (x[-1] - x0) / buckets or 1.0
+    index = np.minimum(((x - x0) // width).astype(np.int64), buckets - 1)
+
+    # x 升序，桶号单调不减：按桶号变化处切段
+    starts = np.flatnonzero(np.r_[True, index[1:] != index[:-1]])
+    ends = np.r_[starts[1:], len(x)]
+    return (
+        x0 + index[starts] * width,
+        np.minimum.reduceat(y, starts),
+        np.maximum.reduceat(y, starts),
+        y[ends - 1],
+        ends - starts,
+    )
@@ -0,0 +1,103 @@
+"""
+长期目标进度分析（向量化）
+
+一次性对用户的全部目标做最小二乘线性回归：
+每个目标的进度点（含目标创建时刻的 0 起点）拼成一个大数组，用 bincount 按目标分组求和，
+得到每个目标的进度速度（单位/天），再推算预计完成日期、里程碑预计达成日期和是否落后。
+"""
+from dataclasses import dataclass
+from typing import Sequence
+
+import numpy as np
+
+SECONDS_PER_DAY = 86400.0
+
+
+@dataclass
+class GoalPace:
+    """各目标的分析结果，数组下标与传入的目标顺序一致；时间单位为秒（见 interval_engine.to_seconds）"""
+    pace: np.ndarray             # 回归斜率：单位/天，不足两个时间点时为 nan
+    required_pace: np.ndarray    # 剩余量 / 剩余天数，已过期为 inf，已完成为 0
+    projected: np.ndarray        # 预计完成时刻，无法完成（速度 <= 0）为 nan，已完成为 now
+    behind: np.ndarray           # 是否落后于目标日期
+    milestone_goal: np.ndarray   # 每个里程碑所属目标的下标
+    milestone_value: np.ndarray
+    milestone_eta: np.ndarray    # 里程碑预计达成时刻，已达成为 nan
+    milestone_reached: np.ndarray
+
+
+def analyze(
+    starts: np.ndarray,
+    deadlines: np.ndarray,
+    targets: np.ndarray,
+    currents: np.ndarray,
+    point_goal: np.ndarray,
+    point_time: np.ndarray,
+    point_value: np.ndarray,
+    milestones: Sequence[Sequence[float]],
+    now: float
+) -> GoalPace:
+    """对 k 个目标做向量化进度分析
+
+    starts / deadlines / targets / currents 长度为 k；
+    point_goal / point_time / point_value 为所有进度点（point_goal 是目标下标）；
+    milestones[i] 为第 i 个目标的里程碑值列表。
+    """
+    k = len(targets)
+
+    # 每个目标加一个 (创建时刻, 0) 起点，只有一条进度记录也能算出速度
+    goal_index = np.concatenate([np.arange(k), point_goal]).astype(np.int64)
+    x = (np.concatenate([starts, point_time]) - starts[goal_index]) / SECONDS_PER_DAY
+    y = np.concatenate([np.zeros(k), point_value])
+
+    n = np.bincount(goal_index, minlength=k).astype(np.float64)
+    sx = np.bincount(goal_index, weights=x, minlength=k)
+    sy = np.bincount(goal_index, weights=y, minlength=k)
+    sxx = np.bincount(goal_index, weights=x * x, minlength=k)
+    sxy = np.bincount(goal_index, weights=x * y, minlength=k)
+
+    denominator = n * sxx - sx * sx
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pace = np.where(denominator > 1e-12, (n * sxy - sx * sy) / denominator, np.nan)
+
+        remaining = np.maximum(targets - currents, 0.0)
+        days_left = (deadlines - now) / SECONDS_PER_DAY
+        required_pace = np.where(
+            remaining == 0, 0.0,
+            np.where(days_left > 0, remaining / days_left, np.inf)
+        )
+
+        done = remaining == 0
+        moving = pace > 0
+        projected = np.where(
+            done, now,
+            np.where(moving, now + remaining / pace * SECONDS_PER_DAY, np.nan)
+        )
+    behind = ~done & (~moving | (projected > deadlines))
+
+    counts = np.fromiter((len(points or ()) for points in milestones), dtype=np.int64, count=k)
+    milestone_goal = np.repeat(np.arange(k), counts)
+    milestone_value = np.fromiter(
+        (value for points in milestones for value in points or ()),
+        dtype=np.float64,
+        count=int(counts.sum())
+    )
+    milestone_reached = currents[milestone_goal] >= milestone_value
+    milestone_pace = pace[milestone_goal]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        milestone_eta = np.where(
+            ~milestone_reached & (milestone_pace > 0),
+            now + (milestone_value - currents[milestone_goal]) / milestone_pace * SECONDS_PER_DAY,
+            np.nan
+        )
+
+    return GoalPace(
+        pace=pace,
+        required_pace=required_pace,
+        projected=projected,
+        behind=behind,
+        milestone_goal=milestone_goal,
+        milestone_value=milestone_value,
+        milestone_eta=milestone_eta,
+        milestone_reached=milestone_reached,
+    )
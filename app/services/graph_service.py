@@ -0,0 +1,257 @@
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+from uuid import UUID
+
+import sqlalchemy as sa
+from fastapi import HTTPException
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.logger import setup_logger
+from app.db.models.memory import Memory, memory_relations
+
+logger = setup_logger("graph")
+
+# 边：(source_id, target_id, relation_type, relation_score)
+Edge = Tuple[UUID, UUID, str, float]
+# 邻接表：节点 -> [(邻居, 边)]，每条边在两端各出现一次（遍历不区分方向）
+Adjacency = Dict[UUID, List[Tuple[UUID, Edge]]]
+
+# 一次递归 CTE 取回整个邻域：reach 从根出发沿两个方向扩展，只记录 (节点, 跳数) 并用 UNION 去重，
+# 行数不超过 节点数 x depth（不记录路径，不会按路径数指数增长）；每个节点取最短跳数。
+# 边是从 depth 跳以内（跳数 < depth）的节点出发能走到的所有边，按节点表再连接一次 memory_relations 得到。
+# 结果中 kind = 'node' 的行是节点（含记忆摘要），kind = 'edge' 的行是遍历到的边。
+GRAPH_SQL = """
+WITH RECURSIVE reach(node_id, depth) AS (
+    SELECT CAST(:root_id AS uuid), 0
+    UNION
+    SELECT CASE WHEN r.source_id = w.node_id THEN r.target_id ELSE r.source_id END, w.depth + 1
+    FROM reach w
+    JOIN memory_relations r ON (r.source_id = w.node_id OR r.target_id = w.node_id)
+    WHERE w.depth < :depth
+      AND r.user_id = :user_id
+      AND (CAST(:types AS varchar[]) IS NULL OR r.relation_type = ANY(CAST(:types AS varchar[])))
+),
+nodes AS (
+    SELECT node_id, min(depth) AS depth FROM reach GROUP BY node_id
+),
+edges AS (
+    SELECT DISTINCT r.source_id, r.target_id, r.relation_type, r.relation_score
+    FROM nodes n
+    JOIN memory_relations r ON (r.source_id = n.node_id OR r.target_id = n.node_id)
+    WHERE n.depth < :depth
+      AND r.user_id = :user_id
+      AND (CAST(:types AS varchar[]) IS NULL OR r.relation_type = ANY(CAST(:types AS varchar[])))
+)
+SELECT 'node' AS kind, n.node_id AS id, n.depth, m.content, CAST(m.memory_type AS varchar) AS memory_type,
+       m.start_time, NULL::uuid AS source_id, NULL::uuid AS target_id,
+       NULL::varchar AS relation_type, NULL::float8 AS relation_score
+FROM nodes n LEFT JOIN memories m ON m.id = n.node_id AND m.user_id = :user_id
+UNION ALL
+SELECT 'edge', NULL, NULL, NULL, NULL, NULL, e.source_id, e.target_id, e.relation_type, e.relation_score
+FROM edges e
+"""
+
+
+class AdjacencyCache:
+    """进程内的邻接表缓存：user_id -> 邻接表，按用户做 LRU 淘汰并带 TTL
+
+    边数超过 GRAPH_CACHE_MAX_EDGES 的用户记为 None，表示直接走递归 CTE。
+    本进程写入边时失效；其他 worker 的写入最多 TTL 后可见。
+    """
+
+    def __init__(self, max_users: int, ttl: int) -> None:
+        self.max_users = max_users
+        self.ttl = ttl
+        self._users: "OrderedDict[UUID, Tuple[float, Optional[Adjacency]]]" = OrderedDict()
+
+    def get(self, user_id: UUID) -> Tuple[bool, Optional[Adjacency]]:
+        """返回 (是否命中, 邻接表)"""
+        entry = self._users.get(user_id)
+        if entry is None:
+            return False, None
+        expires_at, adjacency = entry
+        if expires_at < time.monotonic():
+            del self._users[user_id]
+            return False, None
+        self._users.move_to_end(user_id)
+        return True, adjacency
+
+    def set(self, user_id: UUID, adjacency: Optional[Adjacency]) -> None:
+        self._users[user_id] = (time.monotonic() + self.ttl, adjacency)
+        self._users.move_to_end(user_id)
+        while len(self._users) > self.max_users:
+            self._users.popitem(last=False)
+
+    def invalidate(self, user_id: UUID) -> None:
+        self._users.pop(user_id, None)
+
+
+adjacency_cache = AdjacencyCache(settings.GRAPH_CACHE_MAX_USERS, settings.GRAPH_CACHE_TTL_SECONDS)
+
+
+def build_adjacency(edges: Sequence[Edge]) -> Adjacency:
+    adjacency: Adjacency = {}
+    for edge in edges:
+        source_id, target_id = edge[0], edge[1]
+        adjacency.setdefault(source_id, []).append((target_id, edge))
+        adjacency.setdefault(target_id, []).append((source_id, edge))
+    return adjacency
+
+
+def walk(
+    adjacency: Adjacency,
+    root_id: UUID,
+    depth: int,
+    types: Optional[Set[str]] = None
+) -> Tuple[Dict[UUID, int], Set[Edge]]:
+    """广度优先遍历 depth 跳以内的邻域，返回 (节点 -> 最短跳数, 遍历到的边)
+
+    与 GRAPH_SQL 的结果一致：边是从 depth 跳以内的节点出发能走到的所有边。
+    """
+    nodes = {root_id: 0}
+    edges: Set[Edge] = set()
+    frontier = [root_id]
+    for level in range(1, depth + 1):
+        next_frontier = []
+        for node_id in frontier:
+            for neighbor, edge in adjacency.get(node_id, ()):
+                if types and edge[2] not in types:
+                    continue
+                edges.add(edge)
+                if neighbor not in nodes:
+                    nodes[neighbor] = level
+                    next_frontier.append(neighbor)
+        frontier = next_frontier
+    return nodes, edges
+
+
+class GraphService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    async def get_graph(
+        self,
+        user_id: UUID,
+        root_id: UUID,
+        depth: int,
+        types: Optional[Sequence[str]] = None
+    ) -> Tuple[List, Set[Edge]]:
+        """获取记忆 depth 跳以内的关联图，返回 (节点行, 边)
+
+        节点行含 id / depth / content / memory_type / start_time。
+        邻接表已缓存时在内存中遍历，只查一次节点摘要；否则用一条递归 CTE 取回整个邻域。
+        """
+        adjacency = self._adjacency(user_id)
+        if adjacency is None:
+            rows = self.db.execute(sa.text(GRAPH_SQL), {
+                "root_id": root_id,
+                "user_id": user_id,
+                "depth": depth,
+                "types": list(types) if types else None,
+            }).all()
+            nodes = [row for row in rows if row.kind == "node"]
+            edges = {
+                (row.source_id, row.target_id, row.relation_type, row.relation_score)
+                for row in rows if row.kind == "edge"
+            }
+        else:
+            depths, edges = walk(adjacency, root_id, depth, set(types) if types else None)
+            details = {
+                row.id: row for row in self.db.execute(
+                    sa.select(Memory.id, Memory.content, Memory.memory_type, Memory.start_time).where(
+                        Memory.user_id == user_id,
+                        Memory.id.in_(list(depths))
+                    )
+                )
+            }
+            nodes = [
+                _GraphNode(node_id, node_depth, details.get(node_id))
+                for node_id, node_depth in depths.items()
+            ]
+
+        root = next(node for node in nodes if node.depth == 0)
+        if root.content is None:
+            raise HTTPException(status_code=404, detail="Memory not found")
+        return nodes, edges
+
+    async def add_relation(
+        self,
+        user_id: UUID,
+        source_id: UUID,
+        target_id: UUID,
+        relation_type: str,
+        relation_score: float = 0.0
+    ) -> Edge:
+        """添加（或更新分数）一条关联边"""
+        if source_id == target_id:
+            raise HTTPException(status_code=400, detail="Cannot relate a memory to itself")
+        found = self.db.execute(
+            sa.select(sa.func.count(sa.distinct(Memory.id))).where(
+                Memory.user_id == user_id,
+                Memory.id.in_([source_id, target_id])
+            )
+        ).scalar()
+        if found != 2:
+            raise HTTPException(status_code=404, detail="Memory not found")
+
+        self.db.execute(
+            insert(memory_relations).values(
+                source_id=source_id,
+                target_id=target_id,
+                relation_type=relation_type,
+                relation_score=relation_score,
+                user_id=user_id
+            ).on_conflict_do_update(
+                index_elements=["source_id", "target_id", "relation_type"],
+                set_={"relation_score": relation_score}
+            )
+        )
+        self.db.commit()
+        adjacency_cache.invalidate(user_id)
+        return source_id, target_id, relation_type, relation_score
+
+    def remove_memory(self, user_id: UUID, memory_id: UUID) -> None:
+        """删除记忆时一并删除它的关联边（不提交，由调用方提交）"""
+        table = memory_relations.c
+        self.db.execute(
+            sa.delete(memory_relations).where(
+                table.user_id == user_id,
+                sa.or_(table.source_id == memory_id, table.target_id == memory_id)
+            )
+        )
+        adjacency_cache.invalidate(user_id)
+
+    def _adjacency(self, user_id: UUID) -> Optional[Adjacency]:
+        """用户的邻接表；边数超过上限时返回 None"""
+        hit, adjacency = adjacency_cache.get(user_id)
+        if hit:
+            return adjacency
+
+        table = memory_relations.c
+        edges = self.db.execute(
+            sa.select(table.source_id, table.target_id, table.relation_type, table.relation_score)
+            .where(table.user_id == user_id)
+            .limit(settings.GRAPH_CACHE_MAX_EDGES + 1)
+        ).all()
+        if len(edges) > settings.GRAPH_CACHE_MAX_EDGES:
+            logger.info(f"用户 {user_id} 的关联边超过 {settings.GRAPH_CACHE_MAX_EDGES} 条，不缓存邻接表")
+            adjacency = None
+        else:
+            adjacency = build_adjacency([tuple(edge) for edge in edges])
+        adjacency_cache.set(user_id, adjacency)
+        return adjacency
+
+
+class _GraphNode:
+    """缓存路径下的节点行，属性与 GRAPH_SQL 的节点行一致"""
+    __slots__ = ("id", "depth", "content", "memory_type", "start_time")
+
+    def __init__(self, node_id: UUID, depth: int, detail) -> None:
+        self.id = node_id
+        self.depth = depth
+        self.content = detail.content if detail else None
+        self.memory_type = detail.memory_type.value if detail else None
+        self.start_time = detail.start_time if detail else None
@@ -0,0 +1,183 @@
+from datetime import date, datetime, timedelta
+from typing import Optional, Tuple
+from uuid import UUID
+
+import numpy as np
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.logger import setup_logger
+from app.db.models.enums import MemoryType
+from app.db.models.heatmap import HeatmapRollup
+from app.db.models.memory import Memory
+from app.services.archive_service import ArchiveService
+from app.services.interval_engine import merge_intervals, rows_to_arrays, split_by_hour
+from app.services.tag_service import TagService
+from app.services.timeline_service import MAX_ACTIVITY_SPAN
+
+logger = setup_logger("heatmap")
+
+ALL_ACTIVITIES = 0  # heatmap_rollup.tag_id：不按标签过滤
+EPOCH = date(1970, 1, 1)
+
+
+class HeatmapService:
+    """按星期 x 小时统计活动时长
+
+    每个活动的 [start_time, end_time) 按整点切分（跨午夜的活动分到两天），
+    同一标签下并行的活动先取并集，重叠部分只算一次。
+    已结束的日期（前天及更早、且没有仍在进行的活动）按天汇总到 heatmap_rollup，
+    重复查询只需读取汇总行。
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    async def get_heatmap(
+        self,
+        user_id: UUID,
+        start_date: date,
+        end_date: date,
+        tag: Optional[str] = None
+    ) -> np.ndarray:
+        """返回 7 x 24 的秒数矩阵，行是星期一到星期日，列是 0~23 点"""
+        heat = np.zeros((7, 24))
+        tag_id = ALL_ACTIVITIES
+        if tag:
+            tag_ids = TagService(self.db).ids_for(user_id, [tag], create=False)
+            if not tag_ids:
+                return heat
+            tag_id = tag_ids[0]
+
+        live_from = start_date
+        if settings.HEATMAP_ROLLUP_ENABLED:
+            settled_until = min(end_date, self.settled_until())
+            if start_date <= settled_until:
+                self._add_days(heat, *self._rolled_days(user_id, tag_id, start_date, settled_until))
+                live_from = settled_until + timedelta(days=1)
+
+        if live_from <= end_date:
+            first_day, matrix, _ = self._compute_days(user_id, tag_id, live_from, end_date)
+            self._add_days(heat, first_day, matrix)
+        return heat
+
+    @staticmethod
+    def settled_until() -> date:
+        """可以汇总的最后一天：昨天的活动可能还没结束，只汇总前天及更早"""
+        return date.today() - timedelta(days=2)
+
+    def invalidate(self, memory) -> None:
+        """修改或删除历史记忆后，删除它覆盖的日期的汇总（随调用方事务提交）"""
+        if memory.start_time is None or memory.start_time.date() > self.settled_until():
+            return
+        last_day = (memory.end_time or memory.start_time).date()
+        self.db.execute(
+            sa.delete(HeatmapRollup).where(
+                HeatmapRollup.user_id == memory.user_id,
+                HeatmapRollup.day >= memory.start_time.date(),
+                HeatmapRollup.day <= last_day
+            )
+        )
+
+    def _rolled_days(
+        self,
+        user_id: UUID,
+        tag_id: int,
+        first_day: date,
+        last_day: date
+    ) -> Tuple[date, np.ndarray]:
+        """读取 [first_day, last_day] 的汇总，缺失的日期现算并写回"""
+        matrix = np.zeros(((last_day - first_day).days + 1, 24))
+        rolled = np.zeros(len(matrix), dtype=bool)
+        for day, hours in self.db.execute(
+            sa.select(HeatmapRollup.day, HeatmapRollup.hours).where(
+                HeatmapRollup.user_id == user_id,
+                HeatmapRollup.tag_id == tag_id,
+                HeatmapRollup.day >= first_day,
+                HeatmapRollup.day <= last_day
+            )
+        ):
+            matrix[(day - first_day).days] = hours
+            rolled[(day - first_day).days] = True
+
+        missing = np.flatnonzero(~rolled)
+        if len(missing) == 0:
+            return first_day, matrix
+
+        lo = first_day + timedelta(days=int(missing[0]))
+        hi = first_day + timedelta(days=int(missing[-1]))
+        computed_from, computed, unsettled_from = self._compute_days(user_id, tag_id, lo, hi)
+        offset = (computed_from - first_day).days
+        values = []
+        for index in missing:
+            day = first_day + timedelta(days=int(index))
+            matrix[index] = computed[index - offset]
+            # 有仍在进行的活动覆盖的日期，结果会随活动结束而变化，不写汇总
+            if unsettled_from is None or day < unsettled_from:
+                values.append({
+                    "user_id": user_id,
+                    "tag_id": tag_id,
+                    "day": day,
+                    "hours": matrix[index].tolist(),
+                })
+        if values:
+            self.db.execute(insert(HeatmapRollup).values(values).on_conflict_do_nothing())
+            self.db.commit()
+            logger.info(f"热力图汇总: 用户 {user_id} 标签 {tag_id} 新增 {len(values)} 天")
+        return first_day, matrix
+
+    def _compute_days(
+        self,
+        user_id: UUID,
+        tag_id: int,
+        first_day: date,
+        last_day: date
+    ) -> Tuple[date, np.ndarray, Optional[date]]:
+        """从原始记录计算 [first_day, last_day] 每天每小时的活动秒数
+
+        返回 (first_day, 天数 x 24 的矩阵, 仍在进行的活动最早开始的日期)。
+        """
+        window_start = datetime.combine(first_day, datetime.min.time())
+        window_end = datetime.combine(last_day + timedelta(days=1), datetime.min.time())
+        conditions = [
+            Memory.user_id == user_id,
+            Memory.memory_type == MemoryType.TIMELINE,
+            Memory.start_time >= window_start - MAX_ACTIVITY_SPAN,
+            Memory.start_time < window_end
+        ]
+        if tag_id != ALL_ACTIVITIES:
+            conditions.append(Memory.tag_ids.contains([tag_id]))
+        rows = self.db.execute(
+            sa.select(Memory.start_time, Memory.end_time).where(*conditions)
+        ).all()
+
+        archive = ArchiveService(self.db)
+        if archive.covers(window_start - MAX_ACTIVITY_SPAN):
+            rows += [
+                row for row in archive.find_range(
+                    user_id, MemoryType.TIMELINE,
+                    window_start - MAX_ACTIVITY_SPAN, window_end,
+                    columns=["start_time", "end_time", "tag_ids"]
+                )
+                if tag_id == ALL_ACTIVITIES or tag_id in (row.tag_ids or ())
+            ]
+
+        unsettled_from = min(
+            (row.start_time.date() for row in rows if row.end_time is None),
+            default=None
+        )
+        starts, ends, _ = rows_to_arrays(rows, now=datetime.now(), window=(window_start, window_end))
+        hours, seconds = split_by_hour(*merge_intervals(starts, ends))
+
+        days = (last_day - first_day).days + 1
+        cells = hours - (first_day - EPOCH).days * 24
+        matrix = np.bincount(cells, weights=seconds, minlength=days * 24)[:days * 24]
+        return first_day, matrix.reshape(days, 24), unsettled_from
+
+    @staticmethod
+    def _add_days(heat: np.ndarray, first_day: date, matrix: np.ndarray) -> None:
+        """把按天的矩阵累加到星期 x 小时"""
+        weekdays = (np.arange(len(matrix)) + first_day.weekday()) % 7
+        np.add.at(heat, weekdays, matrix)
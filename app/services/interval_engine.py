@@ -0,0 +1,173 @@
+"""
+区间并集引擎
+
+并行活动会互相重叠，直接累加 duration 会重复计算重叠部分。
+这里把活动转换为 NumPy 的开始/结束时间数组，用排序扫描线一次算出：
+- union_seconds：所有活动覆盖的真实时长（并集）
+- 每个分组的时长（组内并集）和独占时长（只有该组在进行的时长）
+- 分组之间的重叠矩阵
+- 按整点切分区间，用于按星期 x 小时统计的热力图
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+DEFAULT_GROUP = "default"
+SECONDS_PER_HOUR = 3600
+EPOCH_WEEKDAY = 3
+
+
+@dataclass
+class IntervalSummary:
+    """区间统计结果（单位：秒）"""
+    total_seconds: float            # 各区间长度之和（会重复计算重叠部分）
+    union_seconds: float            # 并集时长
+    groups: List[str]
+    group_seconds: np.ndarray       # 每组的组内并集时长
+    exclusive_seconds: np.ndarray   # 每组的独占时长
+    overlap: np.ndarray             # overlap[i, j]：组 i 与组 j 同时进行的时长，对角线等于 group_seconds
+
+
+def to_seconds(values: Sequence[datetime]) -> np.ndarray:
+    """datetime 序列转为以秒为单位的 float64 数组"""
+    return np.asarray(values, dtype="datetime64[us]").astype(np.int64) / 1e6
+
+
+def from_seconds(values: np.ndarray) -> List[datetime]:
+    """to_seconds 的逆运算"""
+    return np.round(np.asarray(values) * 1e6).astype(np.int64).astype("datetime64[us]").tolist()
+
+
+def rows_to_arrays(
+    rows: Iterable,
+    now: Optional[datetime] = None,
+    window: Optional[Tuple[datetime, datetime]] = None
+) -> Tuple[np.ndarray, np.ndarray, List[Optional[str]]]:
+    """从含 start_time / end_time（可选 parallel_group）的行构建区间数组
+
+    进行中的活动（end_time 为空）截止到 now；未给 now 时忽略。
+    给定 window 时把区间裁剪到窗口内。
+    """
+    starts, ends, groups = [], [], []
+    for row in rows:
+        end = row.end_time or now
+        if row.start_time is None or end is None:
+            continue
+        starts.append(row.start_time)
+        ends.append(end)
+        groups.append(getattr(row, "parallel_group", None))
+
+    start_arr = to_seconds(starts)
+    end_arr = to_seconds(ends)
+    if window is not None:
+        lo, hi = to_seconds(window)
+        start_arr = np.clip(start_arr, lo, hi)
+        end_arr = np.clip(end_arr, lo, hi)
+    return start_arr, end_arr, groups
+
+
+def merge_intervals(starts: np.ndarray, ends: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """合并重叠区间，返回按开始时间排序、互不重叠的区间"""
+    valid = ends > starts
+    if not valid.any():
+        return np.zeros(0), np.zeros(0)
+    starts, ends = starts[valid], ends[valid]
+    order = np.argsort(starts, kind="stable")
+    starts, ends = starts[order], ends[order]
+    # 开始时间晚于此前所有区间最大结束时间的区间，开启一个新的连通块
+    reach = np.maximum.accumulate(ends)
+    block_heads = np.flatnonzero(np.r_[True, starts[1:] > reach[:-1]])
+    return starts[block_heads], np.maximum.reduceat(ends, block_heads)
+
+
+def union_seconds(starts: np.ndarray, ends: np.ndarray) -> float:
+    """区间并集总时长"""
+    block_starts, block_ends = merge_intervals(starts, ends)
+    return float((block_ends - block_starts).sum())
+
+
+def split_by_hour(starts: np.ndarray, ends: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """把区间按整点切开
+
+    返回 (小时编号, 该小时内的秒数)，小时编号为 to_seconds 时间轴上的 floor(秒 / 3600)，
+    跨午夜、跨多小时的区间会拆成多段。区间需先合并（merge_intervals）以免重复计算。
+    """
+    first = np.floor(starts / SECONDS_PER_HOUR).astype(np.int64)
+    last = np.ceil(ends / SECONDS_PER_HOUR).astype(np.int64)
+    spans = np.maximum(last - first, 0)
+
+    # 每个区间展开为 spans 个小时段：段所属区间 + 段在区间内的序号
+    owner = np.repeat(np.arange(len(starts)), spans)
+    offset = np.arange(int(spans.sum())) - np.repeat(np.cumsum(spans) - spans, spans)
+    hours = first[owner] + offset
+    seconds = (
+        np.minimum(ends[owner], (hours + 1) * SECONDS_PER_HOUR)
+        - np.maximum(starts[owner], hours * SECONDS_PER_HOUR)
+    )
+    return hours, seconds
+
+
+def hour_of_week(hours: np.ndarray) -> np.ndarray:
+    """小时编号转为一周内的格子编号：星期一 0 点为 0，星期日 23 点为 167"""
+    days = hours // 24
+    # to_seconds 的零点 1970-01-01 是星期四
+    return (days + EPOCH_WEEKDAY) % 7 * 24 + hours % 24
+
+
+def summarize(
+    starts: np.ndarray,
+    ends: np.ndarray,
+    groups: Sequence[Optional[str]]
+) -> IntervalSummary:
+    """扫描线统计：并集、分组时长、独占时长和重叠矩阵"""
+    valid = ends > starts
+    starts, ends = starts[valid], ends[valid]
+    labels = [group or DEFAULT_GROUP for group, ok in zip(groups, valid) if ok]
+    total = float((ends - starts).sum())
+    if not labels:
+        empty = np.zeros(0)
+        return IntervalSummary(total, 0.0, [], empty, empty, np.zeros((0, 0)))
+
+    # 分组名 -> 编号（按首次出现顺序）
+    index = {}
+    label_ids = np.fromiter(
+        (index.setdefault(label, len(index)) for label in labels),
+        dtype=np.int64,
+        count=len(labels)
+    )
+    names = list(index)
+    k = len(names)
+
+    # 事件：开始 +1，结束 -1；同一时刻先处理结束，保证首尾相接的区间不算重叠
+    times = np.concatenate([starts, ends])
+    deltas = np.concatenate([np.ones(len(starts), dtype=np.int32), -np.ones(len(ends), dtype=np.int32)])
+    event_groups = np.concatenate([label_ids, label_ids])
+    order = np.lexsort((deltas, times))
+    times, deltas, event_groups = times[order], deltas[order], event_groups[order]
+
+    # 每个事件之后各组的进行中数量 (事件数 x 组数)
+    counts = np.zeros((len(times), k), dtype=np.int32)
+    counts[np.arange(len(times)), event_groups] = deltas
+    np.cumsum(counts, axis=0, out=counts)
+
+    # 事件 i 与 i+1 之间的片段
+    lengths = np.diff(times)
+    active = counts[:-1] > 0
+    active_f = active.astype(np.float64)
+
+    any_active = active.any(axis=1)
+    union = float(lengths[any_active].sum())
+    overlap = active_f.T @ (active_f * lengths[:, None])
+    only_one = active.sum(axis=1) == 1
+    exclusive = (active_f[only_one] * lengths[only_one, None]).sum(axis=0)
+
+    return IntervalSummary(
+        total_seconds=total,
+        union_seconds=union,
+        groups=names,
+        group_seconds=np.diag(overlap).copy(),
+        exclusive_seconds=exclusive,
+        overlap=overlap,
+    )
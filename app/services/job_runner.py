@@ -0,0 +1,212 @@
+import asyncio
+import inspect
+import os
+import socket
+import traceback
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.logger import setup_logger
+from app.db.models.enums import JobStatus
+from app.db.session import SessionLocal
+from app.services.cron import CronSchedule
+from app.services.job_service import JobService
+
+logger = setup_logger("jobs")
+
+
+@dataclass
+class JobHandler:
+    """注册的任务类型：concurrency 为单个 worker 进程内同时执行的上限"""
+    job_type: str
+    func: Callable
+    concurrency: int = 1
+    max_attempts: Optional[int] = None
+
+
+@dataclass
+class Schedule:
+    """定时任务：按 cron 表达式（UTC）周期性入队"""
+    name: str
+    cron: CronSchedule
+    job_type: str
+    payload: Dict[str, Any] = field(default_factory=dict)
+    priority: int = 0
+
+
+HANDLERS: Dict[str, JobHandler] = {}
+SCHEDULES: Dict[str, Schedule] = {}
+
+
+def job(job_type: str, concurrency: int = 1, max_attempts: Optional[int] = None):
+    """注册任务处理函数：func(db, payload)，可以是普通函数（在线程池中执行）或协程函数
+
+    返回的字典（如处理条数）记录在任务的 result 中。
+    """
+    def decorator(func: Callable) -> Callable:
+        HANDLERS[job_type] = JobHandler(job_type, func, concurrency, max_attempts)
+        return func
+    return decorator
+
+
+def schedule(name: str, cron: str, job_type: str, payload: Optional[Dict[str, Any]] = None, priority: int = 0) -> None:
+    """注册定时任务"""
+    SCHEDULES[name] = Schedule(name, CronSchedule(cron), job_type, payload or {}, priority)
+
+
+class JobRunner:
+    """进程内的 asyncio 任务 worker
+
+    - 轮询 jobs 表，按各任务类型的空闲并发数用 SKIP LOCKED 领取任务，多个进程共同分担
+    - 同步处理函数放到线程池执行，数据库读写也在线程池中进行，不阻塞事件循环
+    - 定期刷新执行中任务的心跳，回收失联 worker 的任务
+    - 定时任务总是提前把下一次触发入队（unique_key 去重），多个 worker 只会入队一次
+    """
+
+    def __init__(self, worker_id: Optional[str] = None, session_factory: Callable = SessionLocal) -> None:
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.session_factory = session_factory
+        self.active: Dict[str, int] = {}
+        self.running: Dict[int, asyncio.Task] = {}
+        self.processed = 0
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+
+    def start(self) -> None:
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._poll_loop()),
+            asyncio.create_task(self._maintenance_loop()),
+        ]
+        logger.info(f"任务 worker {self.worker_id} 已启动，任务类型: {', '.join(HANDLERS) or '无'}")
+
+    async def stop(self, timeout: float = 30.0) -> None:
+        """停止领取新任务，等待执行中的任务最多 timeout 秒；未完成的任务由心跳超时回收"""
+        self._stopping = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self.running:
+            await asyncio.wait(list(self.running.values()), timeout=timeout)
+        logger.info(f"任务 worker {self.worker_id} 已停止")
+
+    async def _poll_loop(self) -> None:
+        while not self._stopping:
+            free = {
+                job_type: handler.concurrency - self.active.get(job_type, 0)
+                for job_type, handler in HANDLERS.items()
+            }
+            free = {job_type: slots for job_type, slots in free.items() if slots > 0}
+            jobs = []
+            if free:
+                try:
+                    jobs = await asyncio.to_thread(self._claim, free)
+                except Exception as e:
+                    logger.error(f"领取任务失败: {str(e)}")
+
+            for claimed in jobs:
+                self.active[claimed.job_type] = self.active.get(claimed.job_type, 0) + 1
+                self.running[claimed.id] = asyncio.create_task(self._execute(claimed))
+
+            # 领满了就立即继续领取，否则等到有任务结束或轮询间隔到期
+            if not jobs or len(jobs) < sum(free.values()):
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), settings.JOB_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+
+    def _claim(self, free: Dict[str, int]) -> List:
+        db = self.session_factory()
+        try:
+            service = JobService(db)
+            return [
+                claimed
+                for job_type, slots in free.items()
+                for claimed in service.claim(job_type, slots, self.worker_id)
+            ]
+        finally:
+            db.close()
+
+    async def _execute(self, claimed) -> None:
+        handler = HANDLERS[claimed.job_type]
+        try:
+            if inspect.iscoroutinefunction(handler.func):
+                db = self.session_factory()
+                try:
+                    result = await handler.func(db, claimed.payload or {})
+                finally:
+                    db.close()
+            else:
+                result = await asyncio.to_thread(self._call, handler.func, claimed.payload or {})
+            await asyncio.to_thread(self._finish, claimed, None, result)
+        except Exception as e:
+            logger.error(f"任务 {claimed.job_type}#{claimed.id} 第 {claimed.attempts} 次执行失败: {str(e)}")
+            error = "".join(traceback.format_exception(e))[-4000:]
+            try:
+                await asyncio.to_thread(self._finish, claimed, error)
+            except Exception as finish_error:
+                logger.error(f"记录任务 {claimed.id} 失败状态出错: {str(finish_error)}")
+        finally:
+            self.active[claimed.job_type] -= 1
+            self.running.pop(claimed.id, None)
+            self.processed += 1
+            self._wakeup.set()
+
+    def _call(self, func: Callable, payload: Dict[str, Any]) -> Any:
+        db = self.session_factory()
+        try:
+            return func(db, payload)
+        finally:
+            db.close()
+
+    def _finish(self, claimed, error: Optional[str], result: Any = None) -> None:
+        db = self.session_factory()
+        try:
+            service = JobService(db)
+            if error is None:
+                service.complete(claimed.id, self.worker_id, result if isinstance(result, dict) else None)
+            elif service.fail(claimed, self.worker_id, error) == JobStatus.FAILED:
+                logger.error(f"任务 {claimed.job_type}#{claimed.id} 重试次数用尽")
+        finally:
+            db.close()
+
+    async def _maintenance_loop(self) -> None:
+        """心跳、回收失联任务、定时任务入队，间隔为心跳超时的三分之一（最长一分钟）"""
+        interval = min(settings.JOB_LOCK_TIMEOUT_SECONDS / 3, 60)
+        while not self._stopping:
+            try:
+                await asyncio.to_thread(self._maintain, list(self.running))
+            except Exception as e:
+                logger.error(f"任务维护失败: {str(e)}")
+            await asyncio.sleep(interval)
+
+    def _maintain(self, running_ids: List[int]) -> None:
+        db = self.session_factory()
+        try:
+            service = JobService(db)
+            service.heartbeat(running_ids, self.worker_id)
+            requeued = service.requeue_stale()
+            if requeued:
+                logger.warning(f"回收了 {requeued} 个心跳超时的任务")
+            now = datetime.utcnow()
+            for item in SCHEDULES.values():
+                fire_at = item.cron.next_after(now)
+                service.enqueue(
+                    item.job_type,
+                    item.payload,
+                    priority=item.priority,
+                    run_at=fire_at,
+                    max_attempts=HANDLERS[item.job_type].max_attempts if item.job_type in HANDLERS else None,
+                    unique_key=f"cron:{item.name}:{fire_at.isoformat()}"
+                )
+            db.commit()
+        finally:
+            db.close()
+
+
+job_runner = JobRunner()
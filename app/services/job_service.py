@@ -0,0 +1,197 @@
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence
+
+import sqlalchemy as sa
+from fastapi import HTTPException
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models.enums import JobStatus
+from app.db.models.job import Job
+
+# 任务时间统一取数据库时钟（UTC），避免各 worker 时钟不一致
+UTC_NOW = sa.func.timezone("utc", sa.func.now())
+
+JOB_COLUMNS = (Job.id, Job.job_type, Job.payload, Job.attempts, Job.max_attempts)
+
+
+def retry_delay(attempts: int) -> float:
+    """第 attempts 次失败后的重试等待秒数：指数退避，带 50% 随机抖动"""
+    delay = min(settings.JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1), settings.JOB_RETRY_MAX_SECONDS)
+    return delay * random.uniform(0.5, 1.0)
+
+
+class JobService:
+    """jobs 表的读写：入队、领取、完成 / 失败、回收和状态统计"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def enqueue(
+        self,
+        job_type: str,
+        payload: Optional[Dict[str, Any]] = None,
+        priority: int = 0,
+        run_at: Optional[datetime] = None,
+        max_attempts: Optional[int] = None,
+        unique_key: Optional[str] = None
+    ) -> Optional[int]:
+        """任务入队（随调用方事务提交），返回任务 ID；unique_key 已存在时不重复入队，返回 None"""
+        stmt = insert(Job).values(
+            job_type=job_type,
+            payload=payload or {},
+            priority=priority,
+            status=JobStatus.QUEUED,
+            attempts=0,
+            max_attempts=max_attempts or settings.JOB_DEFAULT_MAX_ATTEMPTS,
+            run_at=run_at if run_at is not None else UTC_NOW,
+            unique_key=unique_key,
+        )
+        if unique_key is not None:
+            stmt = stmt.on_conflict_do_nothing(index_elements=["unique_key"])
+        return self.db.execute(stmt.returning(Job.id)).scalar()
+
+    def claim(self, job_type: str, limit: int, worker_id: str) -> List:
+        """领取最多 limit 个已到期的任务并提交
+
+        SKIP LOCKED 跳过其他 worker 正在领取的行，多个 worker 并发领取互不阻塞、也不会重复领取。
+        """
+        batch = sa.select(Job.id).where(
+            Job.status == JobStatus.QUEUED,
+            Job.job_type == job_type,
+            Job.run_at <= UTC_NOW
+        ).order_by(
+            Job.priority.desc(), Job.run_at
+        ).limit(limit).with_for_update(skip_locked=True).cte("batch")
+
+        jobs = self.db.execute(
+            sa.update(Job).where(Job.id == batch.c.id).values(
+                status=JobStatus.RUNNING,
+                attempts=Job.attempts + 1,
+                locked_by=worker_id,
+                locked_at=UTC_NOW,
+                updated_at=UTC_NOW
+            ).returning(*JOB_COLUMNS)
+        ).all()
+        self.db.commit()
+        return jobs
+
+    def complete(self, job_id: int, worker_id: str, result: Optional[Dict[str, Any]] = None) -> None:
+        self._finish(
+            job_id, worker_id,
+            status=JobStatus.SUCCEEDED, finished_at=UTC_NOW, last_error=None, result=result
+        )
+
+    def fail(self, job, worker_id: str, error: str) -> JobStatus:
+        """记录失败：还有重试次数时按退避时间重新排队，否则标记为失败"""
+        if job.attempts < job.max_attempts:
+            status = JobStatus.QUEUED
+            values = {"run_at": UTC_NOW + timedelta(seconds=retry_delay(job.attempts))}
+        else:
+            status = JobStatus.FAILED
+            values = {"finished_at": UTC_NOW}
+        self._finish(job.id, worker_id, status=status, last_error=error, **values)
+        return status
+
+    def heartbeat(self, job_ids: Sequence[int], worker_id: str) -> None:
+        """刷新正在执行的任务的 locked_at，避免被当作失联任务回收"""
+        if not job_ids:
+            return
+        self.db.execute(
+            sa.update(Job).where(
+                Job.id.in_(job_ids),
+                Job.locked_by == worker_id,
+                Job.status == JobStatus.RUNNING
+            ).values(locked_at=UTC_NOW)
+        )
+        self.db.commit()
+
+    def requeue_stale(self) -> int:
+        """回收心跳超时（worker 崩溃或失联）的任务：还有重试次数的重新排队，否则标记为失败"""
+        stale = sa.and_(
+            Job.status == JobStatus.RUNNING,
+            Job.locked_at < UTC_NOW - timedelta(seconds=settings.JOB_LOCK_TIMEOUT_SECONDS)
+        )
+        error = f"lock timeout after {settings.JOB_LOCK_TIMEOUT_SECONDS}s"
+        total = 0
+        for exhausted, values in (
+            (True, {"status": JobStatus.FAILED, "finished_at": UTC_NOW}),
+            (False, {"status": JobStatus.QUEUED}),
+        ):
+            condition = Job.attempts >= Job.max_attempts if exhausted else Job.attempts < Job.max_attempts
+            total += self.db.execute(
+                sa.update(Job).where(stale, condition).values(
+                    locked_by=None, last_error=error, updated_at=UTC_NOW, **values
+                )
+            ).rowcount
+        self.db.commit()
+        return total
+
+    def purge(self, keep_days: Optional[int] = None) -> int:
+        """删除早于 keep_days 天完成的成功任务"""
+        keep_days = settings.JOB_KEEP_DAYS if keep_days is None else keep_days
+        result = self.db.execute(
+            sa.delete(Job).where(
+                Job.status == JobStatus.SUCCEEDED,
+                Job.finished_at < UTC_NOW - timedelta(days=keep_days)
+            )
+        )
+        self.db.commit()
+        return result.rowcount
+
+    def summary(self) -> List:
+        """按任务类型统计各状态的任务数，以及最早一个已到期排队任务的等待秒数"""
+        queued_due = sa.and_(Job.status == JobStatus.QUEUED, Job.run_at <= UTC_NOW)
+        counts = [
+            sa.func.count().filter(Job.status == status).label(status.name.lower())
+            for status in JobStatus
+        ]
+        return self.db.execute(
+            sa.select(
+                Job.job_type,
+                *counts,
+                sa.func.extract("epoch", UTC_NOW - sa.func.min(Job.run_at).filter(queued_due)).label("oldest_due_seconds")
+            ).group_by(Job.job_type).order_by(Job.job_type)
+        ).all()
+
+    def list(
+        self,
+        status: Optional[JobStatus] = None,
+        job_type: Optional[str] = None,
+        limit: int = 50
+    ) -> List[Job]:
+        """最近更新的任务"""
+        query = self.db.query(Job)
+        if status is not None:
+            query = query.filter(Job.status == status)
+        if job_type is not None:
+            query = query.filter(Job.job_type == job_type)
+        return query.order_by(Job.updated_at.desc(), Job.id.desc()).limit(limit).all()
+
+    async def retry(self, job_id: int) -> Job:
+        """手动重试任务：立即重新排队并重置重试次数"""
+        job = self.db.query(Job).filter(Job.id == job_id).with_for_update().first()
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+        if job.status == JobStatus.RUNNING:
+            raise HTTPException(status_code=409, detail="Job is running")
+        job.status = JobStatus.QUEUED
+        job.attempts = 0
+        job.run_at = datetime.utcnow()
+        job.finished_at = None
+        self.db.commit()
+        self.db.refresh(job)
+        return job
+
+    def _finish(self, job_id: int, worker_id: str, **values) -> None:
+        # 只更新仍由本 worker 持有的任务，任务被回收后迟到的结果直接丢弃
+        self.db.execute(
+            sa.update(Job).where(
+                Job.id == job_id,
+                Job.locked_by == worker_id,
+                Job.status == JobStatus.RUNNING
+            ).values(locked_by=None, updated_at=UTC_NOW, **values)
+        )
+        self.db.commit()
@@ -0,0 +1,79 @@
+"""维护类后台任务：注册处理函数和定时计划，由 JobRunner 执行
+
+导入本模块即完成注册（见 app/main.py）。cron 表达式按 UTC。
+"""
+from datetime import date
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.logger import setup_logger
+from app.db.partitions import ensure_partitions, is_partitioned
+from app.db.shards import shard_router
+from app.services.archive_service import ArchiveService
+from app.services.auth_service import AuthService
+from app.services.dedupe_service import DedupeService
+from app.services.job_runner import job, schedule
+from app.services.job_service import JobService
+from app.services.sweeper_service import SweeperService
+
+logger = setup_logger("maintenance")
+
+
+@job("partitions.ensure")
+def ensure_memory_partitions(db: Session, payload: dict) -> None:
+    """提前创建各库 memories 未来几个月的分区"""
+    months_ahead = payload.get("months_ahead", settings.MEMORY_PARTITION_MONTHS_AHEAD)
+    for name, shard_db in shard_router.each(db):
+        conn = shard_db.connection()
+        if is_partitioned(conn):
+            created = ensure_partitions(conn, date.today(), months_ahead)
+            shard_db.commit()
+            if created:
+                logger.info(f"已创建分区（{name}）: {', '.join(created)}")
+
+
+@job("archive.run")
+def archive_memories(db: Session, payload: dict) -> None:
+    """把各库超过保留期的记忆搬到归档表"""
+    for name, shard_db in shard_router.each(db):
+        total = ArchiveService(shard_db).archive_before(batch_size=payload.get("batch_size"))
+        logger.info(f"归档完成（{name}），共 {total} 条")
+
+
+@job("dedupe.history")
+def dedupe_history(db: Session, payload: dict) -> None:
+    """补齐各库的内容签名并标记历史近似重复"""
+    for name, shard_db in shard_router.each(db):
+        processed, flagged = DedupeService(shard_db).dedupe_history(batch_size=payload.get("batch_size"))
+        logger.info(f"去重完成（{name}），共处理 {processed} 条，标记 {flagged} 条")
+
+
+@job("timeline.sweep")
+def sweep_stale_activities(db: Session, payload: dict) -> dict:
+    """结束各库遗留的进行中活动，返回关闭条数等统计（各库合计）"""
+    stats: dict = {}
+    for _, shard_db in shard_router.each(db):
+        for key, value in SweeperService(shard_db).sweep(batch_size=payload.get("batch_size")).items():
+            stats[key] = stats.get(key, 0) + value
+    return stats
+
+
+@job("jobs.purge")
+def purge_jobs(db: Session, payload: dict) -> None:
+    """清理早于保留期的成功任务"""
+    JobService(db).purge(payload.get("keep_days"))
+
+
+@job("auth.purge")
+def purge_tokens(db: Session, payload: dict) -> dict:
+    """清理过期的刷新令牌和作废记录"""
+    return AuthService(db).purge()
+
+
+schedule("partitions", "0 1 * * *", "partitions.ensure")
+schedule("archive", "0 3 * * *", "archive.run")
+schedule("dedupe", "0 4 * * 0", "dedupe.history")
+schedule("purge", "30 2 * * *", "jobs.purge")
+schedule("auth-purge", "45 2 * * *", "auth.purge")
+schedule("sweep", settings.SWEEP_CRON, "timeline.sweep")
@@ -0,0 +1,280 @@
+"""分片运维：对每个库执行 Alembic 迁移、在线迁移用户、查看分布
+
+用法：
+    python -m app.services.shard_service migrate [--revision head]
+    python -m app.services.shard_service move <user_id> <分片名>
+    python -m app.services.shard_service status
+"""
+import argparse
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+from uuid import UUID
+
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+import app.db.models  # noqa: F401  注册所有表到 Base.metadata
+from app.core.config import settings
+from app.core.logger import setup_logger
+from app.db.models.base import Base
+from app.db.models.dream import Dream
+from app.db.models.shard import UserShard
+from app.db.models.user import User
+from app.db.shards import GLOBAL_SHARD, ID_STRIDE, SHARD_USER_COLUMNS, shard_router
+
+logger = setup_logger("shard_service")
+
+# 按用户划分的表，按外键依赖排序：复制时正序，删除时倒序
+USER_TABLES = (
+    "users",
+    "tags",
+    "memories",
+    "memory_relations",
+    "memory_archive",
+    "goal_progress",
+    "dreams",
+    "dream_progress",
+    "preset_timepoints",
+    "templates",
+    "heatmap_rollup",
+)
+
+# 分片中 users 副本上以分片为准的列（按用户规则的查询在分片内读写），迁回全局库时只合并这些列
+USER_SETTING_COLUMNS = ("ongoing_max_hours", "ongoing_sweep_mode")
+
+MOVE_ATTEMPTS = 3
+
+
+def user_filter(table: sa.Table, user_id: UUID):
+    if table.name == "users":
+        return table.c.id == user_id
+    if table.name == "dream_progress":
+        return table.c.dream_id.in_(sa.select(Dream.id).where(Dream.user_id == user_id))
+    return table.c.user_id == user_id
+
+
+class ShardMoveService:
+    """在线迁移用户数据到另一个分片
+
+    1. 目录标记为迁移中，等待各 worker 的目录缓存过期，此后该用户的写请求返回 503；
+    2. 按表批量复制（upsert），比较行数和 max(updated_at)，不一致时重新复制（后台任务可能仍在改源数据）；
+    3. 目录切换到目标分片，再等待一个缓存周期，让仍按旧目录读源分片的请求结束；
+    4. 删除源分片中的数据（源为全局库时保留 users 行）。
+
+    任一步失败时恢复目录，源数据保持不变，可以直接重试。
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def locate(self, user_id: UUID) -> str:
+        row = self.db.execute(sa.select(UserShard.shard).where(UserShard.user_id == user_id)).first()
+        return row.shard if row else GLOBAL_SHARD
+
+    def set_directory(self, user_id: UUID, shard: str, moving: bool) -> None:
+        stmt = insert(UserShard).values(user_id=user_id, shard=shard, moving=moving)
+        self.db.execute(stmt.on_conflict_do_update(
+            index_elements=[UserShard.user_id],
+            set_={"shard": shard, "moving": moving, "updated_at": sa.func.timezone("utc", sa.func.now())},
+        ))
+        self.db.commit()
+        shard_router.directory.invalidate(user_id)
+
+    def move(self, user_id: UUID, target: str, wait: Optional[float] = None) -> Dict[str, int]:
+        """把用户数据迁移到 target 分片，返回各表复制的行数"""
+        if target not in shard_router.shards:
+            raise ValueError(f"Unknown shard: {target}")
+        if self.db.get(User, user_id) is None:
+            raise ValueError(f"User not found: {user_id}")
+        source = self.locate(user_id)
+        if source == target:
+            return {}
+        wait = settings.SHARD_DIRECTORY_TTL_SECONDS + 1 if wait is None else wait
+
+        self.set_directory(user_id, source, moving=True)
+        logger.info(f"迁移用户 {user_id}: {source} -> {target}，等待 {wait}s 让目录缓存过期")
+        time.sleep(wait)
+
+        src = shard_router.shards[source].session_factory()
+        dst = shard_router.shards[target].session_factory()
+        try:
+            # 清掉之前中断的迁移留下的数据
+            self.delete(dst, user_id, keep_user=True)
+            for attempt in range(1, MOVE_ATTEMPTS + 1):
+                copied = {name: self.copy(src, dst, name, user_id, target) for name in USER_TABLES}
+                dst.commit()
+                mismatched = self.compare(src, dst, user_id, skip_users=target == GLOBAL_SHARD)
+                if not mismatched:
+                    break
+                logger.warning(f"第 {attempt} 次复制后数据不一致: {', '.join(mismatched)}")
+            else:
+                raise RuntimeError(f"Data mismatch after {MOVE_ATTEMPTS} attempts: {', '.join(mismatched)}")
+            self.set_directory(user_id, target, moving=False)
+        except Exception:
+            dst.rollback()
+            self.set_directory(user_id, source, moving=False)
+            raise
+        finally:
+            dst.close()
+
+        try:
+            time.sleep(wait)
+            self.delete(src, user_id, keep_user=source == GLOBAL_SHARD)
+            src.commit()
+        finally:
+            src.close()
+        logger.info(f"迁移用户 {user_id} 完成: {copied}")
+        return copied
+
+    def copy(self, src: Session, dst: Session, name: str, user_id: UUID, target: str) -> int:
+        table = Base.metadata.tables[name]
+        if name == "users":
+            return self.copy_user_row(src, dst, user_id, target)
+        update_columns = [column.name for column in table.columns if not column.primary_key]
+        stmt = insert(table)
+        if update_columns:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[column.name for column in table.primary_key],
+                set_={column: stmt.excluded[column] for column in update_columns},
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing()
+
+        result = src.execute(
+            sa.select(table).where(user_filter(table, user_id))
+            .execution_options(yield_per=settings.SHARD_MOVE_BATCH_SIZE)
+        )
+        copied = 0
+        for rows in result.partitions():
+            dst.execute(stmt, [dict(row._mapping) for row in rows])
+            copied += len(rows)
+        return copied
+
+    def copy_user_row(self, src: Session, dst: Session, user_id: UUID, target: str) -> int:
+        """复制 users 行：分片上只保存 SHARD_USER_COLUMNS，不复制凭据
+
+        全局库的 users 行是认证数据的来源且总是存在，迁回全局库时只合并分片上维护的设置列。
+        """
+        table = User.__table__
+        row = src.execute(
+            sa.select(*[table.c[name] for name in SHARD_USER_COLUMNS]).where(table.c.id == user_id)
+        ).first()
+        if row is None:
+            return 0
+        values = dict(row._mapping)
+        if target == GLOBAL_SHARD:
+            dst.execute(
+                sa.update(table).where(table.c.id == user_id)
+                .values(**{name: values[name] for name in USER_SETTING_COLUMNS})
+            )
+            return 1
+        stmt = insert(table).values(**values)
+        dst.execute(stmt.on_conflict_do_update(
+            index_elements=[table.c.id],
+            set_={name: stmt.excluded[name] for name in values if name != "id"},
+        ))
+        return 1
+
+    def compare(self, src: Session, dst: Session, user_id: UUID, skip_users: bool) -> Iterable[str]:
+        """行数或 max(updated_at) 不一致的表"""
+        mismatched = []
+        for name in USER_TABLES:
+            if name == "users" and skip_users:
+                continue
+            table = Base.metadata.tables[name]
+            columns = [sa.func.count()]
+            # users 副本不复制时间戳，只比较行数
+            if "updated_at" in table.c and name != "users":
+                columns.append(sa.func.max(table.c.updated_at))
+            query = sa.select(*columns).select_from(table).where(user_filter(table, user_id))
+            if tuple(src.execute(query).one()) != tuple(dst.execute(query).one()):
+                mismatched.append(name)
+        return mismatched
+
+    def delete(self, db: Session, user_id: UUID, keep_user: bool) -> None:
+        for name in reversed(USER_TABLES):
+            if name == "users" and keep_user:
+                continue
+            table = Base.metadata.tables[name]
+            db.execute(sa.delete(table).where(user_filter(table, user_id)))
+
+
+def migrate_shards(revision: str = "head") -> None:
+    """对全局库和每个分片执行 Alembic 迁移，然后错开各库的 tags.id 序列"""
+    from alembic import command
+    from alembic.config import Config
+
+    root = Path(__file__).resolve().parents[2]
+    for name, shard in shard_router.shards.items():
+        config = Config(str(root / "alembic.ini"))
+        config.set_main_option("script_location", str(root / "alembic"))
+        config.attributes["url"] = shard.engine.url.render_as_string(hide_password=False)
+        config.attributes["shard"] = name
+        logger.info(f"迁移 {name} 到 {revision}")
+        command.upgrade(config, revision)
+    align_tag_sequences()
+
+
+def align_tag_sequences() -> None:
+    """各库的 tags.id 序列按 ID_STRIDE 步长取不同余数，从所有库当前最大 ID 之上开始
+
+    Memory.tag_ids 引用标签 ID，迁移用户时标签原样复制，因此 ID 必须在所有库之间唯一。
+    可重复执行：每次都从当前最大 ID 之上重新错开。
+    """
+    if len(shard_router.shards) > ID_STRIDE:
+        raise RuntimeError(f"At most {ID_STRIDE} databases are supported")
+    maxima = []
+    for shard in shard_router.shards.values():
+        with shard.engine.connect() as conn:
+            maxima.append(conn.execute(sa.text("SELECT coalesce(max(id), 0) FROM tags")).scalar())
+    base = (max(maxima) // ID_STRIDE + 1) * ID_STRIDE
+    for slot, shard in enumerate(shard_router.shards.values()):
+        with shard.engine.begin() as conn:
+            sequence = conn.execute(sa.text("SELECT pg_get_serial_sequence('tags', 'id')")).scalar()
+            conn.execute(sa.text(f"ALTER SEQUENCE {sequence} INCREMENT BY {ID_STRIDE}"))
+            conn.execute(sa.text("SELECT setval(:sequence, :value, false)"), {"sequence": sequence, "value": base + slot})
+        logger.info(f"{shard.name}: tags.id 从 {base + slot} 开始，步长 {ID_STRIDE}")
+
+
+def shard_counts(db: Session) -> Dict[str, int]:
+    """各分片的用户数（没有目录记录的用户计入全局库）"""
+    counts = {name: 0 for name in shard_router.shards}
+    for row in db.execute(sa.select(UserShard.shard, sa.func.count()).group_by(UserShard.shard)):
+        counts[row[0]] = row[1]
+    total = db.execute(sa.select(sa.func.count()).select_from(User)).scalar()
+    counts[GLOBAL_SHARD] += total - sum(counts.values())
+    return counts
+
+
+def main():
+    from app.db.session import SessionLocal
+
+    parser = argparse.ArgumentParser()
+    commands = parser.add_subparsers(dest="command", required=True)
+    migrate = commands.add_parser("migrate", help="对全局库和所有分片执行迁移")
+    migrate.add_argument("--revision", default="head")
+    move = commands.add_parser("move", help="在线迁移一个用户的数据")
+    move.add_argument("user_id", type=UUID)
+    move.add_argument("shard")
+    move.add_argument("--wait", type=float, default=None, help="等待目录缓存过期的秒数")
+    commands.add_parser("status", help="各分片的用户数")
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        migrate_shards(args.revision)
+        return
+    db = SessionLocal()
+    try:
+        if args.command == "move":
+            ShardMoveService(db).move(args.user_id, args.shard, wait=args.wait)
+        else:
+            for name, count in shard_counts(db).items():
+                print(f"{name}: {count}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+import time
+from datetime import datetime
+from typing import Optional, Tuple
+from uuid import UUID
+
+import sqlalchemy as sa
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.logger import setup_logger
+from app.db.models.memory import Memory
+from app.db.models.user import User
+from app.services.heatmap_service import HeatmapService
+from app.services.view_cache import invalidate_memories
+
+logger = setup_logger("sweeper")
+
+# 遗留活动的结束规则：max_duration 按最长时长截断；next_start 截断到下一个活动开始（不晚于最长时长），
+# 允许并行的活动不受下一个活动影响，只按最长时长截断
+SWEEP_MODES = ("max_duration", "next_start")
+
+# 一批关闭超过用户最长时长仍在进行的活动，end_time / duration / completion_rate 在同一条 UPDATE 中算出。
+# 只处理时间轴活动：重要事项等核心关注项同样 is_ongoing，但会持续多天，不能被截断。
+# 进行中的活动走部分索引 ix_memories_ongoing，SKIP LOCKED 跳过正在被用户结束的行
+SWEEP_SQL = """
+WITH stale AS (
+    SELECT m.id, m.start_time,
+           m.start_time + make_interval(secs => coalesce(u.ongoing_max_hours, :max_hours) * 3600) AS max_end,
+           CASE WHEN coalesce(u.ongoing_sweep_mode, :mode) = 'next_start' AND NOT coalesce(m.allow_parallel, false) THEN (
+               SELECT min(n.start_time) FROM memories n
+               WHERE n.user_id = m.user_id AND n.memory_type = 'TIMELINE' AND n.start_time > m.start_time
+           ) END AS next_start
+    FROM memories m JOIN users u ON u.id = m.user_id
+    WHERE m.is_ongoing
+      AND m.memory_type = 'TIMELINE'
+      AND m.start_time < CAST(:now AS timestamp) - make_interval(secs => coalesce(u.ongoing_max_hours, :max_hours) * 3600)
+    ORDER BY m.start_time, m.id
+    LIMIT :batch
+    FOR UPDATE OF m SKIP LOCKED
+), closed AS (
+    SELECT id, start_time, least(max_end, next_start) AS end_time, next_start < max_end AS capped_at_next
+    FROM stale
+)
+UPDATE memories m SET
+    is_ongoing = false,
+    end_time = c.end_time,
+    duration = extract(epoch FROM c.end_time - m.start_time),
+    completion_rate = CASE WHEN m.target_duration > 0
+        THEN extract(epoch FROM c.end_time - m.start_time) / m.target_duration * 100 END,
+    updated_at = timezone('utc', now())
+FROM closed c
+WHERE m.id = c.id AND m.start_time = c.start_time
+RETURNING m.id, m.user_id, m.memory_type, m.focus_type, m.start_time, m.end_time, coalesce(c.capped_at_next, false) AS capped_at_next
+"""
+SWEEP_STMT = sa.text(SWEEP_SQL).columns(
+    memory_type=Memory.memory_type.type,
+    focus_type=Memory.focus_type.type,
+)
+
+
+class SweeperService:
+    """遗留的进行中活动：按用户规则自动结束"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    async def get_rule(self, user_id: UUID) -> Tuple[str, float]:
+        """用户的遗留活动结束规则 (mode, max_hours)，未设置时取全局默认值"""
+        row = self.db.execute(
+            sa.select(User.ongoing_sweep_mode, User.ongoing_max_hours).where(User.id == user_id)
+        ).first()
+        return (
+            (row and row.ongoing_sweep_mode) or settings.SWEEP_DEFAULT_MODE,
+            (row and row.ongoing_max_hours) or settings.SWEEP_DEFAULT_MAX_HOURS
+        )
+
+    async def update_rule(self, user_id: UUID, mode: str, max_hours: float) -> Tuple[str, float]:
+        """设置用户的遗留活动结束规则"""
+        if mode not in SWEEP_MODES:
+            raise HTTPException(status_code=400, detail=f"Invalid mode. Use one of: {', '.join(SWEEP_MODES)}")
+        self.db.execute(
+            sa.update(User).where(User.id == user_id).values(
+                ongoing_sweep_mode=mode,
+                ongoing_max_hours=max_hours
+            )
+        )
+        self.db.commit()
+        return mode, max_hours
+
+    def sweep(
+        self,
+        now: Optional[datetime] = None,
+        batch_size: Optional[int] = None,
+        pause: Optional[float] = None
+    ) -> dict:
+        """关闭超过最长时长仍在进行的遗留活动（应用被杀、设备丢失），分批提交
+
+        返回统计：swept 关闭条数，capped_at_next 截断到下一个活动开始的条数，batches 批数。
+        """
+        now = now or datetime.now()
+        batch_size = batch_size or settings.SWEEP_BATCH_SIZE
+        pause = settings.SWEEP_BATCH_PAUSE if pause is None else pause
+        heatmap = HeatmapService(self.db)
+        stats = {"swept": 0, "capped_at_next": 0, "batches": 0}
+
+        while True:
+            rows = self.db.execute(SWEEP_STMT, {
+                "now": now,
+                "max_hours": settings.SWEEP_DEFAULT_MAX_HOURS,
+                "mode": settings.SWEEP_DEFAULT_MODE,
+                "batch": batch_size,
+            }).all()
+            for row in rows:
+                heatmap.invalidate(row)
+            self.db.commit()
+            invalidate_memories(rows)
+
+            stats["swept"] += len(rows)
+            stats["capped_at_next"] += sum(row.capped_at_next for row in rows)
+            stats["batches"] += 1
+            if len(rows) < batch_size:
+                break
+            time.sleep(pause)
+
+        if stats["swept"]:
+            logger.info(f"关闭遗留活动 {stats['swept']} 条（截断到下一个活动 {stats['capped_at_next']} 条）")
+        return stats
@@ -0,0 +1,131 @@
+from collections import OrderedDict
+from typing import Dict, List, Sequence
+from uuid import UUID
+
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.logger import setup_logger
+from app.db.models.tag import Tag
+
+logger = setup_logger("tag")
+
+
+class TagCache:
+    """进程内的标签字典缓存：user_id -> {标签名: ID}，按用户做 LRU 淘汰
+
+    标签一旦分配 ID 就不会改名或删除，缓存无需失效。
+    只缓存已提交的标签，本事务新插入的标签等下次查询时再缓存，
+    避免事务回滚后缓存里留下不存在的 ID。
+    """
+
+    def __init__(self, max_users: int) -> None:
+        self.max_users = max_users
+        self._users: "OrderedDict[UUID, Dict[str, int]]" = OrderedDict()
+
+    def lookup(self, user_id: UUID) -> Dict[str, int]:
+        names = self._users.get(user_id)
+        if names is None:
+            return {}
+        self._users.move_to_end(user_id)
+        return names
+
+    def add(self, user_id: UUID, mapping: Dict[str, int]) -> None:
+        if not mapping:
+            return
+        self._users.setdefault(user_id, {}).update(mapping)
+        self._users.move_to_end(user_id)
+        while len(self._users) > self.max_users:
+            self._users.popitem(last=False)
+
+
+tag_cache = TagCache(settings.TAG_CACHE_MAX_USERS)
+
+
+def normalize_tags(tags: Sequence[str]) -> List[str]:
+    """去掉首尾空白、空标签和重复标签，保持原顺序"""
+    return list(dict.fromkeys(tag.strip() for tag in tags or [] if tag and tag.strip()))
+
+
+class TagService:
+    """标签名与整数 ID 的互相转换，以及标签联想"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def ids_for(self, user_id: UUID, tags: Sequence[str], create: bool = True) -> List[int]:
+        """把标签名转换为 ID
+
+        create 为真时不存在的标签自动加入字典（随调用方事务提交），
+        否则跳过不存在的标签（用于按标签查询）。
+        """
+        names = normalize_tags(tags)
+        if not names:
+            return []
+
+        known = tag_cache.lookup(user_id)
+        missing = [name for name in names if name not in known]
+        if not missing:
+            return [known[name] for name in names]
+
+        if not create:
+            found = dict(self.db.execute(
+                sa.select(Tag.name, Tag.id).where(
+                    Tag.user_id == user_id,
+                    Tag.name.in_(missing)
+                )
+            ).all())
+            tag_cache.add(user_id, found)
+            known = {**known, **found}
+            return [known[name] for name in names if name in known]
+
+        # 新插入的标签：本事务内可见，不进缓存
+        created = dict(self.db.execute(
+            insert(Tag)
+            .values([{"user_id": user_id, "name": name} for name in missing])
+            .on_conflict_do_nothing(index_elements=["user_id", "name"])
+            .returning(Tag.name, Tag.id)
+        ).all())
+
+        # 其余是已存在（已提交）的标签，查出后放进缓存
+        existing = [name for name in missing if name not in created]
+        if existing:
+            found = dict(self.db.execute(
+                sa.select(Tag.name, Tag.id).where(
+                    Tag.user_id == user_id,
+                    Tag.name.in_(existing)
+                )
+            ).all())
+            tag_cache.add(user_id, found)
+            known = {**known, **found}
+
+        known = {**known, **created}
+        return [known[name] for name in names]
+
+    def names_for(self, user_id: UUID, tag_ids: Sequence[int]) -> List[str]:
+        """把标签 ID 转换回标签名"""
+        if not tag_ids:
+            return []
+        by_id = {tag_id: name for name, tag_id in tag_cache.lookup(user_id).items()}
+        missing = [tag_id for tag_id in tag_ids if tag_id not in by_id]
+        if missing:
+            found = dict(self.db.execute(
+                sa.select(Tag.name, Tag.id).where(
+                    Tag.user_id == user_id,
+                    Tag.id.in_(missing)
+                )
+            ).all())
+            tag_cache.add(user_id, found)
+            by_id.update({tag_id: name for name, tag_id in found.items()})
+        return [by_id[tag_id] for tag_id in tag_ids if tag_id in by_id]
+
+    async def suggest(self, user_id: UUID, prefix: str, limit: int) -> List[str]:
+        """按前缀联想标签（走 ix_tags_user_name_prefix 索引）"""
+        escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        stmt = sa.select(Tag.name).where(
+            Tag.user_id == user_id,
+            Tag.name.like(f"{escaped}%", escape="\\")
+        ).order_by(Tag.name).limit(limit)
+        return list(self.db.execute(stmt).scalars())
@@ -1,15 +1,45 @@
-from datetime import datetime
-from typing import Optional, List
-from sqlalchemy.orm import Session
+from datetime import date, datetime, timedelta
+from typing import Optional, List, Sequence, Tuple
+from sqlalchemy.orm import Session, load_only
+from sqlalchemy.engine import Row
 from app.db.models.memory import Memory
 from app.db.models.enums import MemoryType
 from uuid import UUID
 from app.core.logger import setup_logger
+from app.core.singleflight import single_flight
 from fastapi import HTTPException
+from app.services.view_cache import invalidate_memory, invalidate_memories
+from app.services.interval_engine import IntervalSummary, rows_to_arrays, summarize
+from app.services.archive_service import ArchiveService
+from app.services.tag_service import TagService
+import sqlalchemy as sa
 
 # 配置日志
 logger = setup_logger("timeline")
 
+# TimelineResponse 需要的列，列表查询只选这些列
+TIMELINE_COLUMNS = (
+    Memory.id,
+    Memory.content,
+    Memory.start_time,
+    Memory.end_time,
+    Memory.duration,
+    Memory.is_ongoing,
+    Memory.target_duration,
+    Memory.completion_rate,
+    Memory.completion_note,
+    Memory.tags,
+    Memory.allow_parallel,
+    Memory.parallel_group,
+    Memory.priority,
+)
+
+# 汇总时向前多查的时长：在窗口开始前开始、跨进窗口的活动也要计入
+MAX_ACTIVITY_SPAN = timedelta(days=1)
+
+# 列名 -> 列，用于 ?fields= 稀疏字段投影
+TIMELINE_COLUMN_MAP = {column.key: column for column in TIMELINE_COLUMNS}
+
 class TimelineService:
     def __init__(self, db: Session):
         self.db = db
@@ -26,8 +56,14 @@ class TimelineService:
     ) -> Memory:
         """开始一个新活动"""
         # 只有当不允许并行时，才结束其他活动
+        ongoing_activities = []
         if not allow_parallel:
-            ongoing_activities = self.db.query(Memory).filter(
+            ongoing_activities = self.db.query(Memory).options(
+                load_only(
+                    Memory.user_id, Memory.memory_type, Memory.focus_type,
+                    Memory.content, Memory.start_time, Memory.target_duration
+                )
+            ).filter(
                 Memory.user_id == user_id,
                 Memory.is_ongoing == True
             ).all()
@@ -45,6 +81,7 @@ class TimelineService:
             content=content,
             memory_type=MemoryType.TIMELINE,
             tags=tags,
+            tag_ids=TagService(self.db).ids_for(user_id, tags),
             start_time=datetime.now(),
             is_ongoing=True,
             target_duration=target_duration,
@@ -56,6 +93,7 @@ class TimelineService:
         self.db.add(new_activity)
         self.db.commit()
         self.db.refresh(new_activity)
+        invalidate_memories([*ongoing_activities, new_activity])
         logger.info(f"开始新活动: {content}")
         return new_activity
 
@@ -64,11 +102,11 @@ class TimelineService:
         user_id: UUID,
         content: Optional[str] = None
     ) -> Memory:
-        """结束当前进行中的活动"""
+        """结束当前进行中的活动（最近开始的一个）"""
         ongoing_activity = self.db.query(Memory).filter(
             Memory.user_id == user_id,
             Memory.is_ongoing == True
-        ).first()
+        ).order_by(Memory.start_time.desc()).first()
         
         if not ongoing_activity:
             logger.warning("未找到进行中的活动")
@@ -78,20 +116,14 @@ class TimelineService:
         ongoing_activity.end_time = datetime.now()
         ongoing_activity.duration = ongoing_activity.calculate_duration
         ongoing_activity.completion_rate = ongoing_activity.calculate_completion_rate
-        
+        # 完成时间和持续时间已在 end_time / duration 中，备注单独存放，不改写 content
         if content:
-            new_content = (
-                f"{ongoing_activity.content}\n"
-                f"---\n"
-                f"完成时间：{ongoing_activity.end_time.strftime('%H:%M:%S')}\n"
-                f"持续时间：{ongoing_activity.duration / 60:.1f}分钟\n"
-                f"完成备注：{content}"
-            )
-            ongoing_activity.content = new_content
+            ongoing_activity.completion_note = content
         
         try:
             self.db.commit()
             self.db.refresh(ongoing_activity)
+            invalidate_memory(ongoing_activity)
             logger.info(f"活动已完成: {ongoing_activity.content}")
         except Exception as e:
             logger.error(f"更新失败: {str(e)}")
@@ -101,27 +133,146 @@ class TimelineService:
         return ongoing_activity
 
     async def get_daily_timeline(
+        self,
+        user_id: UUID,
+        date: Optional[datetime] = None,
+        columns: Optional[Sequence[str]] = None
+    ) -> List[Row]:
+        """获取某天的完整时间轴
+
+        只读列表走 Core 查询，只选 TIMELINE_COLUMNS，返回的 Row 支持属性访问，
+        可直接交给 TimelineResponse 校验，省去 ORM 身份映射的开销。
+        columns 指定列名时只选这些列（稀疏字段）。
+        超过保留期的日期从归档表补齐；归档按 start_time 顺序进行，
+        归档部分总是排在热表部分之前。
+        同一用户同一天的并发相同查询合并为一次（见 app/core/singleflight.py）。
+        """
+        date = date or datetime.now()
+        return await single_flight.query(
+            (user_id, "timeline.daily", date.date(), tuple(columns or ())),
+            self.db,
+            lambda db: TimelineService(db)._load_daily_timeline(user_id, date, columns)
+        )
+
+    def _load_daily_timeline(
+        self,
+        user_id: UUID,
+        date: datetime,
+        columns: Optional[Sequence[str]]
+    ) -> List[Row]:
+        selected = (
+            [TIMELINE_COLUMN_MAP[name] for name in columns]
+            if columns else TIMELINE_COLUMNS
+        )
+        stmt = sa.select(*selected).where(
+            *self._daily_filter(user_id, date)
+        ).order_by(Memory.start_time)
+        rows = self.db.execute(stmt).all()
+
+        day_start, day_end = self._day_bounds(date)
+        archive = ArchiveService(self.db)
+        if not archive.covers(day_start):
+            return rows
+        archived = archive.find_range(
+            user_id, MemoryType.TIMELINE, day_start, day_end,
+            columns=[column.key for column in selected]
+        )
+        return [*archived, *rows]
+
+    async def get_daily_version(
         self,
         user_id: UUID,
         date: Optional[datetime] = None
-    ) -> List[Memory]:
-        """获取某天的完整时间轴"""
+    ) -> Tuple[Optional[datetime], int]:
+        """获取某天时间轴的版本：(max(updated_at), 行数)
+
+        只扫 ix_memories_user_type_start 索引，用于生成 ETag；并发相同查询合并为一次。
+        """
+        date = date or datetime.now()
+        return await single_flight.query(
+            (user_id, "timeline.daily_version", date.date()),
+            self.db,
+            lambda db: TimelineService(db)._load_daily_version(user_id, date)
+        )
+
+    def _load_daily_version(self, user_id: UUID, date: datetime) -> Tuple[Optional[datetime], int]:
+        stmt = sa.select(
+            sa.func.max(Memory.updated_at), sa.func.count()
+        ).where(*self._daily_filter(user_id, date))
+        updated_at, count = self.db.execute(stmt).one()
+
+        day_start, day_end = self._day_bounds(date)
+        archive = ArchiveService(self.db)
+        if archive.covers(day_start):
+            archived_at, archived_count = archive.version_range(
+                user_id, MemoryType.TIMELINE, day_start, day_end
+            )
+            updated_at = max(filter(None, (updated_at, archived_at)), default=None)
+            count += archived_count
+        return updated_at, count
+
+    async def get_time_summary(
+        self,
+        user_id: UUID,
+        start_date: date,
+        end_date: date
+    ) -> IntervalSummary:
+        """统计 [start_date, end_date] 内的时间投入
+
+        区间裁剪到窗口内，进行中的活动计到当前时间，
+        并行组的重叠部分按区间并集只算一次。
+        """
+        window_start = datetime.combine(start_date, datetime.min.time())
+        window_end = datetime.combine(end_date + timedelta(days=1), datetime.min.time())
+
+        stmt = sa.select(
+            Memory.start_time, Memory.end_time, Memory.parallel_group
+        ).where(
+            Memory.user_id == user_id,
+            Memory.memory_type == MemoryType.TIMELINE,
+            Memory.start_time >= window_start - MAX_ACTIVITY_SPAN,
+            Memory.start_time < window_end
+        )
+        rows = self.db.execute(stmt).all()
+
+        archive = ArchiveService(self.db)
+        if archive.covers(window_start - MAX_ACTIVITY_SPAN):
+            rows += archive.find_range(
+                user_id, MemoryType.TIMELINE,
+                window_start - MAX_ACTIVITY_SPAN, window_end,
+                columns=["start_time", "end_time", "parallel_group"]
+            )
+        starts, ends, groups = rows_to_arrays(
+            rows, now=datetime.now(), window=(window_start, window_end)
+        )
+        return summarize(starts, ends, groups)
+
+    def _day_bounds(self, date: Optional[datetime]) -> Tuple[datetime, datetime]:
+        """某天时间轴的起止时间"""
         if not date:
             date = datetime.now()
-            
-        return self.db.query(Memory).filter(
+        return (
+            date.replace(hour=0, minute=0, second=0),
+            date.replace(hour=23, minute=59, second=59)
+        )
+
+    def _daily_filter(self, user_id: UUID, date: Optional[datetime]) -> tuple:
+        """某天时间轴的查询条件"""
+        day_start, day_end = self._day_bounds(date)
+        return (
             Memory.user_id == user_id,
             Memory.memory_type == MemoryType.TIMELINE,
-            Memory.start_time >= date.replace(hour=0, minute=0, second=0),
-            Memory.start_time < date.replace(hour=23, minute=59, second=59)
-        ).order_by(Memory.start_time).all()
+            Memory.start_time >= day_start,
+            Memory.start_time < day_end
+        )
 
     async def get_current_activities(
         self,
         user_id: UUID
-    ) -> List[Memory]:
+    ) -> List[Row]:
         """获取当前所有进行中的活动"""
-        return self.db.query(Memory).filter(
+        stmt = sa.select(*TIMELINE_COLUMNS).where(
             Memory.user_id == user_id,
             Memory.is_ongoing == True
-        ).order_by(Memory.priority.desc()).all() 
\ No newline at end of file
+        ).order_by(Memory.priority.desc())
+        return self.db.execute(stmt).all() 
@@ -0,0 +1,78 @@
+from datetime import date, datetime
+from typing import Awaitable, Callable, Iterable, Optional, Tuple
+
+import orjson
+from fastapi import Request, Response
+
+from app.core.cache import view_cache
+from app.core.singleflight import single_flight
+from app.core.etag import make_etag, etag_matches, not_modified, etag_headers
+from app.db.models.enums import MemoryType, CoreFocusType
+
+# 缓存的视图作用域
+TIMELINE_SCOPE = "timeline"
+IMPORTANT_SCOPE = "important"
+
+
+def view_key(user_id, scope: str, day: date) -> str:
+    """缓存键：(用户, 作用域, 本地日期)"""
+    return f"{user_id}:{scope}:{day.isoformat()}"
+
+
+def scope_of(memory_type, focus_type) -> Optional[str]:
+    """记忆会出现在哪个日视图里；不属于任何日视图时返回 None"""
+    if memory_type == MemoryType.TIMELINE:
+        return TIMELINE_SCOPE
+    if memory_type == MemoryType.CORE_FOCUS and focus_type == CoreFocusType.IMPORTANT:
+        return IMPORTANT_SCOPE
+    return None
+
+
+def invalidate_memory(memory) -> None:
+    """写入某条记忆后，失效它所在的日视图；之后该用户的读请求不再合并到写入前开始的查询"""
+    single_flight.forget(memory.user_id)
+    scope = scope_of(memory.memory_type, memory.focus_type)
+    if scope and memory.start_time:
+        view_cache.invalidate(view_key(memory.user_id, scope, memory.start_time.date()))
+
+
+def invalidate_memories(memories: Iterable) -> None:
+    for memory in memories:
+        invalidate_memory(memory)
+
+
+async def cached_view(
+    request: Request,
+    user_id,
+    scope: str,
+    day: date,
+    variant: Tuple,
+    version: Callable[[], Awaitable[Tuple[Optional[datetime], int]]],
+    load: Callable[[], Awaitable[list]],
+) -> Response:
+    """日视图读穿透：先查缓存，未命中时按版本生成 ETag 并回源
+
+    缓存值为 ETag + 已序列化的 JSON，命中时不访问数据库；
+    If-None-Match 命中时返回 304。
+    """
+    key = view_key(user_id, scope, day)
+    variant_key = repr(variant)
+
+    cached = view_cache.get(key, variant_key)
+    if cached is None:
+        async with view_cache.lock(key, variant_key):
+            cached = view_cache.get(key, variant_key)
+            if cached is None:
+                token = view_cache.token(key)
+                etag = make_etag(scope, user_id, day, await version(), *variant)
+                if etag_matches(request, etag):
+                    return not_modified(etag)
+                body = orjson.dumps(await load())
+                cached = etag.encode() + b"\n" + body
+                view_cache.set(key, variant_key, cached, token)
+
+    etag, body = cached.split(b"\n", 1)
+    etag = etag.decode()
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    return Response(body, media_type="application/json", headers=etag_headers(etag))
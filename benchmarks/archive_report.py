@@ -0,0 +1,80 @@
+"""
+归档前后的存储与延迟对比
+
+统计 memories（含所有分区）与 memory_archive 的表大小、索引大小，
+并对热点查询（当天时间轴、当天时间轴版本）计时；
+加 --archive 时先执行一次归档，再输出归档后的数字。
+
+用法：
+    python -m benchmarks.archive_report --user <uuid> [--archive] [--runs 50]
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime
+
+import sqlalchemy as sa
+
+from app.db.session import SessionLocal
+from app.services.archive_service import ArchiveService
+from app.services.timeline_service import TimelineService
+
+
+def relation_sizes(db, table: str) -> tuple:
+    """(表大小, 索引大小)，分区表累加所有分区"""
+    return tuple(db.execute(
+        sa.text(
+            "SELECT coalesce(sum(pg_table_size(relid)), 0), "
+            "coalesce(sum(pg_indexes_size(relid)), 0) "
+            "FROM pg_partition_tree(:table) WHERE isleaf"
+        ),
+        {"table": table}
+    ).one())
+
+
+def timed(fn, runs: int) -> float:
+    """平均耗时（毫秒）"""
+    start = time.perf_counter()
+    for _ in range(runs):
+        fn()
+    return (time.perf_counter() - start) / runs * 1000
+
+
+def report(db, user_id, runs: int) -> None:
+    for table in ("memories", "memory_archive"):
+        table_size, index_size = relation_sizes(db, table)
+        print(f"{table:<16} 表 {table_size / 1024 / 1024:>9.1f} MB   索引 {index_size / 1024 / 1024:>9.1f} MB")
+
+    timeline = TimelineService(db)
+    today = datetime.now()
+    queries = {
+        "get_daily_timeline": lambda: asyncio.run(timeline.get_daily_timeline(user_id, today)),
+        "get_daily_version": lambda: asyncio.run(timeline.get_daily_version(user_id, today)),
+    }
+    for name, fn in queries.items():
+        print(f"{name:<24} {timed(fn, runs):>8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--user", default=str(uuid.uuid4()))
+    parser.add_argument("--archive", action="store_true")
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    user_id = uuid.UUID(args.user)
+    db = SessionLocal()
+    try:
+        print("== 归档前 ==" if args.archive else "== 当前 ==")
+        report(db, user_id, args.runs)
+        if args.archive:
+            total = ArchiveService(db).archive_before()
+            print(f"\n已归档 {total} 条\n== 归档后 ==")
+            report(db, user_id, args.runs)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+认证开销基准测试
+
+比较每个请求的认证开销：
+- 查库认证（旧版只有 sub 的令牌的做法，这类令牌现已拒绝）：校验签名后按邮箱查 users 表；
+- 无状态认证（令牌携带 uid / 状态）：校验签名 + 查作废列表，不查库。
+作废列表预先填入 --revoked 条记录（访问令牌有效期内的作废数）。
+另外比较续期一次的开销：重新登录（bcrypt 校验密码）与刷新令牌（SHA-256 摘要查表）。
+
+默认用 time.sleep(--latency 毫秒) 模拟一次 users 查询的往返，不依赖数据库；
+--db 时对真实数据库执行按邮箱的 users 查询，--email 指定已存在的用户。
+
+用法：
+    python -m benchmarks.auth_cost --requests 5000 --revoked 10000 --latency 0.3
+    python -m benchmarks.auth_cost --db --email someone@example.com
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import bcrypt
+import numpy as np
+from starlette.requests import Request
+
+from app.api.deps import get_current_user
+from app.core.revocation import revocations
+from app.core.security import create_access_token
+from app.services.auth_service import hash_token
+
+
+def measure(func, count: int) -> np.ndarray:
+    samples = np.empty(count)
+    for i in range(count):
+        start = time.perf_counter()
+        func()
+        samples[i] = time.perf_counter() - start
+    return samples * 1e6
+
+
+async def measure_async(func, count: int) -> np.ndarray:
+    samples = np.empty(count)
+    for i in range(count):
+        start = time.perf_counter()
+        await func()
+        samples[i] = time.perf_counter() - start
+    return samples * 1e6
+
+
+def report(name: str, samples: np.ndarray) -> None:
+    print(
+        f"{name:>28} {np.percentile(samples, 50):>10.1f} {np.percentile(samples, 99):>10.1f} "
+        f"{samples.mean():>10.1f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--revoked", type=int, default=10000, help="作废列表中的记录数")
+    parser.add_argument("--latency", type=float, default=0.3, help="模拟 users 查询的往返（毫秒）")
+    parser.add_argument("--logins", type=int, default=20)
+    parser.add_argument("--db", action="store_true", help="使用真实数据库")
+    parser.add_argument("--email", default="bench@example.com")
+    args = parser.parse_args()
+
+    now = datetime.utcnow()
+    for _ in range(args.revoked):
+        revocations.add(uuid.uuid4().hex, now, now + timedelta(minutes=15))
+
+    user_id = uuid.uuid4()
+    fast = create_access_token(
+        {"sub": args.email, "uid": str(user_id), "act": True, "su": False, "jti": uuid.uuid4().hex, "iat": time.time()},
+        timedelta(minutes=15),
+    )
+
+    request = Request({"type": "http", "headers": [], "state": {}})
+
+    if args.db:
+        from app.db.models.user import User
+        from app.db.session import SessionLocal
+
+        db = SessionLocal()
+
+        def lookup():
+            db.query(User).filter(User.email == args.email).first()
+    else:
+        def lookup():
+            time.sleep(args.latency / 1000)
+
+    async def lookup_auth():
+        # 解码和校验与无状态认证相同，另加一次 users 查询
+        await get_current_user(request, token=fast)
+        lookup()
+
+    async def fast_auth():
+        await get_current_user(request, token=fast)
+
+    jti = uuid.uuid4().hex
+    print(f"{args.requests} 次认证，作废列表 {len(revocations)} 条（单位 µs）")
+    print(f"{'':>28} {'p50':>10} {'p99':>10} {'mean':>10}")
+    report("token + users lookup", asyncio.run(measure_async(lookup_auth, args.requests)))
+    report("stateless + revocation", asyncio.run(measure_async(fast_auth, args.requests)))
+    report("revocation check only", measure(lambda: revocations.is_revoked(jti, str(user_id), 0.0), args.requests))
+
+    # 与 passlib 的 bcrypt 默认参数（12 轮）相同
+    print(f"\n续期一次（{args.logins} 次）")
+    hashed = bcrypt.hashpw(b"benchmark-password", bcrypt.gensalt(12))
+    report("login (bcrypt verify)", measure(lambda: bcrypt.checkpw(b"benchmark-password", hashed), args.logins))
+    report("refresh (sha256 digest)", measure(lambda: hash_token("x" * 43), args.logins))
+
+    if args.db:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
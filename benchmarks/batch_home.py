@@ -0,0 +1,122 @@
+"""
+首页加载基准测试：逐个调用 vs POST /batch
+
+首页依次请求日时间轴（含进行中的活动）、今日重要事项和长期目标。分别测量：
+- sequential：3 个 HTTP 请求依次发出，每个请求各自认证、借出会话；
+- batch：一个 POST /batch，认证一次、共享会话，只读子请求并发执行。
+每个 HTTP 请求在客户端加 --rtt 毫秒的网络往返，重复 --loads 次，输出首页加载延迟的 p50/p99。
+
+默认使用进程内测试应用：3 个接口使用真实的认证和会话依赖项，查询用 --latency 毫秒的等待模拟，
+日时间轴和长期目标与实际一样在线程池中查询（single_flight），今日重要事项在事件循环中同步查询；
+--db 时对真实应用和数据库执行，--user-id / --email 指定有数据的用户。
+
+用法：
+    python -m benchmarks.batch_home --loads 200 --rtt 40 --latency 5
+    python -m benchmarks.batch_home --db --user-id <uuid> --email someone@example.com
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+import httpx
+import numpy as np
+from fastapi import Depends, FastAPI
+
+from app.api.deps import get_current_user, get_user_db
+from app.api.v1.endpoints import batch
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.db.replicas import get_read_db
+
+HOME_PATHS = [
+    "/timeline/daily",
+    "/core-focus/important/daily",
+    "/core-focus/long-term",
+]
+
+
+def build_app(latency: float) -> FastAPI:
+    app = FastAPI()
+    app.include_router(batch.router, prefix=settings.API_V1_STR)
+
+    def offloaded(path: str) -> None:
+        @app.get(settings.API_V1_STR + path)
+        async def endpoint(db=Depends(get_read_db), current_user=Depends(get_current_user)):
+            await asyncio.to_thread(time.sleep, latency)
+            return {"path": path, "user": str(current_user.id)}
+
+    def blocking(path: str) -> None:
+        @app.get(settings.API_V1_STR + path)
+        async def endpoint(db=Depends(get_user_db), current_user=Depends(get_current_user)):
+            time.sleep(latency)
+            return {"path": path, "user": str(current_user.id)}
+
+    offloaded("/timeline/daily")
+    blocking("/core-focus/important/daily")
+    offloaded("/core-focus/long-term")
+    return app
+
+
+async def load_sequential(client, headers, rtt: float) -> None:
+    for path in HOME_PATHS:
+        await asyncio.sleep(rtt)
+        response = await client.get(settings.API_V1_STR + path, headers=headers)
+        assert response.status_code == 200, response.text
+
+
+async def load_batch(client, headers, rtt: float) -> None:
+    await asyncio.sleep(rtt)
+    response = await client.post(
+        f"{settings.API_V1_STR}/batch",
+        headers=headers,
+        json={"operations": [{"id": path, "path": path} for path in HOME_PATHS]},
+    )
+    assert response.status_code == 200, response.text
+    assert all(result["status"] == 200 for result in response.json()["results"]), response.text
+
+
+async def run(app, headers, loads: int, rtt: float) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    results = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for name, load in (("sequential", load_sequential), ("batch", load_batch)):
+            await load(client, headers, rtt)  # 预热
+            latencies = []
+            for _ in range(loads):
+                start = time.perf_counter()
+                await load(client, headers, rtt)
+                latencies.append(time.perf_counter() - start)
+            results[name] = np.array(latencies) * 1000
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--loads", type=int, default=200, help="首页加载次数")
+    parser.add_argument("--rtt", type=float, default=40, help="每个 HTTP 请求的网络往返（毫秒）")
+    parser.add_argument("--latency", type=float, default=5, help="模拟每个接口的查询耗时（毫秒）")
+    parser.add_argument("--db", action="store_true", help="使用真实应用和数据库")
+    parser.add_argument("--user-id", type=uuid.UUID, default=None)
+    parser.add_argument("--email", default="bench@example.com")
+    args = parser.parse_args()
+
+    user_id = args.user_id or uuid.uuid4()
+    token = create_access_token(
+        {"sub": args.email, "uid": str(user_id), "act": True, "su": False, "jti": uuid.uuid4().hex, "iat": time.time()}
+    )
+    headers = {"Authorization": f"Bearer {token}"}
+    if args.db:
+        from app.main import app
+    else:
+        app = build_app(args.latency / 1000)
+
+    results = asyncio.run(run(app, headers, args.loads, args.rtt / 1000))
+    print(f"首页 {len(HOME_PATHS)} 个接口 × {args.loads} 次加载，网络往返 {args.rtt} ms")
+    print(f"{'mode':>10} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, latencies in results.items():
+        print(f"{name:>10} {np.percentile(latencies, 50):>8.1f} {np.percentile(latencies, 99):>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+条件 GET（ETag / If-None-Match）回放基准测试
+
+模拟真实客户端流量：每个用户按读写比（默认约 30:1）轮询
+/timeline/daily、/core-focus/important/daily、/core-focus/long-term，
+客户端保存上次的 ETag 并带 If-None-Match 请求；偶尔开始/结束活动、创建重要事项。
+
+输出每个接口的 304 命中率、200 与 304 的平均延迟，以及估算节省的总时间。
+会注册测试用户并写入数据，请在测试数据库上运行。
+
+用法：
+    python -m benchmarks.conditional_get --users 20 --requests 500
+"""
+import argparse
+import random
+import statistics
+import time
+import uuid
+from collections import defaultdict
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+READ_PATHS = [
+    "/api/v1/timeline/daily",
+    "/api/v1/core-focus/important/daily",
+    "/api/v1/core-focus/long-term",
+]
+
+
+def register(client: TestClient) -> dict:
+    name = f"bench-{uuid.uuid4().hex[:10]}"
+    resp = client.post("/api/v1/auth/register", json={
+        "email": f"{name}@example.com",
+        "username": name,
+        "password": "password123",
+    })
+    resp.raise_for_status()
+    return {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+
+def write(client: TestClient, headers: dict) -> None:
+    action = random.random()
+    if action < 0.45:
+        client.post("/api/v1/timeline/start", headers=headers, json={"content": "回放活动", "tags": ["回放"]})
+    elif action < 0.9:
+        client.post("/api/v1/timeline/end", headers=headers, json={})
+    else:
+        client.post("/api/v1/core-focus/important", headers=headers, json={
+            "content": "回放事项", "target_minutes": 60, "tags": ["回放"],
+        })
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=500, help="每个用户的请求数")
+    parser.add_argument("--write-ratio", type=float, default=1 / 30)
+    args = parser.parse_args()
+
+    latencies = defaultdict(lambda: defaultdict(list))
+    with TestClient(app) as client:
+        users = [register(client) for _ in range(args.users)]
+        etags = [dict() for _ in users]
+
+        for _ in range(args.requests):
+            for headers, known in zip(users, etags):
+                if random.random() < args.write_ratio:
+                    write(client, headers)
+                    continue
+                path = random.choice(READ_PATHS)
+                request_headers = dict(headers)
+                if path in known:
+                    request_headers["If-None-Match"] = known[path]
+                start = time.perf_counter()
+                resp = client.get(path, headers=request_headers)
+                latencies[path][resp.status_code].append(time.perf_counter() - start)
+                if "etag" in resp.headers:
+                    known[path] = resp.headers["etag"]
+
+    total_saved = 0.0
+    for path, by_status in latencies.items():
+        full, hits = by_status.get(200, []), by_status.get(304, [])
+        total = len(full) + len(hits)
+        mean_full = statistics.mean(full) if full else 0.0
+        mean_hit = statistics.mean(hits) if hits else 0.0
+        saved = len(hits) * (mean_full - mean_hit)
+        total_saved += saved
+        print(
+            f"{path:<36} 命中率 {len(hits) / total:6.1%}  "
+            f"200 平均 {mean_full * 1000:6.2f} ms  304 平均 {mean_hit * 1000:6.2f} ms  "
+            f"节省 {saved:6.2f} s"
+        )
+    print(f"总计节省约 {total_saved:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
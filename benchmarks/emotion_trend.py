@@ -0,0 +1,93 @@
+"""
+情绪趋势统计基准测试
+
+模拟 N 个用户一年每天一条带情绪分析的记忆，按 (用户, 周) 统计效价均值和方差：
+1. json：逐行解析 emotion_score 的 JSON 文本再用 emotion_valence() 计算，Python 字典分组
+   （没有类型化列时只能这样做）
+2. columnar：直接使用类型化的 emotion_valence 列，NumPy bincount 分组求均值和方差
+   （与 SQL 中 avg / var_samp 走覆盖索引的做法等价）
+
+不依赖数据库。
+
+用法：
+    python -m benchmarks.emotion_trend --users 10000 --days 365
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from app.db.models.memory import emotion_valence
+
+EMOTIONS = ["开心", "平静", "焦虑", "疲惫", "joy", "stress"]
+
+
+def make_data(users: int, days: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    n = users * days
+    user_ids = np.repeat(np.arange(users), days)
+    day_index = np.tile(np.arange(days), users)
+    intensities = rng.random((n, 2)).round(3)
+    names = rng.integers(0, len(EMOTIONS), (n, 2))
+    documents = [
+        json.dumps({EMOTIONS[a]: x, EMOTIONS[b]: y}, ensure_ascii=False)
+        for (a, b), (x, y) in zip(names.tolist(), intensities.tolist())
+    ]
+    return user_ids, day_index, documents
+
+
+def by_json(user_ids, day_index, documents) -> dict:
+    groups = {}
+    for user_id, day, document in zip(user_ids.tolist(), day_index.tolist(), documents):
+        valence = emotion_valence(json.loads(document))
+        if valence is None:
+            continue
+        groups.setdefault((user_id, day // 7), []).append(valence)
+    return {key: (np.mean(values), np.var(values, ddof=1) if len(values) > 1 else None) for key, values in groups.items()}
+
+
+def by_columns(user_ids, day_index, valences, weeks: int):
+    valid = ~np.isnan(valences)
+    keys = (user_ids * weeks + day_index // 7)[valid]
+    values = valences[valid]
+    count = np.bincount(keys)
+    total = np.bincount(keys, weights=values)
+    squares = np.bincount(keys, weights=values * values)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = total / count
+        variance = (squares - count * mean * mean) / (count - 1)
+    return count, mean, variance
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--days", type=int, default=365)
+    args = parser.parse_args()
+
+    user_ids, day_index, documents = make_data(args.users, args.days)
+    # 写入时同步的类型化列
+    valences = np.array(
+        [v if (v := emotion_valence(json.loads(d))) is not None else np.nan for d in documents]
+    )
+    weeks = args.days // 7 + 1
+
+    start = time.perf_counter()
+    expected = by_json(user_ids, day_index, documents)
+    json_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    count, mean, _ = by_columns(user_ids, day_index, valences, weeks)
+    columnar_ms = (time.perf_counter() - start) * 1000
+
+    key = next(iter(expected))
+    assert np.isclose(expected[key][0], mean[key[0] * weeks + key[1]])
+
+    print(f"{args.users} 个用户 x {args.days} 天 = {len(documents)} 条记忆，{len(expected)} 个 (用户, 周) 桶")
+    print(f"{'json':<10} {json_ms:>10.1f} ms")
+    print(f"{'columnar':<10} {columnar_ms:>10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+长期目标分析基准测试
+
+对比两种计算方式：
+1. loop：逐个目标用 np.polyfit 回归再推算（相当于客户端逐个拉取历史后计算）
+2. vectorized：goal_analytics.analyze 一次处理全部目标（当前实现）
+
+不依赖数据库，直接生成伪目标和进度点。
+
+用法：
+    python -m benchmarks.goal_analytics --goals 500 --points 50000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.services.goal_analytics import SECONDS_PER_DAY, analyze
+
+
+def make_goals(goals: int, points: int, seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    now = 1.7e9
+    starts = now - rng.uniform(30, 1000, goals) * SECONDS_PER_DAY
+    deadlines = now + rng.uniform(-30, 1000, goals) * SECONDS_PER_DAY
+    targets = rng.uniform(100, 10000, goals)
+    point_goal = np.sort(rng.integers(0, goals, points))
+    point_time = starts[point_goal] + rng.uniform(0, 1, points) * (now - starts[point_goal])
+    order = np.lexsort((point_time, point_goal))
+    point_goal, point_time = point_goal[order], point_time[order]
+    rates = targets / ((deadlines - starts) / SECONDS_PER_DAY) * rng.uniform(0.5, 1.5, goals)
+    point_value = (point_time - starts[point_goal]) / SECONDS_PER_DAY * rates[point_goal]
+    currents = np.zeros(goals)
+    np.maximum.at(currents, point_goal, point_value)
+    milestones = [list(target * np.array([0.25, 0.5, 0.75])) for target in targets]
+    return dict(
+        starts=starts, deadlines=deadlines, targets=targets, currents=currents,
+        point_goal=point_goal, point_time=point_time, point_value=point_value,
+        milestones=milestones, now=now,
+    )
+
+
+def loop(data: dict) -> list:
+    results = []
+    for i in range(len(data["targets"])):
+        mask = data["point_goal"] == i
+        x = np.r_[0.0, (data["point_time"][mask] - data["starts"][i]) / SECONDS_PER_DAY]
+        y = np.r_[0.0, data["point_value"][mask]]
+        pace = np.polyfit(x, y, 1)[0] if len(x) > 1 and np.ptp(x) > 0 else np.nan
+        remaining = max(data["targets"][i] - data["currents"][i], 0.0)
+        projected = data["now"] + remaining / pace * SECONDS_PER_DAY if pace > 0 else np.nan
+        etas = [
+            data["now"] + (m - data["currents"][i]) / pace * SECONDS_PER_DAY if pace > 0 else np.nan
+            for m in data["milestones"][i]
+        ]
+        results.append((pace, projected, etas))
+    return results
+
+
+def timed(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--goals", type=int, default=500)
+    parser.add_argument("--points", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    data = make_goals(args.goals, args.points)
+    vectorized = analyze(**data)
+    looped = loop(data)
+    assert np.allclose(vectorized.pace, [pace for pace, _, _ in looped], equal_nan=True)
+
+    print(f"{args.goals} 个目标，{args.points} 条进度记录")
+    print(f"{'loop':<12} {timed(lambda: loop(data), args.repeat):>10.2f} ms")
+    print(f"{'vectorized':<12} {timed(lambda: analyze(**data), args.repeat):>10.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+记忆关联图遍历基准测试
+
+随机生成一个有 --edges 条边的关联图（节点按局部聚集连边，接近"前后记忆 + 相似记忆"的形状），
+统计从随机根出发 1..--max-depth 跳的邻域：
+1. build：把边表加载成邻接表（缓存未命中时的额外开销）
+2. walk：在缓存的邻接表上广度优先遍历（GraphService 命中缓存时的实现）
+3. cte rows：GRAPH_SQL 的递归部分产生的 (节点, 跳数) 行数，不依赖数据库，在邻接表上按同样的规则计算；
+   行数不超过 节点数 x depth
+4. cte（--db）：在临时表 memory_relations 上执行 GRAPH_SQL（边数超过缓存上限时的实现），
+   并校验与 walk 结果一致。临时表位于 pg_temp，会遮蔽同名正式表，不影响已有数据。
+
+用法：
+    python -m benchmarks.graph_traversal --nodes 200000 --edges 1000000 --max-depth 6
+    python -m benchmarks.graph_traversal --db --nodes 200000 --edges 1000000 --max-depth 6
+"""
+import argparse
+import time
+import uuid
+
+import numpy as np
+import sqlalchemy as sa
+
+from app.services.graph_service import GRAPH_SQL, build_adjacency, walk
+
+RELATION_TYPES = ("next", "similar", "mentions")
+
+
+def make_edges(nodes: int, edges: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    sources = rng.integers(0, nodes, edges)
+    # 大部分边连向附近的节点，少量连向任意节点
+    offsets = rng.geometric(0.05, edges) * rng.choice([-1, 1], edges)
+    targets = np.where(rng.random(edges) < 0.9, (sources + offsets) % nodes, rng.integers(0, nodes, edges))
+    keep = sources != targets
+    kinds = rng.integers(0, len(RELATION_TYPES), edges)
+    scores = rng.random(edges)
+    ids = [uuid.UUID(int=i + 1) for i in range(nodes)]
+    unique = {
+        (ids[s], ids[t], RELATION_TYPES[k]): (ids[s], ids[t], RELATION_TYPES[k], float(w))
+        for s, t, k, w in zip(sources[keep], targets[keep], kinds[keep], scores[keep])
+    }
+    return ids, list(unique.values())
+
+
+def cte_rows(adjacency, root_id, depth: int) -> int:
+    """GRAPH_SQL 中 reach 的行数：第 k 跳的行是第 k-1 跳各节点的邻居（去重），直到 depth"""
+    level = {root_id}
+    rows = 1
+    for _ in range(depth):
+        level = {neighbor for node_id in level for neighbor, _ in adjacency.get(node_id, ())}
+        rows += len(level)
+    return rows
+
+
+def timed(fn, repeat: int):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+
+def load_temp_table(db, user_id, edges) -> None:
+    db.execute(sa.text(
+        "CREATE TEMP TABLE memory_relations ("
+        "  source_id uuid, target_id uuid, relation_type varchar, relation_score float8, user_id uuid,"
+        "  PRIMARY KEY (source_id, target_id, relation_type))"
+    ))
+    db.execute(sa.text("CREATE INDEX ON memory_relations (target_id, source_id)"))
+    insert = sa.text("INSERT INTO memory_relations VALUES (:s, :t, :k, :w, :u)")
+    for i in range(0, len(edges), 10000):
+        db.execute(insert, [
+            {"s": s, "t": t, "k": k, "w": w, "u": user_id} for s, t, k, w in edges[i:i + 10000]
+        ])
+    db.execute(sa.text("ANALYZE memory_relations"))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nodes", type=int, default=200000)
+    parser.add_argument("--edges", type=int, default=1000000)
+    parser.add_argument("--max-depth", type=int, default=6)
+    parser.add_argument("--roots", type=int, default=20)
+    parser.add_argument("--db", action="store_true", help="同时在数据库上测量递归 CTE")
+    args = parser.parse_args()
+
+    ids, edges = make_edges(args.nodes, args.edges)
+    build_ms, adjacency = timed(lambda: build_adjacency(edges), 1)
+    roots = [ids[i] for i in np.random.default_rng(1).integers(0, len(ids), args.roots)]
+    print(f"{len(ids)} 个节点，{len(edges)} 条边，build {build_ms:.0f} ms")
+
+    db = None
+    if args.db:
+        from app.db.session import SessionLocal
+        db = SessionLocal()
+        user_id = uuid.uuid4()
+        load_temp_table(db, user_id, edges)
+
+    try:
+        print(
+            f"{'depth':>5} {'nodes':>10} {'edges':>10} {'walk ms':>10} {'cte rows':>10}"
+            + (f" {'cte ms':>10}" if db else "")
+        )
+        for depth in range(1, args.max_depth + 1):
+            walk_ms, results = timed(lambda: [walk(adjacency, root, depth) for root in roots], 1)
+            node_count = sum(len(nodes) for nodes, _ in results) / len(roots)
+            edge_count = sum(len(found) for _, found in results) / len(roots)
+            row_count = sum(cte_rows(adjacency, root, depth) for root in roots) / len(roots)
+            line = (
+                f"{depth:>5} {node_count:>10.0f} {edge_count:>10.0f} {walk_ms / len(roots):>10.2f} {row_count:>10.0f}"
+            )
+            if db:
+                def cte():
+                    return [
+                        db.execute(sa.text(GRAPH_SQL), {
+                            "root_id": root, "user_id": user_id, "depth": depth, "types": None
+                        }).all()
+                        for root in roots
+                    ]
+                cte_ms, rows = timed(cte, 1)
+                for (nodes, found), result in zip(results, rows):
+                    assert {row.id: row.depth for row in result if row.kind == "node"} == nodes
+                    assert len([row for row in result if row.kind == "edge"]) == len(found)
+                line += f" {cte_ms / len(roots):>10.2f}"
+            print(line)
+    finally:
+        if db:
+            db.rollback()
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
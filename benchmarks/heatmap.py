@@ -0,0 +1,96 @@
+"""
+活动热力图基准测试
+
+模拟两年的时间轴（每天若干活动，含跨午夜和并行的活动），统计星期 x 小时的活动时长：
+1. loop：逐个活动按小时循环切分（合并重叠区间后），Python 累加
+2. vectorized：merge_intervals + split_by_hour + bincount（无汇总时的实现）
+3. rollup：从按天汇总的 天数 x 24 矩阵累加到星期 x 小时（命中 heatmap_rollup 时的实现）
+
+不依赖数据库。
+
+用法：
+    python -m benchmarks.heatmap --days 730 --per-day 12
+"""
+import argparse
+import time
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from app.services.heatmap_service import EPOCH, HeatmapService
+from app.services.interval_engine import (
+    SECONDS_PER_HOUR,
+    hour_of_week,
+    merge_intervals,
+    split_by_hour,
+    to_seconds,
+)
+
+
+def make_intervals(days: int, per_day: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    first = datetime(2023, 1, 2)
+    day_offsets = np.repeat(np.arange(days), per_day)
+    starts = to_seconds([first])[0] + day_offsets * 86400 + rng.uniform(6, 25, len(day_offsets)) * SECONDS_PER_HOUR
+    ends = starts + rng.exponential(1.5, len(starts)) * SECONDS_PER_HOUR
+    return first.date(), starts, ends
+
+
+def loop(starts, ends) -> np.ndarray:
+    heat = np.zeros((7, 24))
+    for start, end in zip(*merge_intervals(starts, ends)):
+        hour = int(start // SECONDS_PER_HOUR)
+        while hour * SECONDS_PER_HOUR < end:
+            seconds = min(end, (hour + 1) * SECONDS_PER_HOUR) - max(start, hour * SECONDS_PER_HOUR)
+            weekday = (hour // 24 + 3) % 7
+            heat[weekday, hour % 24] += seconds
+            hour += 1
+    return heat
+
+
+def vectorized(starts, ends) -> np.ndarray:
+    hours, seconds = split_by_hour(*merge_intervals(starts, ends))
+    return np.bincount(hour_of_week(hours), weights=seconds, minlength=168).reshape(7, 24)
+
+
+def day_matrix(first_day: date, days: int, starts, ends) -> np.ndarray:
+    hours, seconds = split_by_hour(*merge_intervals(starts, ends))
+    cells = hours - (first_day - EPOCH).days * 24
+    keep = cells < (days + 1) * 24
+    return np.bincount(cells[keep], weights=seconds[keep], minlength=(days + 1) * 24).reshape(-1, 24)
+
+
+def timed(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--per-day", type=int, default=12)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    first_day, starts, ends = make_intervals(args.days, args.per_day)
+    matrix = day_matrix(first_day, args.days, starts, ends)
+
+    def rollup():
+        heat = np.zeros((7, 24))
+        HeatmapService._add_days(heat, first_day, matrix)
+        return heat
+
+    expected = loop(starts, ends)
+    assert np.allclose(expected, vectorized(starts, ends))
+    assert np.allclose(expected, rollup())
+
+    print(f"{args.days} 天，{len(starts)} 个活动，{expected.sum() / 3600:.0f} 小时")
+    print(f"{'loop':<12} {timed(lambda: loop(starts, ends), args.repeat):>10.2f} ms")
+    print(f"{'vectorized':<12} {timed(lambda: vectorized(starts, ends), args.repeat):>10.2f} ms")
+    print(f"{'rollup':<12} {timed(rollup, args.repeat):>10.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
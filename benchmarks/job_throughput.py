@@ -0,0 +1,102 @@
+"""
+后台任务吞吐基准测试
+
+向 jobs 表写入 --jobs 个空任务（类型 benchmark.noop），在同一进程内启动 --workers 个 JobRunner
+（各自独立的 worker_id 和连接，模拟多个进程），每个 worker 的并发上限为 --concurrency，
+统计全部任务执行完的耗时和 jobs/sec，并校验没有任务被重复执行。结束后删除基准任务。
+
+需要可用的数据库（已执行迁移）。
+
+用法：
+    python -m benchmarks.job_throughput --jobs 20000 --workers 4 --concurrency 16
+"""
+import argparse
+import asyncio
+import time
+from collections import Counter
+
+import sqlalchemy as sa
+
+from app.db.models.enums import JobStatus
+from app.db.models.job import Job
+from app.db.session import SessionLocal
+from app.services.job_runner import JobRunner, job
+
+JOB_TYPE = "benchmark.noop"
+executed = Counter()
+
+
+def noop(db, payload: dict) -> None:
+    executed[payload["n"]] += 1
+
+
+def enqueue(total: int) -> float:
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        for offset in range(0, total, 5000):
+            db.execute(sa.insert(Job), [
+                {
+                    "job_type": JOB_TYPE,
+                    "payload": {"n": n},
+                    "priority": n % 3,
+                    "status": JobStatus.QUEUED,
+                    "attempts": 0,
+                    "max_attempts": 1,
+                    "run_at": sa.func.timezone("utc", sa.func.now()),
+                }
+                for n in range(offset, min(offset + 5000, total))
+            ])
+        db.commit()
+        return time.perf_counter() - start
+    finally:
+        db.close()
+
+
+def cleanup() -> None:
+    db = SessionLocal()
+    try:
+        db.execute(sa.delete(Job).where(Job.job_type == JOB_TYPE))
+        db.commit()
+    finally:
+        db.close()
+
+
+async def drain(workers: int, total: int) -> float:
+    runners = [JobRunner(worker_id=f"benchmark-{i}") for i in range(workers)]
+    start = time.perf_counter()
+    for runner in runners:
+        runner.start()
+    while sum(runner.processed for runner in runners) < total:
+        await asyncio.sleep(0.05)
+    elapsed = time.perf_counter() - start
+    for runner in runners:
+        await runner.stop()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=20000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    job(JOB_TYPE, concurrency=args.concurrency)(noop)
+    cleanup()
+    try:
+        enqueue_seconds = enqueue(args.jobs)
+        print(f"入队 {args.jobs} 个任务：{enqueue_seconds:.2f} s（{args.jobs / enqueue_seconds:.0f} jobs/sec）")
+
+        elapsed = asyncio.run(drain(args.workers, args.jobs))
+        assert len(executed) == args.jobs and max(executed.values()) == 1, "有任务被重复执行或遗漏"
+        print(
+            f"{args.workers} 个 worker x 并发 {args.concurrency}：{elapsed:.2f} s"
+            f"（{args.jobs / elapsed:.0f} jobs/sec）"
+        )
+    finally:
+        cleanup()
+
+
+if __name__ == "__main__":
+    main()
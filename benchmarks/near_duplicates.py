@@ -0,0 +1,153 @@
+"""
+近似重复检测基准测试
+
+生成一个用户的合成快速记录流：由短语模板拼出的原始记录，加上若干近似重复
+（原样重复、空白标点差异、增删改一两个字），以及只差一个数字的"相似但不同"的记录。
+按时间顺序逐条写入 MinHashIndex，与 DedupeService 写入时的流程相同：
+1. 精确匹配：按规范化文本做哈希比较（对照）
+2. minhash：MinHash LSH 索引，阈值 DEDUPE_MIN_SIMILARITY
+3. brute force：与窗口内所有签名逐一比较（同样的签名和阈值，不分桶）
+
+输出各方法的准确率、召回率和单条耗时。不依赖数据库。
+
+用法：
+    python -m benchmarks.near_duplicates --notes 20000 --dup-rate 0.3
+"""
+import argparse
+import random
+import time
+import uuid
+from datetime import datetime
+
+import numpy as np
+
+from app.core.config import settings
+from app.db.models.enums import MemoryType
+from app.services.dedupe_service import MinHashIndex, minhash, normalize_content, similarity
+
+SUBJECTS = ["今天", "上午", "下午", "晚上", "周末", "早上"]
+ACTIONS = [
+    "去超市买了牛奶和面包", "跑步", "读完了一章《深度工作》", "和朋友吃饭聊了很久", "整理房间",
+    "开会讨论季度计划", "写周报", "学习 Python 异步编程", "给妈妈打电话", "去医院复查",
+    "练习吉他", "看了一部电影", "修复了登录页面的 bug", "背了英语单词", "做了一顿晚饭",
+]
+DETAILS = ["感觉很好", "有点累", "效率很高", "需要继续坚持", "下次要早点开始", "心情不错", "收获很多", ""]
+CHARS = "的一是在不了有和人这中大为上个我以要他时来用们生到作地于出就分对成会可发年动同工也能下过子说"
+
+
+def make_note(rng: random.Random) -> str:
+    return (
+        f"{rng.choice(SUBJECTS)}{rng.choice(ACTIONS)}{rng.randint(1, 60)}分钟，"
+        f"{rng.choice(DETAILS)}{''.join(rng.choice(CHARS) for _ in range(rng.randint(4, 16)))}"
+    )
+
+
+def mutate(rng: random.Random, note: str) -> str:
+    chars = list(note)
+    for _ in range(rng.randint(0, 2)):
+        op = rng.choice(["insert", "delete", "replace", "punct", "space"])
+        pos = rng.randrange(len(chars))
+        if op == "insert":
+            chars.insert(pos, rng.choice(CHARS))
+        elif op == "delete" and len(chars) > 4:
+            del chars[pos]
+        elif op == "replace":
+            chars[pos] = rng.choice(CHARS)
+        elif op == "punct":
+            chars.insert(pos, rng.choice("，。！？、"))
+        else:
+            chars.insert(pos, " ")
+    return "".join(chars)
+
+
+def make_stream(notes: int, dup_rate: float, seed: int = 0):
+    """返回 [(文本, 组号)]，同组的记录互为近似重复"""
+    rng = random.Random(seed)
+    stream, originals = [], []
+    for _ in range(notes):
+        if originals and rng.random() < dup_rate:
+            group = rng.randrange(max(len(originals) - 200, 0), len(originals))
+            stream.append((mutate(rng, originals[group]), group))
+        else:
+            note = make_note(rng)
+            originals.append(note)
+            stream.append((note, len(originals) - 1))
+    return stream
+
+
+def score(stream, predicted):
+    """predicted[i] 为第 i 条判定为重复的更早记录下标（None 表示不重复）"""
+    seen_groups = set()
+    true_dups = flagged = correct = 0
+    for (_, group), match in zip(stream, predicted):
+        is_dup = group in seen_groups
+        seen_groups.add(group)
+        true_dups += is_dup
+        if match is not None:
+            flagged += 1
+            correct += stream[match][1] == group
+    return correct / max(flagged, 1), correct / max(true_dups, 1), true_dups
+
+
+def run_exact(stream):
+    seen, predicted = {}, []
+    start = time.perf_counter()
+    for i, (text, _) in enumerate(stream):
+        key = hash(normalize_content(text))
+        predicted.append(seen.get(key))
+        seen.setdefault(key, i)
+    return predicted, time.perf_counter() - start
+
+
+def run_minhash(stream, threshold: float):
+    index, positions, predicted = MinHashIndex(), {}, []
+    now = datetime.now()
+    start = time.perf_counter()
+    for i, (text, _) in enumerate(stream):
+        signature = minhash(text)
+        found = index.nearest(signature, MemoryType.QUICK_NOTE, threshold)
+        predicted.append(positions[found[0]] if found else None)
+        memory_id = uuid.UUID(int=i + 1)
+        positions[memory_id] = i
+        index.add(memory_id, signature, MemoryType.QUICK_NOTE, now)
+    return predicted, time.perf_counter() - start
+
+
+def run_brute_force(stream, threshold: float):
+    signatures = np.empty((len(stream), 64), dtype=np.uint32)
+    predicted = []
+    start = time.perf_counter()
+    for i, (text, _) in enumerate(stream):
+        signature = minhash(text)
+        match = None
+        if i:
+            scores = (signatures[:i] == signature).mean(axis=1)
+            best = int(scores.argmax())
+            match = best if scores[best] >= threshold else None
+        predicted.append(match)
+        signatures[i] = signature
+    return predicted, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--notes", type=int, default=20000)
+    parser.add_argument("--dup-rate", type=float, default=0.3)
+    parser.add_argument("--threshold", type=float, default=settings.DEDUPE_MIN_SIMILARITY)
+    args = parser.parse_args()
+
+    stream = make_stream(args.notes, args.dup_rate)
+    print(f"{len(stream)} 条记录，阈值 {args.threshold}")
+    print(f"{'method':<12} {'precision':>10} {'recall':>10} {'us/note':>10}")
+    for name, run in (
+        ("exact", run_exact),
+        ("minhash", lambda s: run_minhash(s, args.threshold)),
+        ("brute force", lambda s: run_brute_force(s, args.threshold)),
+    ):
+        predicted, elapsed = run(stream)
+        precision, recall, _ = score(stream, predicted)
+        print(f"{name:<12} {precision:>10.3f} {recall:>10.3f} {elapsed / len(stream) * 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+分区裁剪验证
+
+对 TimelineService / CoreFocusService 的热点查询执行 EXPLAIN (FORMAT JSON)，
+列出计划中实际扫描的分区，确认按天/范围查询只访问对应的月分区。
+没有时间条件的查询（长期目标列表、进行中活动）会扫描所有分区，这里一并列出供参考。
+
+用法：
+    python -m benchmarks.partition_pruning --date 2024-01-11
+"""
+import argparse
+import json
+import uuid
+from datetime import datetime, timedelta
+
+import sqlalchemy as sa
+
+from app.db.session import SessionLocal
+from app.db.models.memory import Memory
+from app.db.models.enums import MemoryType
+from app.services.timeline_service import TimelineService, TIMELINE_COLUMNS, MAX_ACTIVITY_SPAN
+from app.services.core_focus_service import (
+    CoreFocusService,
+    IMPORTANT_MATTER_COLUMNS,
+    LONG_TERM_GOAL_COLUMNS,
+)
+
+
+def scanned_relations(db, stmt) -> list:
+    """EXPLAIN 计划中出现的所有表（分区）名"""
+    sql = str(stmt.compile(db.get_bind(), compile_kwargs={"literal_binds": True}))
+    plan = db.execute(sa.text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    relations = []
+
+    def walk(node):
+        if "Relation Name" in node:
+            relations.append(node["Relation Name"])
+        for child in node.get("Plans", []):
+            walk(child)
+
+    walk(plan[0]["Plan"])
+    return sorted(set(relations))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--date", default=datetime.now().strftime("%Y-%m-%d"))
+    args = parser.parse_args()
+
+    day = datetime.strptime(args.date, "%Y-%m-%d")
+    user_id = uuid.uuid4()
+    db = SessionLocal()
+    try:
+        timeline = TimelineService(db)
+        core_focus = CoreFocusService(db)
+        window_start = day
+        window_end = day + timedelta(days=1)
+
+        queries = {
+            "timeline.get_daily_timeline": sa.select(*TIMELINE_COLUMNS).where(
+                *timeline._daily_filter(user_id, day)
+            ),
+            "timeline.get_daily_version": sa.select(
+                sa.func.max(Memory.updated_at), sa.func.count()
+            ).where(*timeline._daily_filter(user_id, day)),
+            "timeline.get_time_summary": sa.select(Memory.start_time, Memory.end_time).where(
+                Memory.user_id == user_id,
+                Memory.memory_type == MemoryType.TIMELINE,
+                Memory.start_time >= window_start - MAX_ACTIVITY_SPAN,
+                Memory.start_time < window_end
+            ),
+            "core_focus.get_daily_important_matters": sa.select(*IMPORTANT_MATTER_COLUMNS).where(
+                *core_focus._daily_important_filter(user_id, day.date())
+            ),
+            "core_focus.get_long_term_goals": sa.select(*LONG_TERM_GOAL_COLUMNS).where(
+                *core_focus._long_term_filter(user_id)
+            ),
+            "timeline.get_current_activities": sa.select(*TIMELINE_COLUMNS).where(
+                Memory.user_id == user_id,
+                Memory.is_ongoing == True
+            ),
+        }
+
+        for name, stmt in queries.items():
+            relations = scanned_relations(db, stmt)
+            print(f"{name:<42} 扫描 {len(relations):>3} 个分区: {', '.join(relations)}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
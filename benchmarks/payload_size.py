@@ -0,0 +1,67 @@
+"""
+稀疏字段与响应压缩基准测试
+
+对典型日视图（40 条）和月视图（30 天 × 40 条）分别测试：
+- full+fmt：全部字段并带 formatted_* 字段
+- full：全部字段
+- sparse：移动端常用的 fields=content,start_time,duration
+
+每种组合报告原始 / gzip / br（安装了 brotli 时）的字节数，以及服务端序列化 + 压缩的 CPU 时间。
+
+用法：
+    python -m benchmarks.payload_size --repeat 50
+"""
+import argparse
+import time
+
+import orjson
+
+from app.api.v1.schemas.timeline import TimelineResponse
+from app.core.compression import CompressionMiddleware, brotli
+from benchmarks.serialization import make_rows
+
+SPARSE_FIELDS = ["content", "start_time", "duration"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    compressor = CompressionMiddleware(app=None)
+    encodings = [None, "gzip"] + (["br"] if brotli is not None else [])
+    variants = {
+        "full+fmt": dict(formatted=True, fields=None),
+        "full": dict(formatted=False, fields=None),
+        "sparse": dict(formatted=False, fields=SPARSE_FIELDS),
+    }
+
+    for view, n in (("日视图", 40), ("月视图", 30 * 40)):
+        all_rows = make_rows(n)
+        print(f"=== {view}（{n} 条）===")
+        for label, options in variants.items():
+            if options["fields"]:
+                # 模拟数据库只选出请求的列
+                keep = TimelineResponse.source_columns(options["fields"])
+                rows = [type(r)(**{k: getattr(r, k) for k in keep}) for r in all_rows]
+            else:
+                rows = all_rows
+
+            for encoding in encodings:
+                start = time.process_time()
+                for _ in range(args.repeat):
+                    body = orjson.dumps([
+                        TimelineResponse.serialize_row(r, options["formatted"], options["fields"])
+                        for r in rows
+                    ])
+                    if encoding:
+                        body = compressor.compress(body, encoding)
+                cpu = (time.process_time() - start) / args.repeat
+                print(
+                    f"{label:<9} {encoding or 'identity':<9} "
+                    f"{len(body):>9} 字节  CPU {cpu * 1000:7.3f} ms/请求"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+连接池大小基准测试
+
+用 --threads 个线程模拟同一个 worker 进程内的并发请求：每个请求借出一个连接，
+执行一条查询后在事务内再停留 --hold 毫秒（模拟应用代码处理），然后归还。
+依次用 --sizes 中的每个 DB_POOL_SIZE（max_overflow 为 0，便于看清排队）跑 --seconds 秒，
+输出吞吐、借出等待的 p50/p99、超时次数和服务端实际连接数；另外对比开启 pre-ping 时的吞吐。
+
+需要可用的数据库。经 PgBouncer 测试时用 --url 指向 PgBouncer 端口并设置 DB_PGBOUNCER=true。
+
+用法：
+    python -m benchmarks.pool_sizing --threads 64 --sizes 2,5,10,20,40 --hold 5
+    DB_PGBOUNCER=true python -m benchmarks.pool_sizing --url postgresql+psycopg://user:pw@localhost:6432/db
+"""
+import argparse
+import threading
+import time
+
+import sqlalchemy as sa
+
+from app.core.config import settings
+from app.db.session import POOL_CHECKOUT_WAIT, POOL_TIMEOUTS, make_engine
+
+QUERY = sa.text("SELECT count(*) FROM memories WHERE start_time >= now() - interval '1 day'")
+CONNECTIONS = sa.text(
+    "SELECT count(*) FROM pg_stat_activity WHERE datname = current_database() AND backend_type = 'client backend'"
+)
+
+
+def run(url: str, name: str, threads: int, seconds: float, hold: float) -> dict:
+    engine = make_engine(url, name=name)
+    done = [0] * threads
+    errors = [0] * threads
+    stop = threading.Event()
+
+    def worker(index: int) -> None:
+        while not stop.is_set():
+            try:
+                with engine.connect() as conn:
+                    conn.execute(QUERY).scalar()
+                    time.sleep(hold)
+                done[index] += 1
+            except sa.exc.TimeoutError:
+                errors[index] += 1
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    time.sleep(seconds)
+    with engine.connect() as conn:
+        server_connections = conn.execute(CONNECTIONS).scalar()
+    stop.set()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    engine.dispose()
+    return {
+        "rps": sum(done) / elapsed,
+        "p50": POOL_CHECKOUT_WAIT.quantile(0.5, name),
+        "p99": POOL_CHECKOUT_WAIT.quantile(0.99, name),
+        "timeouts": int(POOL_TIMEOUTS.value(name)),
+        "server_connections": server_connections,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default=settings.get_database_url)
+    parser.add_argument("--threads", type=int, default=64)
+    parser.add_argument("--sizes", default="2,5,10,20,40")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--hold", type=float, default=5, help="每个请求持有连接的额外毫秒数")
+    parser.add_argument("--timeout", type=float, default=settings.DB_POOL_TIMEOUT)
+    args = parser.parse_args()
+
+    settings.DB_MAX_OVERFLOW = 0
+    settings.DB_POOL_TIMEOUT = args.timeout
+    hold = args.hold / 1000
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    print(f"{args.threads} 个并发线程，每个请求持有连接 {args.hold} ms，PgBouncer 模式: {settings.DB_PGBOUNCER}")
+    print(f"{'pool':>5} {'pre-ping':>8} {'req/s':>9} {'wait p50':>10} {'wait p99':>10} {'timeouts':>9} {'server conns':>13}")
+    for size in sizes:
+        settings.DB_POOL_SIZE = size
+        for pre_ping in (False, True):
+            settings.DB_POOL_PRE_PING = pre_ping
+            result = run(args.url, f"bench-{size}-{pre_ping}", args.threads, args.seconds, hold)
+            print(
+                f"{size:>5} {str(pre_ping):>8} {result['rps']:>9.0f} {result['p50'] * 1000:>8.1f}ms "
+                f"{result['p99'] * 1000:>8.1f}ms {result['timeouts']:>9} {result['server_connections']:>13}"
+            )
+
+
+if __name__ == "__main__":
+    main()
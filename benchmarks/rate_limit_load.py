@@ -0,0 +1,124 @@
+"""
+限流和过载保护负载测试
+
+在进程内启动一个带 RateLimitMiddleware 的测试应用，只读接口持有一个“数据库连接”（--pool 个槽位的信号量）
+--work 毫秒后返回。--users 个正常用户各自按泊松过程每秒发 --rate 个请求，同时一个异常客户端用
+--abusive 个并发循环不停请求（模拟轮询死循环，每次请求之间只有 --rtt 毫秒的网络往返）。
+分别在关闭和开启限流时运行 --seconds 秒，输出正常用户的 p50/p99 延迟、成功率以及异常客户端被放行 / 拒绝的请求数。
+
+不依赖数据库；令牌桶和并发上限取 app/core/config.py 中的默认设置。
+
+用法：
+    python -m benchmarks.rate_limit_load --users 20 --rate 5 --abusive 50 --seconds 10
+"""
+import argparse
+import asyncio
+import random
+import time
+
+import httpx
+import numpy as np
+from fastapi import FastAPI
+
+from app.core.config import settings
+from app.core.ratelimit import RateLimitMiddleware
+from app.core.security import create_access_token
+
+
+def build_app(pool: int, work: float, limited: bool) -> FastAPI:
+    app = FastAPI()
+    slots = asyncio.Semaphore(pool)
+
+    @app.get(f"{settings.API_V1_STR}/timeline/daily")
+    async def daily():
+        async with slots:
+            await asyncio.sleep(work)
+        return {"ok": True}
+
+    if limited:
+        app.add_middleware(RateLimitMiddleware)
+    return app
+
+
+async def good_user(client, headers, rate: float, deadline: float, latencies: list, statuses: list) -> None:
+    while time.perf_counter() < deadline:
+        await asyncio.sleep(random.expovariate(rate))
+        start = time.perf_counter()
+        response = await client.get(f"{settings.API_V1_STR}/timeline/daily", headers=headers)
+        latencies.append(time.perf_counter() - start)
+        statuses.append(response.status_code)
+
+
+async def abusive_loop(app, token: str, rtt: float, deadline: float, statuses: list) -> None:
+    """直接调用 ASGI 应用，只计服务端的处理开销；rtt 模拟网络往返，限制空转的速率"""
+    scope = {
+        "type": "http", "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": f"{settings.API_V1_STR}/timeline/daily", "raw_path": b"", "root_path": "",
+        "query_string": b"", "headers": [(b"authorization", f"Bearer {token}".encode())],
+        "client": ("10.0.0.1", 1234), "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    while time.perf_counter() < deadline:
+        status = []
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                status.append(message["status"])
+
+        await app(dict(scope), receive, send)
+        statuses.append(status[0])
+        await asyncio.sleep(rtt)
+
+
+async def run(args, limited: bool) -> dict:
+    app = build_app(args.pool, args.work / 1000, limited)
+    good_latencies: list = []
+    good_statuses: list = []
+    abusive_statuses: list = []
+    deadline = time.perf_counter() + args.seconds
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        good = [
+            {"Authorization": "Bearer " + create_access_token({"sub": f"user{i}@example.com"})}
+            for i in range(args.users)
+        ]
+        abusive = create_access_token({"sub": "abusive@example.com"})
+        await asyncio.gather(
+            *[good_user(client, headers, args.rate, deadline, good_latencies, good_statuses) for headers in good],
+            *[abusive_loop(app, abusive, args.rtt / 1000, deadline, abusive_statuses) for _ in range(args.abusive)],
+        )
+    return {
+        "p50": np.percentile(good_latencies, 50) * 1000,
+        "p99": np.percentile(good_latencies, 99) * 1000,
+        "ok": good_statuses.count(200) / len(good_statuses),
+        "abusive_ok": abusive_statuses.count(200),
+        "abusive_rejected": len(abusive_statuses) - abusive_statuses.count(200),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--rate", type=float, default=5, help="每个正常用户每秒的请求数")
+    parser.add_argument("--abusive", type=int, default=50, help="异常客户端的并发循环数")
+    parser.add_argument("--rtt", type=float, default=2, help="异常客户端每次请求的网络往返毫秒数")
+    parser.add_argument("--pool", type=int, default=10, help="数据库连接槽位数")
+    parser.add_argument("--work", type=float, default=10, help="每个请求占用连接的毫秒数")
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    print(f"{args.users} 个正常用户 × {args.rate} req/s，异常客户端 {args.abusive} 个并发循环，连接槽位 {args.pool}")
+    print(f"{'limited':>8} {'good p50':>10} {'good p99':>10} {'good ok':>8} {'abusive ok':>11} {'rejected':>9}")
+    for limited in (False, True):
+        result = asyncio.run(run(args, limited))
+        print(
+            f"{str(limited):>8} {result['p50']:>8.1f}ms {result['p99']:>8.1f}ms {result['ok']:>8.1%} "
+            f"{result['abusive_ok']:>11} {result['abusive_rejected']:>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+列表响应序列化基准测试
+
+对比 1 / 100 / 10k 条时间轴记录的两种序列化方式：
+1. pydantic：逐行 TimelineResponse.from_orm，再按 response_model 整体校验并输出 JSON（旧实现）
+2. orjson：TimelineResponse.serialize_row 直接转字典后 orjson.dumps（当前实现），
+   分别测试带与不带 formatted_* 字段
+
+不依赖数据库，直接用内存中的伪查询行。
+
+用法：
+    python -m benchmarks.serialization --repeat 20
+"""
+import argparse
+import time
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import List
+
+import orjson
+from pydantic import TypeAdapter
+
+from app.api.v1.schemas.timeline import TimelineResponse
+
+
+class FakeRow(SimpleNamespace):
+    """模拟 SQLAlchemy Row：支持属性访问和 _mapping"""
+
+    @property
+    def _mapping(self):
+        return vars(self)
+
+
+def make_rows(n: int) -> List[FakeRow]:
+    start = datetime(2024, 1, 11, 8, 0, 0)
+    return [
+        FakeRow(
+            id=uuid.uuid4(),
+            content=f"活动 {i}",
+            start_time=start + timedelta(minutes=i),
+            end_time=start + timedelta(minutes=i + 1),
+            duration=60.0,
+            is_ongoing=False,
+            target_duration=3600.0,
+            completion_rate=1.6,
+            tags=["学习", "编程"],
+            allow_parallel=False,
+            parallel_group=None,
+            priority=1,
+        )
+        for i in range(n)
+    ]
+
+
+def bench(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    adapter = TypeAdapter(List[TimelineResponse])
+
+    def pydantic_path(rows):
+        models = [TimelineResponse.from_orm(r) for r in rows]
+        return adapter.dump_json(adapter.validate_python(models, from_attributes=True))
+
+    def orjson_path(rows, formatted):
+        return orjson.dumps([TimelineResponse.serialize_row(r, formatted) for r in rows])
+
+    print(f"{'条数':>6} {'pydantic':>12} {'orjson':>12} {'orjson+fmt':>12} {'字节(无/有fmt)':>18}")
+    for n in (1, 100, 10_000):
+        rows = make_rows(n)
+        repeat = max(1, args.repeat if n < 10_000 else args.repeat // 4)
+        t_pyd = bench(lambda: pydantic_path(rows), repeat)
+        t_fast = bench(lambda: orjson_path(rows, False), repeat)
+        t_fmt = bench(lambda: orjson_path(rows, True), repeat)
+        size = f"{len(orjson_path(rows, False))}/{len(orjson_path(rows, True))}"
+        print(
+            f"{n:>6} {t_pyd * 1000:>10.3f}ms {t_fast * 1000:>10.3f}ms "
+            f"{t_fmt * 1000:>10.3f}ms {size:>18}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+分片写入扩展性基准测试
+
+依次只用前 1、2、…、N 个分片（POSTGRES_SHARD_URLS），每个分片 --writers 个进程，
+每个进程代表该分片上的一个用户，逐条插入记忆并单独提交（与 API 的写请求一致，瓶颈在 WAL 刷盘），
+运行 --seconds 秒后统计总写入速率和相对单分片的扩展效率。结束后删除基准数据。
+
+在本机起几个 PostgreSQL 实例作为分片（每个实例各自的 WAL，才能体现扩展性；
+实例放在不同磁盘上结果更接近线性）：
+    for port in 5441 5442 5443 5444; do
+        initdb -D /tmp/shard$port -U postgres
+        pg_ctl -D /tmp/shard$port -o "-p $port" -l /tmp/shard$port.log start
+        createdb -h localhost -p $port -U postgres memory_db
+    done
+    export POSTGRES_SHARD_URLS='{"s1": "postgresql://postgres@localhost:5441/memory_db", ...}'
+    python -m app.services.shard_service migrate
+
+用法：
+    python -m benchmarks.shard_scaling --writers 8 --seconds 10
+"""
+import argparse
+import multiprocessing
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import insert
+
+from app.db.models.enums import MemoryType
+from app.db.models.memory import Memory
+from app.db.models.shard import UserShard
+from app.db.models.user import User
+from app.db.session import SessionLocal, make_engine
+from app.db.shards import GLOBAL_SHARD, copy_user, shard_router
+
+
+def writer(url: str, user_id: uuid.UUID, seconds: float, results) -> None:
+    engine = make_engine(url, name="bench")
+    table = Memory.__table__
+    start_time = datetime.now() - timedelta(days=1)
+    count = 0
+    deadline = time.perf_counter() + seconds
+    with engine.connect() as conn:
+        while time.perf_counter() < deadline:
+            conn.execute(table.insert().values(
+                id=uuid.uuid4(),
+                user_id=user_id,
+                memory_type=MemoryType.QUICK_NOTE,
+                content=f"benchmark note {count}",
+                start_time=start_time + timedelta(seconds=count),
+            ))
+            conn.commit()
+            count += 1
+    engine.dispose()
+    results.put(count)
+
+
+def create_users(names, writers: int) -> dict:
+    """每个分片创建 writers 个基准用户：全局库 users + 分片副本 + 目录"""
+    users = {}
+    db = SessionLocal()
+    try:
+        for name in names:
+            users[name] = []
+            for _ in range(writers):
+                user_id = uuid.uuid4()
+                user = User(
+                    id=user_id, email=f"bench-{user_id}@example.com", username=f"bench-{user_id}",
+                    hashed_password="-",
+                )
+                db.add(user)
+                db.flush()
+                with shard_router.shards[name].session_factory() as target:
+                    copy_user(target, user)
+                    target.commit()
+                db.execute(insert(UserShard).values(user_id=user_id, shard=name, moving=False))
+                users[name].append(user_id)
+        db.commit()
+    finally:
+        db.close()
+    return users
+
+
+def cleanup(users: dict) -> None:
+    db = SessionLocal()
+    try:
+        for name, user_ids in users.items():
+            with shard_router.shards[name].session_factory() as target:
+                target.execute(sa.delete(Memory.__table__).where(Memory.user_id.in_(user_ids)))
+                target.execute(sa.delete(User.__table__).where(User.id.in_(user_ids)))
+                target.commit()
+            db.execute(sa.delete(UserShard).where(UserShard.user_id.in_(user_ids)))
+            db.execute(sa.delete(User.__table__).where(User.id.in_(user_ids)))
+        db.commit()
+    finally:
+        db.close()
+
+
+def run(names, users: dict, seconds: float) -> float:
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(
+            target=writer,
+            args=(shard_router.shards[name].engine.url.render_as_string(hide_password=False), user_id, seconds, results),
+        )
+        for name in names
+        for user_id in users[name]
+    ]
+    for process in processes:
+        process.start()
+    total = sum(results.get() for _ in processes)
+    for process in processes:
+        process.join()
+    return total / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--writers", type=int, default=8, help="每个分片的写入进程数")
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    names = [name for name in shard_router.shards if name != GLOBAL_SHARD]
+    assert names, "未配置 POSTGRES_SHARD_URLS"
+    users = create_users(names, args.writers)
+    try:
+        print(f"{'shards':>6} {'writers':>8} {'inserts/s':>10} {'per shard':>10} {'scaling':>8}")
+        baseline = None
+        for count in range(1, len(names) + 1):
+            rate = run(names[:count], users, args.seconds)
+            baseline = baseline or rate
+            print(
+                f"{count:>6} {count * args.writers:>8} {rate:>10.0f} {rate / count:>10.0f} "
+                f"{rate / baseline / count:>8.0%}"
+            )
+    finally:
+        cleanup(users)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+并发相同读请求合并基准测试
+
+模拟多设备同时打开 / 客户端重试：--users 个用户各发起 --bursts 轮突发，每轮 --duplicates 个
+相同请求在 --jitter 毫秒内先后到达。分别在关闭和开启合并时统计实际查询次数和请求延迟。
+
+默认用 time.sleep(--latency 毫秒) 模拟一次查询，不依赖数据库；
+--db 时对真实数据库调用 TimelineService.get_daily_version + get_daily_timeline（日视图接口的两次查询），
+用 SQLAlchemy 事件统计实际执行的语句数，--user-id 指定有数据的用户。
+
+用法：
+    python -m benchmarks.single_flight --users 50 --duplicates 5 --latency 20
+    python -m benchmarks.single_flight --db --user-id <uuid> --duplicates 5
+"""
+import argparse
+import asyncio
+import random
+import time
+from uuid import UUID, uuid4
+
+import numpy as np
+from sqlalchemy import event
+
+from app.core.singleflight import SingleFlight
+
+
+async def simulated_request(flight: SingleFlight, user_id, latency: float, counter: list) -> None:
+    def query():
+        counter[0] += 1
+        time.sleep(latency)
+        return [user_id]
+
+    await flight.run((user_id, "bench"), query)
+
+
+async def db_request(flight: SingleFlight, user_id, latency: float, counter: list) -> None:
+    from app.db.session import SessionLocal
+    from app.services import timeline_service
+
+    timeline_service.single_flight = flight
+    db = SessionLocal()
+    try:
+        service = timeline_service.TimelineService(db)
+        await service.get_daily_version(user_id=user_id)
+        await service.get_daily_timeline(user_id=user_id)
+    finally:
+        db.close()
+
+
+async def burst(request, flight, user_id, duplicates: int, jitter: float, latency: float, counter, latencies) -> None:
+    async def one(delay: float) -> None:
+        await asyncio.sleep(delay)
+        start = time.perf_counter()
+        await request(flight, user_id, latency, counter)
+        latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*[one(random.uniform(0, jitter)) for _ in range(duplicates)])
+
+
+async def run(request, users, args, enabled: bool, counter: list) -> dict:
+    flight = SingleFlight(timeout=10.0, enabled=enabled)
+    latencies: list = []
+    counter[0] = 0
+    start = time.perf_counter()
+    for _ in range(args.bursts):
+        await asyncio.gather(*[
+            burst(request, flight, user_id, args.duplicates, args.jitter / 1000, args.latency / 1000, counter, latencies)
+            for user_id in users
+        ])
+    elapsed = time.perf_counter() - start
+    return {
+        "requests": len(latencies),
+        "queries": counter[0],
+        "p50": np.percentile(latencies, 50) * 1000,
+        "p99": np.percentile(latencies, 99) * 1000,
+        "elapsed": elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--bursts", type=int, default=10)
+    parser.add_argument("--duplicates", type=int, default=5, help="每轮突发中相同请求的个数")
+    parser.add_argument("--jitter", type=float, default=10, help="同一轮请求的到达时间分布（毫秒）")
+    parser.add_argument("--latency", type=float, default=20, help="模拟查询耗时（毫秒）")
+    parser.add_argument("--db", action="store_true", help="使用真实数据库")
+    parser.add_argument("--user-id", type=UUID, default=None)
+    args = parser.parse_args()
+
+    counter = [0]
+    if args.db:
+        from app.db.session import engine
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def count_statements(*_):
+            counter[0] += 1
+
+        request = db_request
+        users = [args.user_id]
+    else:
+        request = simulated_request
+        users = [uuid4() for _ in range(args.users)]
+
+    print(f"{len(users)} 个用户 × {args.bursts} 轮 × {args.duplicates} 个相同请求，到达分布 {args.jitter} ms")
+    print(f"{'coalescing':>10} {'requests':>9} {'queries':>8} {'saved':>7} {'p50 ms':>8} {'p99 ms':>8} {'total s':>8}")
+    baseline = None
+    for enabled in (False, True):
+        result = asyncio.run(run(request, users, args, enabled, counter))
+        baseline = baseline or result["queries"]
+        saved = 1 - result["queries"] / baseline
+        print(
+            f"{str(enabled):>10} {result['requests']:>9} {result['queries']:>8} {saved:>7.0%} "
+            f"{result['p50']:>8.1f} {result['p99']:>8.1f} {result['elapsed']:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+结构化字段基准测试
+
+对比重要事项和已完成活动的两种存储方式：
+1. concat：描述以 "\n---\n" 拼在 content 里、完成信息追加到 content（旧实现），
+   每次响应都要 split 拆出描述
+2. columns：description / completion_note 独立存放（当前实现），直接读取
+
+输出每行文本字节数、结束活动时改写的字节数，以及 ImportantMatterResponse 的序列化耗时。
+不依赖数据库。
+
+用法：
+    python -m benchmarks.structured_content --rows 10000 --repeat 20
+"""
+import argparse
+import time
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import orjson
+
+from app.api.v1.schemas.core_focus import ImportantMatterResponse
+
+
+def make_matters(n: int, concat: bool) -> list:
+    start = datetime(2024, 1, 11, 8, 0, 0)
+    rows = []
+    for i in range(n):
+        content = f"重要事项 {i}"
+        description = "完成 FastAPI 项目的核心功能，包括接口设计、数据库迁移和性能测试。" * 3
+        rows.append(SimpleNamespace(
+            id=uuid.uuid4(),
+            content=f"{content}\n---\n{description}" if concat else content,
+            description=None if concat else description,
+            target_duration=3600.0,
+            duration=1800.0,
+            completion_rate=50.0,
+            start_time=start + timedelta(minutes=i),
+            tags=["学习", "编程"],
+        ))
+    return rows
+
+
+def serialize_concat(memory) -> dict:
+    """旧实现：每行 split 出描述"""
+    content_parts = memory.content.split("\n---\n", 1)
+    data = ImportantMatterResponse.serialize_row(memory)
+    data["content"] = content_parts[0]
+    data["description"] = content_parts[1] if len(content_parts) > 1 else None
+    return data
+
+
+def completion_bytes(content: str, note: str, duration: float, end_time: datetime) -> tuple:
+    """结束活动时写入的文本字节数：(旧实现改写整个 content, 当前实现只写 completion_note)"""
+    rewritten = (
+        f"{content}\n"
+        f"---\n"
+        f"完成时间：{end_time.strftime('%H:%M:%S')}\n"
+        f"持续时间：{duration / 60:.1f}分钟\n"
+        f"完成备注：{note}"
+    )
+    return len(rewritten.encode()), len(note.encode())
+
+
+def timed(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    concat_rows = make_matters(args.rows, concat=True)
+    column_rows = make_matters(args.rows, concat=False)
+
+    concat_size = sum(len(row.content.encode()) for row in concat_rows)
+    column_size = sum(len(row.content.encode()) + len(row.description.encode()) for row in column_rows)
+    print(f"{args.rows} 个重要事项")
+    print(f"{'concat':<10} 文本 {concat_size / 1024:>8.1f} KB")
+    print(f"{'columns':<10} 文本 {column_size / 1024:>8.1f} KB")
+
+    old, new = completion_bytes("开始: 重要事项 1", "今天完成了接口和测试", 5400.0, datetime.now())
+    print(f"结束活动写入文本：concat {old} 字节（改写 content），columns {new} 字节（completion_note）")
+
+    concat_ms = timed(lambda: orjson.dumps([serialize_concat(row) for row in concat_rows]), args.repeat)
+    column_ms = timed(
+        lambda: orjson.dumps([ImportantMatterResponse.serialize_row(row) for row in column_rows]),
+        args.repeat
+    )
+    print(f"{'concat':<10} 序列化 {concat_ms:>8.2f} ms")
+    print(f"{'columns':<10} 序列化 {column_ms:>8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+标签存储与重叠查询基准测试
+
+在临时表中生成同一批记忆的两种标签存储：
+1. text[]：当前 Memory.tags 的做法，每行重复保存标签字符串，GIN(array_ops) 索引
+2. int[]：Memory.tag_ids 的做法，只保存标签字典 ID，GIN(gin__int_ops) 索引（需要 intarray 扩展）
+
+输出列数据大小、索引大小，以及两种 && 重叠查询的平均耗时。
+临时表随会话结束删除，不会改动业务数据。
+
+用法：
+    python -m benchmarks.tag_storage --rows 200000 --tags 500 --per-row 3
+"""
+import argparse
+import random
+import time
+
+import sqlalchemy as sa
+
+from app.db.session import SessionLocal
+
+WORDS = ["学习", "编程", "阅读", "运动", "工作", "会议", "写作", "家庭", "健康", "project", "review", "design"]
+
+
+def make_vocabulary(n: int) -> list:
+    return [f"{random.choice(WORDS)}-{i}" for i in range(n)]
+
+
+def timed(db, sql: str, params: dict, runs: int) -> float:
+    """平均耗时（毫秒）"""
+    start = time.perf_counter()
+    for _ in range(runs):
+        db.execute(sa.text(sql), params).all()
+    return (time.perf_counter() - start) / runs * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--tags", type=int, default=500, help="词表大小")
+    parser.add_argument("--per-row", type=int, default=3)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    random.seed(0)
+    vocabulary = make_vocabulary(args.tags)
+    db = SessionLocal()
+    try:
+        db.execute(sa.text("CREATE EXTENSION IF NOT EXISTS intarray"))
+        db.execute(sa.text("CREATE TEMP TABLE bench_text_tags (id serial PRIMARY KEY, tags text[])"))
+        db.execute(sa.text("CREATE TEMP TABLE bench_int_tags (id serial PRIMARY KEY, tag_ids int[])"))
+
+        batch = []
+        for _ in range(args.rows):
+            batch.append(random.sample(range(args.tags), args.per_row))
+            if len(batch) == 10000:
+                insert_batch(db, batch, vocabulary)
+                batch = []
+        if batch:
+            insert_batch(db, batch, vocabulary)
+
+        db.execute(sa.text("CREATE INDEX ON bench_text_tags USING gin (tags)"))
+        db.execute(sa.text("CREATE INDEX ON bench_int_tags USING gin (tag_ids gin__int_ops)"))
+        db.execute(sa.text("ANALYZE bench_text_tags"))
+        db.execute(sa.text("ANALYZE bench_int_tags"))
+
+        print(f"{args.rows} 行，词表 {args.tags} 个标签，每行 {args.per_row} 个")
+        for table, column in (("bench_text_tags", "tags"), ("bench_int_tags", "tag_ids")):
+            column_size, index_size = db.execute(sa.text(
+                f"SELECT sum(pg_column_size({column})), pg_indexes_size('{table}') FROM {table}"
+            )).one()
+            print(f"{column:<8} 列数据 {column_size / 1024 / 1024:>8.2f} MB   索引 {index_size / 1024 / 1024:>8.2f} MB")
+
+        query_ids = random.sample(range(args.tags), 2)
+        text_ms = timed(
+            db, "SELECT id FROM bench_text_tags WHERE tags && CAST(:tags AS text[])",
+            {"tags": [vocabulary[i] for i in query_ids]}, args.runs
+        )
+        int_ms = timed(
+            db, "SELECT id FROM bench_int_tags WHERE tag_ids && CAST(:tag_ids AS int[])",
+            {"tag_ids": [i + 1 for i in query_ids]}, args.runs
+        )
+        print(f"{'text[] &&':<12} {text_ms:>8.2f} ms")
+        print(f"{'int[] &&':<12} {int_ms:>8.2f} ms")
+    finally:
+        db.rollback()
+        db.close()
+
+
+def insert_batch(db, batch: list, vocabulary: list) -> None:
+    db.execute(
+        sa.text("INSERT INTO bench_text_tags (tags) VALUES (:tags)"),
+        [{"tags": [vocabulary[i] for i in row]} for row in batch]
+    )
+    db.execute(
+        sa.text("INSERT INTO bench_int_tags (tag_ids) VALUES (:tag_ids)"),
+        [{"tag_ids": [i + 1 for i in row]} for row in batch]
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+日时间轴读取路径基准测试
+
+在 500 条活动的日视图上对比三种读取方式：
+1. full_orm：全列 ORM 查询（含 vector / emotion_score，即旧实现）
+2. load_only：ORM + 默认延迟加载分析列
+3. core：Core 列投影（当前 TimelineService.get_daily_timeline 的实现）
+
+输出每种方式的单行客户端 CPU 时间、总耗时和传输字节数（按 pg_column_size 估算）。
+测试数据在同一事务中写入，结束后回滚，不会污染数据库。
+
+用法：
+    python -m benchmarks.timeline_projection --rows 500 --repeat 50
+"""
+import argparse
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import sqlalchemy as sa
+from sqlalchemy.orm import undefer_group
+
+from app.db.session import SessionLocal
+from app.db.models.user import User
+from app.db.models.memory import Memory
+from app.db.models.enums import MemoryType
+from app.services.timeline_service import TIMELINE_COLUMNS
+
+
+def seed(db, rows: int, day: datetime):
+    """写入一个测试用户和一天的活动"""
+    user = User(
+        email=f"bench-{uuid.uuid4().hex[:8]}@example.com",
+        username=f"bench-{uuid.uuid4().hex[:8]}",
+        hashed_password="x",
+    )
+    db.add(user)
+    db.flush()
+
+    step = timedelta(seconds=86000 / rows)
+    payload = []
+    for i in range(rows):
+        start = day + step * i
+        payload.append({
+            "user_id": user.id,
+            "memory_type": MemoryType.TIMELINE,
+            "content": "活动记录 " * 20,
+            "tags": ["学习", "编程"],
+            "start_time": start,
+            "end_time": start + step,
+            "duration": step.total_seconds(),
+            "is_ongoing": False,
+            "emotion_score": {"joy": random.random(), "stress": random.random()},
+            "vector": [random.random() for _ in range(768)],
+            "description": "说明 " * 50,
+        })
+    db.execute(sa.insert(Memory), payload)
+    return user.id
+
+
+def day_filter(user_id, day: datetime):
+    return (
+        Memory.user_id == user_id,
+        Memory.memory_type == MemoryType.TIMELINE,
+        Memory.start_time >= day,
+        Memory.start_time < day + timedelta(days=1),
+    )
+
+
+def measure(label, fn, rows, repeat, db):
+    db.expunge_all()
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    for _ in range(repeat):
+        fn()
+        db.expunge_all()
+    cpu = time.process_time() - cpu
+    wall = time.perf_counter() - wall
+    print(
+        f"{label:<10} 总耗时 {wall / repeat * 1000:8.2f} ms/次  "
+        f"客户端CPU {cpu / (repeat * rows) * 1e6:7.2f} µs/行"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    day = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    db = SessionLocal()
+    try:
+        user_id = seed(db, args.rows, day)
+        where = day_filter(user_id, day)
+
+        all_columns = list(Memory.__table__.c)
+        lean_columns = [c for c in all_columns if c.name not in ("vector", "emotion_score")]
+        # 每种方式：(实际选出的列, 查询函数)
+        strategies = {
+            "full_orm": (
+                all_columns,
+                lambda: db.query(Memory).options(undefer_group("analysis")).filter(*where).all(),
+            ),
+            "load_only": (
+                lean_columns,
+                lambda: db.query(Memory).filter(*where).all(),
+            ),
+            "core": (
+                TIMELINE_COLUMNS,
+                lambda: db.execute(sa.select(*TIMELINE_COLUMNS).where(*where)).all(),
+            ),
+        }
+
+        print(f"=== {args.rows} 条活动的日视图，每种方式重复 {args.repeat} 次 ===")
+        for label, (columns, fn) in strategies.items():
+            # 按列实际存储大小估算传输字节数
+            sized = sa.select(*columns).where(*where).subquery("t")
+            nbytes = db.execute(
+                sa.select(sa.func.sum(sa.func.pg_column_size(sa.literal_column("t.*")))).select_from(sized)
+            ).scalar()
+            print(f"{label:<10} 传输约 {nbytes / 1024:8.1f} KiB")
+            measure(label, fn, args.rows, args.repeat, db)
+    finally:
+        db.rollback()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
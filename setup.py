@@ -16,6 +16,8 @@ setup(
         "bcrypt>=4.0.1",  # 指定 bcrypt 版本
         "python-multipart>=0.0.5",
         "pydantic-settings>=2.0.0",
+        "orjson>=3.8.0",
+        "numpy>=1.21.0",
     ],
     python_requires=">=3.9",
 ) 
\ No newline at end of file